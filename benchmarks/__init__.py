@@ -0,0 +1 @@
+"""Offline benchmarks for CareerEcho's CPU-bound helpers."""
@@ -0,0 +1,127 @@
+"""Throughput of the markdown -> flowable compiler against the old per-line loop.
+
+Usage:
+    python -m benchmarks.bench_markdown [--lines 10000] [--repeat 5] [--build]
+
+Three stages are reported for each implementation:
+
+- markup:    markdown -> ReportLab paragraph markup (our own code only)
+- flowables: markup plus Paragraph construction (ReportLab parses the markup)
+- build:     flowables plus doc.build layout (only with --build)
+
+Paragraph construction and layout are ReportLab's cost and dominate the
+later stages, so the markup stage is where the implementations differ.
+"""
+import argparse
+import re
+import time
+from io import BytesIO
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+from benchmarks.corpora import generate_markdown
+from utils import pdf
+
+
+# The implementation create_pdf used before the single-pass compiler,
+# kept here as the comparison baseline.
+
+def legacy_clean_text(text):
+    text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
+    text = re.sub(r'(?<!\*)\*([^*]+)\*(?!\*)', r'<i>\1</i>', text)
+    text = re.sub(r'`([^`]+)`', r'<font name="Courier">\1</font>', text)
+    text = text.replace('```', '')
+    return text
+
+
+def legacy_story(markdown_content, make=Paragraph):
+    story = []
+    in_code_block = False
+    for line in markdown_content.split('\n'):
+        original_line = line
+        line = line.strip()
+        if not line:
+            story.append(Spacer(1, 6))
+            continue
+        if line.startswith('---'):
+            story.append(Spacer(1, 12))
+            continue
+        if line.startswith('```'):
+            in_code_block = not in_code_block
+            continue
+        if in_code_block:
+            story.append(make(legacy_clean_text(original_line), pdf.code_style))
+            continue
+        if line.startswith('# '):
+            story.append(make(legacy_clean_text(line[2:]), pdf.title_style))
+        elif line.startswith('## '):
+            story.append(make(legacy_clean_text(line[3:]), pdf.heading_style))
+        elif line.startswith('### '):
+            story.append(make(legacy_clean_text(line[4:]), pdf.subheading_style))
+        elif line.startswith('#### '):
+            story.append(make(legacy_clean_text(line[5:]), pdf.subheading_style))
+        elif line.startswith('• ') or line.startswith('- ') or line.startswith('* '):
+            story.append(make(f"• {legacy_clean_text(line[2:])}", pdf.bullet_style))
+        elif re.match(r'^\d+\.', line):
+            story.append(make(legacy_clean_text(line), pdf.styles['Normal']))
+        else:
+            cleaned_line = legacy_clean_text(line)
+            if cleaned_line:
+                story.append(make(cleaned_line, pdf.styles['Normal']))
+    return story
+
+
+def legacy_markup(markdown_content):
+    return legacy_story(markdown_content, make=lambda text, style: (text, style))
+
+
+def compiler_markup(markdown_content):
+    return [pdf.clean_text(block[-1]) for block in pdf.parse_markdown(markdown_content)
+            if len(block) > 1 and isinstance(block[-1], str)]
+
+
+def _build(story):
+    doc = SimpleDocTemplate(BytesIO(), pagesize=A4,
+                            rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
+    doc.build(story)
+
+
+def measure(fn, markdown_content, repeat, build=False):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        story = fn(markdown_content)
+        if build:
+            _build(story)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--build", action="store_true", help="include ReportLab layout")
+    args = parser.parse_args()
+
+    markdown_content = generate_markdown(args.lines)
+    num_lines = markdown_content.count("\n") + 1
+    print(f"{num_lines} lines, best of {args.repeat}")
+
+    stages = [
+        ("markup", legacy_markup, compiler_markup, False),
+        ("flowables", legacy_story, pdf.compile_markdown, False),
+    ]
+    if args.build:
+        stages.append(("build", legacy_story, pdf.compile_markdown, True))
+
+    print(f"  {'stage':<10} {'legacy lines/s':>15} {'compiler lines/s':>17} {'speedup':>8}")
+    for stage, legacy_fn, compiler_fn, build in stages:
+        legacy = measure(legacy_fn, markdown_content, args.repeat, build)
+        compiler = measure(compiler_fn, markdown_content, args.repeat, build)
+        print(f"  {stage:<10} {num_lines / legacy:15,.0f} {num_lines / compiler:17,.0f} {legacy / compiler:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Insert and query speed of the cheatsheet topic index at scale.
+
+Usage:
+    python -m benchmarks.bench_topic_index [--topics 100000] [--queries 2000]
+
+Builds a throwaway index of generated topics spread over every difficulty,
+type and length partition, then times three kinds of lookup: topics that are
+stored verbatim (reworded in case and order), topics with a one-letter typo
+(found through the MinHash buckets), and topics that aren't stored at all.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.corpora import generate_topics
+from utils.cheatsheet import CHEATSHEET_TYPES, DIFFICULTY_LEVELS, LENGTHS
+from utils.topic_index import TopicIndex
+
+PARTITIONS = [f"{d}|{t}|{l}" for d in DIFFICULTY_LEVELS for t in CHEATSHEET_TYPES for l in LENGTHS]
+
+
+def _reword(topic, rng):
+    words = topic.split()
+    rng.shuffle(words)
+    return " ".join(word.lower() if rng.random() < 0.5 else word.upper() for word in words)
+
+
+def _typo(topic, rng):
+    position = rng.randrange(len(topic))
+    return topic[:position] + rng.choice("abcdefghijklmnopqrstuvwxyz") + topic[position + 1:]
+
+
+def _report(label, seconds, found):
+    seconds = sorted(seconds)
+    p99 = seconds[min(len(seconds) - 1, int(len(seconds) * 0.99))]
+    print(f"{label:<10} median {statistics.median(seconds) * 1000:6.2f} ms   "
+          f"p99 {p99 * 1000:6.2f} ms   matched {found}/{len(seconds)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--topics", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    topics = generate_topics(args.topics + args.queries)
+    stored, unseen = topics[:args.topics], topics[args.topics:]
+    with tempfile.TemporaryDirectory() as directory:
+        index = TopicIndex(os.path.join(directory, "topics.sqlite3"))
+        start = time.perf_counter()
+        for i, topic in enumerate(stored):
+            index.add(PARTITIONS[i % len(PARTITIONS)], topic, f"key-{i}")
+        elapsed = time.perf_counter() - start
+        print(f"indexed {len(stored)} topics in {elapsed:.1f}s ({len(stored) / elapsed:.0f}/s)")
+
+        sample = rng.sample(range(len(stored)), args.queries)
+        for label, make_query, indices in [
+            ("reworded", lambda i: _reword(stored[i], rng), sample),
+            ("typo", lambda i: _typo(stored[i], rng), sample),
+            ("unseen", None, range(len(unseen))),
+        ]:
+            seconds = []
+            found = 0
+            for i in indices:
+                partition = PARTITIONS[i % len(PARTITIONS)]
+                query = unseen[i] if make_query is None else make_query(i)
+                start = time.perf_counter()
+                matches = index.find(partition, query, args.threshold)
+                seconds.append(time.perf_counter() - start)
+                found += bool(matches)
+            _report(label, seconds, found)
+
+
+if __name__ == "__main__":
+    main()
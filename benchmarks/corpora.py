@@ -0,0 +1,93 @@
+"""Deterministic synthetic inputs for the benchmarks."""
+import json
+import random
+from io import BytesIO
+
+_WORDS = ("array list dict set tuple heap stack queue graph tree "
+          "hash sort search index slice key value node edge").split()
+
+
+def generate_markdown(num_lines, seed=0):
+    """Cheatsheet-like markdown with headings, lists, code and tables."""
+    rng = random.Random(seed)
+
+    def sentence(n):
+        text = " ".join(rng.choice(_WORDS) for _ in range(n))
+        roll = rng.random()
+        if roll < 0.2:
+            text += f" **{rng.choice(_WORDS)}**"
+        elif roll < 0.35:
+            text += f" `{rng.choice(_WORDS)}()`"
+        elif roll < 0.45:
+            text += f" *{rng.choice(_WORDS)}*"
+        return text
+
+    lines = ["# Generated Cheatsheet", ""]
+    while len(lines) < num_lines:
+        lines += [f"## {sentence(3).title()}", ""]
+        for _ in range(rng.randint(2, 6)):
+            lines.append(f"- {sentence(8)}")
+            if rng.random() < 0.3:
+                lines.append(f"  - {sentence(6)}")
+        lines.append("")
+        for n in range(1, rng.randint(2, 5)):
+            lines.append(f"{n}. {sentence(7)}")
+        lines += ["", sentence(20), ""]
+        if rng.random() < 0.3:
+            lines += ["```", "for item in items:", "    total = total + item", "```", ""]
+        if rng.random() < 0.2:
+            lines += ["| Operation | Cost |", "|---|---|", "| lookup | O(1) |", "| insert | O(log n) |", ""]
+        lines.append("---")
+    return "\n".join(lines[:num_lines])
+
+
+def generate_posts_response(num_posts, words_per_post=120, seed=0, fenced=True, malformed=False):
+    """A model reply holding a JSON array of posts.
+
+    `malformed` cuts the array off mid-string, as a truncated reply would be.
+    """
+    rng = random.Random(seed)
+    posts = [
+        "\n".join(" ".join(rng.choice(_WORDS) for _ in range(12)) for _ in range(words_per_post // 12))
+        for _ in range(num_posts)
+    ]
+    text = json.dumps(posts)
+    if malformed:
+        text = text[: len(text) * 2 // 3]
+    return f"```json\n{text}\n```" if fenced else text
+
+
+def generate_fields_response(seed=0):
+    rng = random.Random(seed)
+    fields = {key: " ".join(rng.choice(_WORDS) for _ in range(6)) for key in ["topic", "post_type", "tone", "audience"]}
+    return f"```json\n{json.dumps(fields, indent=2)}\n```"
+
+
+def generate_topics(count, seed=0):
+    """Distinct study topics of two to five words, like users type them."""
+    rng = random.Random(seed)
+    syllables = "ka lo mi ne ra su ti vo be da fe gi ho ju pe qu sa ze".split()
+    vocabulary = sorted({"".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(3000)})
+    topics = set()
+    while len(topics) < count:
+        topics.add(" ".join(rng.sample(vocabulary, rng.randint(2, 5))).title())
+    return sorted(topics)
+
+
+def generate_pdf(num_pages, seed=0):
+    """Bytes of a resume-like PDF with `num_pages` pages of text."""
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate
+
+    rng = random.Random(seed)
+    style = getSampleStyleSheet()["Normal"]
+    story = []
+    for page in range(num_pages):
+        for heading in ("Experience", "Projects", "Skills"):
+            story.append(Paragraph(heading, style))
+            story += [Paragraph(" ".join(rng.choice(_WORDS) for _ in range(40)), style) for _ in range(4)]
+        if page < num_pages - 1:
+            story.append(PageBreak())
+    buffer = BytesIO()
+    SimpleDocTemplate(buffer).build(story)
+    return buffer.getvalue()
@@ -0,0 +1,128 @@
+"""Local HTTP stand-in for the model API, for load tests.
+
+Replies come from utils.fake_llm (shaped like what each page expects), after
+a configurable delay: a fixed latency plus a per-token time for the reply,
+with random jitter. A fraction of requests can be rejected with a 429.
+Point the app at it with CAREERECHO_LLM_PROVIDER=fake_server and
+CAREERECHO_FAKE_LLM_URL.
+
+Usage:
+    python -m benchmarks.fake_llm_server --port 8765 --latency 0.8 --error-rate 0.05
+
+Protocol: POST /generate with {"model", "prompt", "stream"} returns
+{"text": ...}, or one JSON line per chunk when streaming. GET /stats returns
+request and rejection counts.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.fake_llm import fake_reply
+
+CHUNK_WORDS = 8
+# Rough tokens per word of English output
+TOKENS_PER_WORD = 1.3
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def _send_json(self, status, payload, headers=()):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/stats":
+            self._send_json(404, {"error": "not found"})
+            return
+        self._send_json(200, self.server.stats())
+
+    def do_POST(self):
+        if self.path != "/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        server = self.server
+        jitter = random.uniform(1 - server.jitter, 1 + server.jitter)
+        time.sleep(server.latency * jitter)
+        if server.error_rate and random.random() < server.error_rate:
+            server.count("rejected")
+            self._send_json(429, {"error": {"code": 429, "message": "429 RESOURCE_EXHAUSTED. Please retry in 0.5s."}},
+                            headers=[("Retry-After", "0.5")])
+            return
+        server.count("answered")
+        words = fake_reply(request.get("prompt", "")).split(" ")
+        word_delay = server.token_latency * TOKENS_PER_WORD * jitter
+        if not request.get("stream"):
+            time.sleep(word_delay * len(words))
+            self._send_json(200, {"text": " ".join(words), "model": request.get("model")})
+            return
+        # HTTP/1.0: the reply ends when the connection closes
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for start in range(0, len(words), CHUNK_WORDS):
+            piece = words[start:start + CHUNK_WORDS]
+            time.sleep(word_delay * len(piece))
+            text = " ".join(piece) + (" " if start + CHUNK_WORDS < len(words) else "")
+            self.wfile.write(json.dumps({"text": text}).encode() + b"\n")
+            self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, latency=0.5, token_latency=0.0, jitter=0.2, error_rate=0.0):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.token_latency = token_latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._counts = {"answered": 0, "rejected": 0}
+
+    def count(self, outcome):
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="0 picks a free port")
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds before every reply")
+    parser.add_argument("--token-latency", type=float, default=0.002,
+                        help="extra seconds per output token, so long replies take longer")
+    parser.add_argument("--jitter", type=float, default=0.2, help="random +/- fraction applied to the delays")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests rejected with a 429")
+    args = parser.parse_args(argv)
+
+    server = FakeLLMServer((args.host, args.port), args.latency, args.token_latency, args.jitter, args.error_rate)
+    print(f"listening on http://{args.host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,480 @@
+"""Concurrent multi-session load test for the Streamlit pages.
+
+Many simulated users share one process, the way sessions share a replica
+running `streamlit run main.py`: the LLM clients, rate limiter, caches, job
+pool and session store are all shared. Each user is a thread that walks
+through realistic flows with Streamlit's AppTest, and every script run
+(page load or widget interaction) is timed as one page latency sample:
+
+    cheatsheet  open the page, generate a cheatsheet, download the PDF
+    posts       generate 10 posts, select one, refine it and wait for the result
+    resume      upload a resume PDF and get it reviewed
+
+The model is benchmarks/fake_llm_server.py, started in its own process so
+its CPU isn't counted, with configurable latency and 429 injection. The
+report gives p50/p95/p99 latency per step and overall, throughput, and the
+process CPU time and memory growth divided per session. CPU includes the
+AppTest driver itself, so treat it as an upper bound.
+
+Usage:
+    python -m benchmarks.loadtest --users 20
+    python -m benchmarks.loadtest --users 50 --rounds 2 --flows posts,resume --latency 1.5 --error-rate 0.05
+    python -m benchmarks.loadtest --users 10 --json load.json
+
+The app's own settings apply (e.g. CAREERECHO_LLM_RATE_LIMIT_RPS), so a
+replica is measured as it would be configured; pass --no-rate-limit to take
+the process rate limiter out of the picture.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FLOWS = ["cheatsheet", "posts", "resume"]
+PAGES = ["cheatsheet_page", "input_page", "edit_page", "upload_pdf"]
+# How often a waiting user reruns the edit page, like its progress fragment
+POLL_INTERVAL = 0.5
+# Streamlit releases share_streamlit_runtime() has been checked against
+STREAMLIT_VERSIONS = ("1.66.",)
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, max(0, int(round(fraction * len(samples))) - 1))]
+
+
+def _rss_bytes():
+    """Current resident set size (peak RSS where /proc isn't available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def check_streamlit_version():
+    """Stop with a clear message unless Streamlit is a release the patches were checked against."""
+    import streamlit
+    from streamlit.testing.v1 import app_test
+
+    missing = [name for name in ("Runtime", "PagesManager", "ScriptCache") if not hasattr(app_test, name)]
+    if not streamlit.__version__.startswith(STREAMLIT_VERSIONS) or missing:
+        raise SystemExit(
+            f"benchmarks.loadtest patches AppTest internals and was checked against Streamlit "
+            f"{', '.join(version + 'x' for version in STREAMLIT_VERSIONS)}, but Streamlit "
+            f"{streamlit.__version__} is installed{' (app_test no longer has ' + ', '.join(missing) + ')' if missing else ''}. "
+            "Check share_streamlit_runtime() against it and add it to STREAMLIT_VERSIONS."
+        )
+
+
+def share_streamlit_runtime():
+    """Make concurrent AppTests share what one Streamlit server shares.
+
+    AppTest is written for one test at a time: every run installs a fresh
+    mock Runtime and clears it when it ends (breaking runs still in flight
+    on other threads), resets the pages-directory flag, and compiles the
+    script again with a new cache. A real server has one Runtime and
+    compiles each page once, so the first runtime is kept, the flag is left
+    alone and the script cache is shared. Returns a context manager to hold
+    AppTest mode on for the whole test.
+
+    These are Streamlit internals, so check_streamlit_version() runs first.
+    """
+    check_streamlit_version()
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.pages_manager import PagesManager
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test
+    from streamlit.testing.v1.util import patch_config_options
+
+    class KeepFirstRuntime(type):
+        def __setattr__(cls, name, value):
+            if name != "_instance":
+                super().__setattr__(name, value)
+            elif value is not None and Runtime._instance is None:
+                Runtime._instance = value
+
+    class SharedRuntime(Runtime, metaclass=KeepFirstRuntime):
+        pass
+
+    class SharedPagesManager(PagesManager):
+        # AppTest's reset of uses_pages_directory lands here, not on PagesManager
+        pass
+
+    script_cache = ScriptCache()
+    app_test.Runtime = SharedRuntime
+    app_test.PagesManager = SharedPagesManager
+    app_test.ScriptCache = lambda: script_cache
+    return patch_config_options({"global.appTest": True})
+
+
+def start_fake_server(args):
+    """Start the fake model server on a free port; returns (process, url)."""
+    command = [sys.executable, "-m", "benchmarks.fake_llm_server", "--port", "0",
+               "--latency", str(args.latency), "--token-latency", str(args.token_latency),
+               "--jitter", str(args.jitter), "--error-rate", str(args.error_rate)]
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, text=True,
+                               env=dict(os.environ, PYTHONPATH=ROOT))
+    line = process.stdout.readline().strip()
+    if not line.startswith("listening on "):
+        process.kill()
+        raise RuntimeError(f"fake LLM server did not start: {line!r}")
+    return process, line[len("listening on "):]
+
+
+class Session:
+    """One simulated user's browser tab: times every script run it makes."""
+
+    def __init__(self, report, think, timeout):
+        self.report = report
+        self.think = think
+        self.timeout = timeout
+        self.app = None
+
+    def open(self, page):
+        """Land on the home page and follow its link to `page`, as a visitor would."""
+        from streamlit.testing.v1 import AppTest
+
+        at = self.app = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=self.timeout)
+        if not self.step("home", at.run):
+            return None
+        at.switch_page(page)
+        return at
+
+    def step(self, name, action):
+        """Run `action` (one or more script runs), timing it under `name`."""
+        start = time.perf_counter()
+        error = None
+        try:
+            at = action()
+            if at is not None:
+                if at.exception:
+                    error = at.exception[0].message.splitlines()[0]
+                elif at.error:
+                    error = at.error[0].value
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.report.record(name, time.perf_counter() - start, error)
+        if self.think:
+            time.sleep(random.uniform(0, 2 * self.think))
+        return error is None
+
+
+def _button(at, label_start):
+    return next(button for button in at.button if button.label.startswith(label_start))
+
+
+def cheatsheet_flow(session, rng, topic):
+    from utils import cheatsheet, history, session_store
+
+    at = session.open("pages/cheatsheet_page.py")
+    if at is None or not session.step("cheatsheet:open", at.run):
+        return False
+    at.text_input[0].set_value(topic)
+    at.selectbox[2].set_value(rng.choice(cheatsheet.LENGTHS))
+    if not session.step("cheatsheet:generate", lambda: _button(at, "📝 Generate").click().run()):
+        return False
+
+    def download():
+        # What the download button's deferred callable does when clicked
+        owner = history.owner_token(at.query_params, at.session_state)
+        markdown = session_store.get(at.session_state, "generated_cheatsheet")
+        history.cheatsheet_pdf(owner, at.session_state["cheatsheet_history_id"], markdown)
+
+    return session.step("cheatsheet:download", download)
+
+
+def posts_flow(session, rng, topic):
+    at = session.open("pages/input_page.py")
+    if at is None or not session.step("posts:open", at.run):
+        return False
+    at.text_input(key="_topic_input").set_value(topic)
+    at.text_input(key="_tone_input").set_value(rng.choice(["excited", "humble", "informative"]))
+    at.text_input(key="_version_input").set_value("10")
+    if not session.step("posts:generate", lambda: _button(at, "Generate Post").click().run()):
+        return False
+    if not session.step("posts:select", lambda: _button(at, f"Select Post {rng.randint(1, 10)}").click().run()):
+        return False
+    # The page switched itself; AppTest would otherwise rerun the one it opened
+    at.switch_page("pages/edit_page.py")
+    if not session.step("posts:refine_click", lambda: _button(at, "🤖 Refine").click().run()):
+        return False
+
+    def wait_for_refinement():
+        deadline = time.perf_counter() + session.timeout
+        while at.session_state["refine_job"] is not None:
+            if time.perf_counter() > deadline:
+                raise TimeoutError("refinement did not finish")
+            time.sleep(POLL_INTERVAL)
+            at.run()
+        return at
+
+    return session.step("posts:refine_wait", wait_for_refinement)
+
+
+def resume_flow(session, rng, topic, pdf_bytes):
+    at = session.open("pages/upload_pdf.py")
+    if at is None or not session.step("resume:open", at.run):
+        return False
+    at.text_input[0].set_value(f"{topic} Engineer")
+    upload = ("resume.pdf", pdf_bytes, "application/pdf")
+    if not session.step("resume:upload", lambda: at.file_uploader[0].set_value(upload).run()):
+        return False
+    return session.step("resume:review", lambda: _button(at, "Review Resume").click().run())
+
+
+class Report:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+        self.flows = defaultdict(lambda: {"completed": 0, "failed": 0})
+        self.usage = []
+
+    def record(self, step, seconds, error=None):
+        with self._lock:
+            self.samples[step].append(seconds)
+            if error:
+                self.errors[step][error[:120]] += 1
+
+    def error(self, step, message):
+        """Count an error that happened outside a timed page run."""
+        with self._lock:
+            self.errors[step][message[:120]] += 1
+
+    def flow_done(self, flow, ok):
+        with self._lock:
+            self.flows[flow]["completed" if ok else "failed"] += 1
+
+    def session_usage(self, usage):
+        """Session state size at the end of a flow (see session_store.session_usage)."""
+        with self._lock:
+            self.usage.append(usage)
+
+    def _row(self, samples, errors):
+        samples = sorted(samples)
+        return {
+            "count": len(samples),
+            "errors": errors,
+            "p50_ms": round(percentile(samples, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(samples, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(samples, 0.99) * 1000, 1),
+            "max_ms": round(samples[-1] * 1000, 1),
+        }
+
+    def summary(self):
+        steps = {step: self._row(samples, sum(self.errors[step].values()))
+                 for step, samples in sorted(self.samples.items())}
+        everything = [seconds for samples in self.samples.values() for seconds in samples]
+        total_errors = sum(sum(errors.values()) for errors in self.errors.values())
+        return {
+            "steps": steps,
+            "overall": self._row(everything, total_errors) if everything else None,
+            "flows": dict(self.flows),
+            "errors": {step: dict(errors) for step, errors in self.errors.items()},
+        }
+
+
+def run_user(index, args, report, topics, pdf_bytes, start_gate):
+    from utils import session_store
+
+    rng = random.Random(args.seed + index)
+    session = Session(report, args.think, args.timeout)
+    flows = [flow for flow in args.flows]
+    start_gate.wait()
+    if args.ramp:
+        time.sleep(args.ramp * index / max(1, args.users))
+    for round_ in range(args.rounds):
+        # Users start on different flows so every flow is exercised at once
+        for offset in range(len(flows)):
+            flow = flows[(index + offset) % len(flows)]
+            topic = topics[(index * args.rounds + round_) % len(topics)]
+            try:
+                if flow == "cheatsheet":
+                    ok = cheatsheet_flow(session, rng, topic)
+                elif flow == "posts":
+                    ok = posts_flow(session, rng, topic)
+                else:
+                    ok = resume_flow(session, rng, topic, pdf_bytes)
+            except Exception as e:
+                # e.g. the page didn't show the widget the flow needs next
+                report.error(f"{flow}:flow", f"{type(e).__name__}: {e}")
+                ok = False
+            report.flow_done(flow, ok)
+            if session.app is not None:
+                # Measured here rather than from the app's sampled session report
+                report.session_usage(session_store.session_usage(session.app.session_state))
+                session.app = None
+
+
+def run(args):
+    """Run the load test and return the report as a dict."""
+    from streamlit.testing.v1 import AppTest
+
+    from benchmarks import corpora
+    from utils import admission, metrics, warmup
+
+    topics = corpora.generate_topics(args.users * args.rounds, seed=args.seed)
+    pdf_bytes = corpora.generate_pdf(2, seed=args.seed)
+    report = Report()
+    start_gate = threading.Event()
+    threads = [
+        threading.Thread(target=run_user, args=(i, args, report, topics, pdf_bytes, start_gate),
+                         name=f"loadtest-user-{i}", daemon=True)
+        for i in range(args.users)
+    ]
+    for thread in threads:
+        thread.start()
+
+    # Pay for imports and client set-up before measuring, as a warm replica would have
+    warmup.start(force=True).join()
+    at = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=args.timeout)
+    at.run()
+    for page in PAGES:
+        at.switch_page(f"pages/{page}.py").run()
+    rss_before = _rss_bytes()
+    cpu_before = time.process_time()
+    start = time.perf_counter()
+    start_gate.set()
+    peak_rss = rss_before
+    while any(thread.is_alive() for thread in threads):
+        peak_rss = max(peak_rss, _rss_bytes())
+        time.sleep(0.2)
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu_before
+    rss_after = _rss_bytes()
+
+    summary = report.summary()
+    flows_run = sum(sum(counts.values()) for counts in summary["flows"].values())
+    interactions = sum(step["count"] for step in summary["steps"].values())
+    usage = report.usage
+    summary.update({
+        "users": args.users,
+        "rounds": args.rounds,
+        "wall_seconds": round(wall, 2),
+        "throughput": {
+            "flows_per_second": round(flows_run / wall, 2),
+            "page_runs_per_second": round(interactions / wall, 2),
+        },
+        "per_session": {
+            "sessions": flows_run,
+            "cpu_ms": round(cpu / max(1, flows_run) * 1000, 1),
+            "rss_growth_kb": round((rss_after - rss_before) / max(1, flows_run) / 1024, 1),
+            "state_kb": round(sum(row["memory_bytes"] for row in usage) / max(1, len(usage)) / 1024, 1),
+            "stored_kb": round(sum(row["stored_bytes"] for row in usage) / max(1, len(usage)) / 1024, 1),
+        },
+        "process": {
+            "cpu_seconds": round(cpu, 2),
+            "cpu_utilisation": round(cpu / wall, 2),
+            "rss_before_mb": round(rss_before / 2 ** 20, 1),
+            "rss_peak_mb": round(peak_rss / 2 ** 20, 1),
+            "rss_after_mb": round(rss_after / 2 ** 20, 1),
+        },
+        "llm": {
+            "fallbacks": sum(value for name, value in metrics.snapshot().items() if name.startswith("llm_fallbacks")),
+            "retried": metrics.get_counter("llm_retried"),
+            "throttled": metrics.get_counter("llm_throttled"),
+        },
+        "admission": admission.stats(),
+    })
+    return summary
+
+
+def print_report(summary, server_stats):
+    print(f"{summary['users']} users x {summary['rounds']} round(s) in {summary['wall_seconds']}s")
+    print(f"{'step':<22} {'count':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    rows = list(summary["steps"].items())
+    if summary["overall"]:
+        rows.append(("overall", summary["overall"]))
+    for step, row in rows:
+        print(f"{step:<22} {row['count']:>6} {row['errors']:>6} {row['p50_ms']:>9} "
+              f"{row['p95_ms']:>9} {row['p99_ms']:>9} {row['max_ms']:>9}")
+    print()
+    for flow, counts in sorted(summary["flows"].items()):
+        print(f"{flow:<12} completed {counts['completed']:>4}  failed {counts['failed']:>4}")
+    throughput = summary["throughput"]
+    print(f"throughput: {throughput['flows_per_second']} flows/s, {throughput['page_runs_per_second']} page runs/s")
+    per_session = summary["per_session"]
+    process = summary["process"]
+    print(f"per session: {per_session['cpu_ms']} ms CPU, {per_session['rss_growth_kb']} KB RSS growth, "
+          f"{per_session['state_kb']} KB session state, {per_session['stored_kb']} KB stored artifacts")
+    print(f"process: {process['cpu_seconds']}s CPU ({process['cpu_utilisation']} cores), RSS "
+          f"{process['rss_before_mb']} -> peak {process['rss_peak_mb']} MB")
+    llm = summary["llm"]
+    print(f"model: {server_stats.get('answered', '?')} answered, {server_stats.get('rejected', '?')} rejected with 429; "
+          f"app retried {llm['retried']}, fell back {llm['fallbacks']}, throttled {llm['throttled']}")
+    for gate, stats in summary["admission"].items():
+        print(f"admission {gate}: limit {stats['limit'] or 'none'}, shed {stats['shed']}")
+    for step, errors in sorted(summary["errors"].items()):
+        for message, count in sorted(errors.items(), key=lambda item: -item[1])[:3]:
+            print(f"  {step}: {count} x {message}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=10, help="concurrent sessions")
+    parser.add_argument("--rounds", type=int, default=1, help="times each user runs through its flows")
+    parser.add_argument("--flows", default=",".join(FLOWS), help=f"comma-separated subset of {','.join(FLOWS)}")
+    parser.add_argument("--think", type=float, default=0.0, help="mean seconds a user pauses between interactions")
+    parser.add_argument("--ramp", type=float, default=0.0, help="seconds over which users start")
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds before a single page run is abandoned")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake model: seconds before every reply")
+    parser.add_argument("--token-latency", type=float, default=0.002, help="fake model: extra seconds per output token")
+    parser.add_argument("--jitter", type=float, default=0.2, help="fake model: random +/- fraction of the delays")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake model: fraction of requests answered with 429")
+    parser.add_argument("--llm-url", help="use an already running fake model server instead of starting one")
+    parser.add_argument("--no-rate-limit", action="store_true", help="disable the process LLM rate limiter")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+    args.flows = [flow.strip() for flow in args.flows.split(",") if flow.strip()]
+    unknown = set(args.flows) - set(FLOWS)
+    if unknown or not args.flows:
+        parser.error(f"unknown flows: {', '.join(sorted(unknown)) or '(none)'}")
+
+    server = None
+    url = args.llm_url
+    if url is None:
+        server, url = start_fake_server(args)
+    cache_dir = tempfile.mkdtemp(prefix="careerecho-loadtest-")
+    # Settings are read when utils.config is first imported, so set them first
+    os.environ.update({
+        "CAREERECHO_LLM_PROVIDER": "fake_server",
+        "CAREERECHO_FAKE_LLM_URL": url,
+        "CAREERECHO_CACHE_DIR": cache_dir,
+        "CAREERECHO_WARMUP": "0",
+    })
+    if args.no_rate_limit:
+        os.environ["CAREERECHO_LLM_RATE_LIMIT_RPS"] = "0"
+    sys.path.insert(0, ROOT)
+    try:
+        with share_streamlit_runtime():
+            summary = run(args)
+        with urllib.request.urlopen(url.rstrip("/") + "/stats", timeout=10) as response:
+            server_stats = json.loads(response.read())
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    summary["model_server"] = server_stats
+    print_report(summary, server_stats)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    failed = sum(counts["failed"] for counts in summary["flows"].values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
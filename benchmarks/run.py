@@ -0,0 +1,168 @@
+"""Offline micro-benchmark suite for CareerEcho's CPU-bound helpers.
+
+Runs against generated corpora and the deterministic fake LLM, so no API key
+or network is needed. For every case it reports the best time per call and
+the peak memory allocated (via tracemalloc), and compares both against
+benchmarks/baseline.json.
+
+Usage:
+    python -m benchmarks.run                     # run and compare to baseline
+    python -m benchmarks.run -k pdf              # only cases containing "pdf"
+    python -m benchmarks.run --update-baseline   # record new baseline numbers
+
+Exits with status 1 if any case is slower than its baseline by more than
+--tolerance (default 50%) or uses more than --memory-tolerance (default 25%)
+extra peak memory. Baselines are machine specific: record them on the
+machine that runs the comparison.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+# Keep the process rate limiter out of the way of the LLM round-trip cases
+os.environ.setdefault("CAREERECHO_LLM_RATE_LIMIT_RPS", "1000000")
+os.environ.setdefault("CAREERECHO_LLM_RATE_LIMIT_BURST", "1000000")
+
+from benchmarks import corpora  # noqa: E402
+from utils import llm, pdf, posts  # noqa: E402
+from utils.fake_llm import FakeChatModel  # noqa: E402
+from utils.pdf_text import iter_page_text  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+MARKDOWN_SIZES = {"small": 60, "medium": 600, "large": 6_000, "huge": 30_000}
+PDF_PAGES = {"small": 2, "medium": 10, "large": 50}
+
+
+def _cheatsheet_roundtrip(prompt):
+    content = llm.invoke(prompt).content
+    return pdf.create_pdf(content)
+
+
+def build_cases():
+    """name -> (setup, fn); setup() builds the input passed to fn."""
+    cases = {}
+    for size, lines in MARKDOWN_SIZES.items():
+        cases[f"clean_text/{size}"] = (
+            lambda lines=lines: corpora.generate_markdown(lines).split("\n"),
+            lambda text_lines: [pdf.clean_text(line) for line in text_lines],
+        )
+        cases[f"compile_markdown/{size}"] = (
+            lambda lines=lines: corpora.generate_markdown(lines),
+            pdf.compile_markdown,
+        )
+        if size != "huge":
+            cases[f"create_pdf/{size}"] = (
+                lambda lines=lines: corpora.generate_markdown(lines),
+                pdf.create_pdf,
+            )
+    for count in (3, 10):
+        cases[f"parse_multiple_posts/valid_{count}"] = (
+            lambda count=count: corpora.generate_posts_response(count),
+            posts.parse_multiple_posts,
+        )
+        cases[f"parse_multiple_posts/malformed_{count}"] = (
+            lambda count=count: corpora.generate_posts_response(count, malformed=True),
+            posts.parse_multiple_posts,
+        )
+    cases["parse_multiple_posts/huge_unfenced"] = (
+        lambda: corpora.generate_posts_response(10, words_per_post=2_000, fenced=False),
+        posts.parse_multiple_posts,
+    )
+    cases["strip_json_fence/fields"] = (corpora.generate_fields_response, posts.strip_json_fence)
+    cases["strip_json_fence/malformed_posts"] = (
+        lambda: corpora.generate_posts_response(10, words_per_post=1_000, malformed=True),
+        posts.strip_json_fence,
+    )
+    for size, pages in PDF_PAGES.items():
+        cases[f"pdf_text/{size}"] = (
+            lambda pages=pages: corpora.generate_pdf(pages),
+            lambda data: list(iter_page_text(data, max_pages=10_000, max_chars=10 ** 9)),
+        )
+    cases["fake_llm/cheatsheet_to_pdf"] = (
+        lambda: "Create a beginner level cheatsheet for 'Graphs'.",
+        _cheatsheet_roundtrip,
+    )
+    return cases
+
+
+def measure(setup, fn, repeat):
+    arg = setup()
+    timer = timeit.Timer(lambda: fn(arg))
+    number, _ = timer.autorange()
+    seconds = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    tracemalloc.start()
+    try:
+        fn(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": seconds, "peak_bytes": peak}
+
+
+def _format_time(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:8.1f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:8.1f} ms"
+    return f"{seconds:8.2f} s "
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--memory-tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    args = parser.parse_args()
+
+    llm.set_llm(FakeChatModel())
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    print(f"{'case':<38} {'time':>11} {'vs base':>8} {'peak mem':>10} {'vs base':>8}")
+    for name, (setup, fn) in build_cases().items():
+        if args.filter not in name:
+            continue
+        result = results[name] = measure(setup, fn, args.repeat)
+        base = baseline.get(name)
+        time_ratio = mem_ratio = ""
+        if base:
+            t = result["seconds"] / base["seconds"]
+            m = result["peak_bytes"] / base["peak_bytes"] if base["peak_bytes"] else 1.0
+            time_ratio, mem_ratio = f"{t:7.2f}x", f"{m:7.2f}x"
+            if t > 1 + args.tolerance:
+                regressions.append(f"{name}: {t:.2f}x slower than baseline")
+            if m > 1 + args.memory_tolerance:
+                regressions.append(f"{name}: {m:.2f}x the baseline peak memory")
+        print(f"{name:<38} {_format_time(result['seconds'])} {time_ratio:>8} "
+              f"{result['peak_bytes'] / 1024:8.0f} KB {mem_ratio:>8}")
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if regressions:
+        print("\nPerformance regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
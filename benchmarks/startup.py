@@ -0,0 +1,106 @@
+"""Cold-start report for main.py and each page.
+
+Every script is loaded in a fresh interpreter under Streamlit's AppTest,
+the way a new replica serves its first visitor, with `python -X importtime`
+recording the imports made while the script runs. The report gives the
+first-run time of each script and the top-level imports that cost the most.
+An empty script is measured first as the Streamlit floor to compare against.
+
+Usage:
+    python -m benchmarks.startup                      # main.py and every page
+    python -m benchmarks.startup pages/upload_pdf.py  # selected scripts
+    python -m benchmarks.startup --top 10 --json startup.json
+
+The fake LLM provider is used and warm-up is switched off, so the numbers
+are the cold path with no API key or network.
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKER = "--- careerecho script run ---"
+
+_CHILD = f"""
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+sys.stderr.write({MARKER!r} + "\\n")
+sys.stderr.flush()
+start = time.perf_counter()
+at.run()
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "exceptions": [e.message for e in at.exception]}}))
+"""
+
+
+def parse_importtime(stderr):
+    """Top-level imports made after the marker as {module: cumulative seconds}."""
+    lines = stderr.split(MARKER, 1)[-1].splitlines()
+    entries = []
+    for line in lines:
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        entries.append((len(name) - len(name.lstrip()), name.strip(), int(cumulative) / 1e6))
+    if not entries:
+        return {}
+    top_level = min(depth for depth, _, _ in entries)
+    return {name: seconds for depth, name, seconds in entries if depth == top_level}
+
+
+def measure(script):
+    env = dict(os.environ, CAREERECHO_LLM_PROVIDER="fake", CAREERECHO_WARMUP="0", PYTHONPATH=ROOT)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD, os.path.abspath(script)],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=300,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(completed.stderr)
+    result["import_seconds"] = sum(imports.values())
+    result["imports"] = dict(sorted(imports.items(), key=lambda item: item[1], reverse=True))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scripts", nargs="*", help="scripts to measure (default: main.py and pages/*.py)")
+    parser.add_argument("--top", type=int, default=5, help="imports listed per script")
+    parser.add_argument("--json", help="also write the full report to this file")
+    args = parser.parse_args(argv)
+
+    scripts = args.scripts or ["main.py"] + sorted(glob.glob(os.path.join("pages", "*.py"), root_dir=ROOT))
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as empty:
+        empty.write("import streamlit as st\n")
+    report = {}
+    try:
+        for name, path in [("(empty script)", empty.name)] + [(s, os.path.join(ROOT, s)) for s in scripts]:
+            try:
+                result = measure(path)
+            except Exception as e:
+                print(f"{name:<28} failed: {e}")
+                continue
+            report[name] = result
+            print(f"{name:<28} first run {result['seconds'] * 1000:7.0f} ms, "
+                  f"imports {result['import_seconds'] * 1000:7.0f} ms")
+            for module, seconds in list(result["imports"].items())[:args.top]:
+                print(f"    {module:<40} {seconds * 1000:7.1f} ms")
+            for message in result["exceptions"]:
+                print(f"    exception: {message}")
+    finally:
+        os.unlink(empty.name)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Command-line tools for running CareerEcho features headlessly."""
@@ -0,0 +1,216 @@
+"""Generate cheatsheets (markdown and PDF) for every row of a CSV or JSONL file.
+
+Usage:
+    python -m cli.batch_cheatsheets topics.csv --output-dir study_pack/
+
+Each row needs a topic and may set difficulty, type, length and
+custom_requirements (the page's field names difficulty_level and
+cheatsheet_type are accepted too). Missing values default to the first
+option on the page. Matching is case-insensitive and on a prefix, so
+"long" selects "Long (4-6 pages)".
+
+Content is generated with a bounded number of concurrent LLM calls and PDFs
+are rendered in a process pool, since ReportLab is CPU-bound. Each row's
+files are named from its topic and a hash of its requirements, so re-running
+the same input skips rows that are already done, and a topic close enough
+to one generated earlier with the same options reuses it (--fresh disables
+that). A manifest.jsonl in the
+output directory records the outcome of every row. A row whose outline
+sections could not all be generated is written as <name>.partial.md without
+a PDF and counted as failed, so running the same input again retries it.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from utils import config
+from utils.cheatsheet import (
+    CHEATSHEET_TYPES,
+    DIFFICULTY_LEVELS,
+    LENGTHS,
+    cheatsheet_cache_key,
+    create_cheatsheet_requirements,
+    generate_cheatsheet,
+)
+
+_FIELD_ALIASES = {
+    "topic": ["topic"],
+    "difficulty_level": ["difficulty", "difficulty_level"],
+    "cheatsheet_type": ["type", "cheatsheet_type"],
+    "length": ["length"],
+    "custom_requirements": ["custom_requirements", "requirements"],
+}
+_FIELD_OPTIONS = {
+    "difficulty_level": DIFFICULTY_LEVELS,
+    "cheatsheet_type": CHEATSHEET_TYPES,
+    "length": LENGTHS,
+}
+
+
+def read_rows(path):
+    """Rows of a .csv or .jsonl file as dicts."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            return [json.loads(line) for line in f if line.strip()]
+        return list(csv.DictReader(f))
+
+
+def _choose(value, options):
+    if not value:
+        return options[0]
+    wanted = value.strip().lower()
+    for option in options:
+        if option.lower() == wanted or option.lower().startswith(wanted):
+            return option
+    raise ValueError(f"'{value}' is not one of: {', '.join(options)}")
+
+
+def row_requirements(row):
+    """Validated requirements dict for one input row."""
+    fields = {}
+    for field, aliases in _FIELD_ALIASES.items():
+        fields[field] = next((str(row[alias]) for alias in aliases if row.get(alias)), "")
+    if not fields["topic"].strip():
+        raise ValueError("missing topic")
+    for field, options in _FIELD_OPTIONS.items():
+        fields[field] = _choose(fields[field], options)
+    return create_cheatsheet_requirements(fields)
+
+
+def output_stem(requirements):
+    slug = re.sub(r"[^a-z0-9]+", "-", requirements["topic"].lower()).strip("-")[:60] or "cheatsheet"
+    return f"{slug}-{cheatsheet_cache_key(requirements)[:10]}"
+
+
+def _write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def render_pdf_file(markdown_path, pdf_path):
+    """Render one markdown file to PDF (runs in a worker process)."""
+    from utils.pdf import create_pdf
+
+    start = time.perf_counter()
+    with open(markdown_path, encoding="utf-8") as f:
+        buffer = create_pdf(f.read())
+    _write_atomic(pdf_path, buffer.getvalue())
+    return time.perf_counter() - start
+
+
+def partial_path(markdown_path):
+    return markdown_path[:-len(".md")] + ".partial.md"
+
+
+def _generate(index, requirements, markdown_path, fresh=False):
+    """Write the row's markdown; returns (index, seconds, titles of failed sections).
+
+    A cheatsheet with failed sections is written next to the usual path as
+    .partial.md, so a re-run generates the row again.
+    """
+    start = time.perf_counter()
+    content, failed_sections = generate_cheatsheet(requirements, fresh=fresh)
+    if not content:
+        raise RuntimeError("the model returned an empty cheatsheet")
+    _write_atomic(partial_path(markdown_path) if failed_sections else markdown_path, content.encode("utf-8"))
+    return index, time.perf_counter() - start, failed_sections
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="CSV or JSONL file of cheatsheet requests")
+    parser.add_argument("-o", "--output-dir", default="cheatsheets")
+    parser.add_argument("-c", "--concurrency", type=int, default=config.CHEATSHEET_BATCH_CONCURRENCY,
+                        help="maximum concurrent LLM calls")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(),
+                        help="processes used to render PDFs")
+    parser.add_argument("--no-pdf", action="store_true", help="only write markdown")
+    parser.add_argument("--fresh", action="store_true",
+                        help="always call the model instead of reusing cheatsheets for similar topics")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest = open(os.path.join(args.output_dir, "manifest.jsonl"), "a", encoding="utf-8")
+
+    def record(index, status, **details):
+        entry = {"row": index, "status": status, **details}
+        manifest.write(json.dumps(entry) + "\n")
+        manifest.flush()
+        print(" ".join(str(part) for part in [f"[{index}]", status, details.get("topic"), details.get("error")] if part))
+
+    rows = read_rows(args.input)
+    jobs = []
+    failures = 0
+    for index, row in enumerate(rows):
+        try:
+            requirements = row_requirements(row)
+        except ValueError as e:
+            record(index, "invalid", error=str(e))
+            failures += 1
+            continue
+        stem = os.path.join(args.output_dir, output_stem(requirements))
+        jobs.append((index, requirements, stem + ".md", stem + ".pdf"))
+
+    pending_pdfs = {}
+    # Workers are spawned rather than forked: LLM threads are already running
+    with ThreadPoolExecutor(max_workers=args.concurrency) as llm_pool, \
+            ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as pdf_pool:
+
+        def queue_pdf(index, requirements, markdown_path, pdf_path, details):
+            if args.no_pdf:
+                record(index, "done", topic=requirements["topic"], markdown=markdown_path, **details)
+                return
+            future = pdf_pool.submit(render_pdf_file, markdown_path, pdf_path)
+            pending_pdfs[future] = (index, requirements, markdown_path, pdf_path, details)
+
+        generating = {}
+        for index, requirements, markdown_path, pdf_path in jobs:
+            if os.path.exists(markdown_path) and (args.no_pdf or os.path.exists(pdf_path)):
+                record(index, "skipped", topic=requirements["topic"])
+            elif os.path.exists(markdown_path):
+                queue_pdf(index, requirements, markdown_path, pdf_path, {})
+            else:
+                future = llm_pool.submit(_generate, index, requirements, markdown_path, args.fresh)
+                generating[future] = (index, requirements, markdown_path, pdf_path)
+
+        for future in as_completed(generating):
+            index, requirements, markdown_path, pdf_path = generating[future]
+            try:
+                _, seconds, failed_sections = future.result()
+            except Exception as e:
+                record(index, "failed", topic=requirements["topic"], stage="generate", error=f"{type(e).__name__}: {e}")
+                failures += 1
+                continue
+            if failed_sections:
+                record(index, "partial", topic=requirements["topic"], markdown=partial_path(markdown_path),
+                       failed_sections=failed_sections, generate_seconds=round(seconds, 3))
+                failures += 1
+                continue
+            queue_pdf(index, requirements, markdown_path, pdf_path, {"generate_seconds": round(seconds, 3)})
+
+        for future in as_completed(pending_pdfs):
+            index, requirements, markdown_path, pdf_path, details = pending_pdfs[future]
+            try:
+                seconds = future.result()
+            except Exception as e:
+                record(index, "failed", topic=requirements["topic"], stage="pdf", error=f"{type(e).__name__}: {e}")
+                failures += 1
+                continue
+            record(index, "done", topic=requirements["topic"], markdown=markdown_path, pdf=pdf_path,
+                   render_seconds=round(seconds, 3), **details)
+
+    manifest.close()
+    print(f"{len(rows)} rows, {failures} failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Review every resume PDF in a directory or zip archive.
+
+Usage:
+    python -m cli.bulk_review resumes.zip --role "Data Scientist" -o report.jsonl
+
+Text is extracted by the same PDF workers and CPU admission gate as the
+upload page and reviewed with the same prompt as the single-resume page,
+with a bounded number of concurrent LLM calls. One
+report record per file is written as soon as it completes (JSONL, or CSV
+when the output ends in .csv), with per-file timings and any error.
+"""
+import argparse
+import sys
+
+from utils import config
+from utils.bulk_review import ReportWriter, bulk_review, iter_pdf_sources
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="directory or .zip of resume PDFs")
+    parser.add_argument("-r", "--role", required=True, help="role the resumes are targeting")
+    parser.add_argument("-o", "--output", default="resume_reviews.jsonl",
+                        help="report file (.jsonl or .csv); '-' writes JSONL to stdout")
+    parser.add_argument("-c", "--concurrency", type=int, default=config.BULK_REVIEW_CONCURRENCY,
+                        help="maximum concurrent LLM calls")
+    parser.add_argument("-w", "--workers", type=int, default=config.BULK_EXTRACT_WORKERS,
+                        help="PDFs extracted at a time (each still waits for a CPU admission slot)")
+    parser.add_argument("--timeout", type=float, default=config.PDF_EXTRACT_TIMEOUT,
+                        help="seconds allowed to extract one PDF")
+    args = parser.parse_args(argv)
+
+    if args.output == "-":
+        output, fmt = sys.stdout, "jsonl"
+    else:
+        output = open(args.output, "w", newline="", encoding="utf-8")
+        fmt = "csv" if args.output.lower().endswith(".csv") else "jsonl"
+    writer = ReportWriter(output, fmt)
+    total = 0
+
+    def on_result(record):
+        nonlocal total
+        total += 1
+        writer.write(record)
+        print(" ".join(str(part) for part in [record["status"], record["file"],
+                                              f"{record['total_seconds']}s", record.get("error")] if part),
+              file=sys.stderr)
+
+    failures = bulk_review(iter_pdf_sources(args.source), args.role, on_result,
+                           workers=args.workers, concurrency=args.concurrency, timeout=args.timeout)
+    if output is not sys.stdout:
+        output.close()
+    print(f"{total} files, {failures} failed", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,10 @@
 # main.py
 import streamlit as st
 
+from utils import warmup
+
+warmup.start()
+
 st.set_page_config(page_title="CareerEcho", layout="centered", initial_sidebar_state="collapsed")
 
 st.title("🔗 CareerEcho")
@@ -26,6 +30,10 @@ with col3:
         st.session_state.page = "cheatsheet"
         st.switch_page("pages/cheatsheet_page.py")
 
+if st.button("🕘 My History: download past cheatsheets, posts and reviews", use_container_width=True):
+    st.session_state.page = "history"
+    st.switch_page("pages/history_page.py")
+
 # Add feature descriptions
 # st.markdown("---")
 # st.markdown("### Features:")
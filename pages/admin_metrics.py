@@ -0,0 +1,112 @@
+import hmac
+import time
+
+import streamlit as st
+
+from utils import admission, config, metrics, session_store, warmup
+from utils.llm import coalescing_stats, connection_stats, tier_stats
+from utils.rate_limit import rate_limit_stats
+
+warmup.start()
+st.set_page_config(page_title="CareerEcho Metrics")
+st.title("📈 Operational Metrics")
+
+if not config.ADMIN_TOKEN:
+    st.info("The metrics page is disabled. Set CAREERECHO_ADMIN_TOKEN to enable it.")
+    st.stop()
+
+if not st.session_state.get("admin_authenticated"):
+    token = st.text_input("Admin token", type="password")
+    if token and hmac.compare_digest(token, config.ADMIN_TOKEN):
+        st.session_state.admin_authenticated = True
+        st.rerun()
+    elif token:
+        st.error("Invalid token.")
+    st.stop()
+
+if st.button("🔄 Refresh"):
+    st.rerun()
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.markdown("**LLM client**")
+    st.json(connection_stats())
+with col2:
+    st.markdown("**Rate limiter**")
+    st.json(rate_limit_stats())
+with col3:
+    st.markdown("**Request coalescing**")
+    st.json(coalescing_stats())
+
+st.subheader("Admission")
+st.caption(f"Requests queue once a gate is full and are shed after {config.ADMISSION_MAX_WAIT:.0f}s of waiting.")
+st.dataframe(
+    [{"gate": name, **stats} for name, stats in admission.stats().items()],
+    width="stretch",
+    hide_index=True,
+)
+
+st.subheader("Model tiers")
+st.caption("Routes are set in model_routing.toml. Fallbacks are calls this tier handed on after a 429 or timeout.")
+st.dataframe(
+    [{"tier": name, **stats} for name, stats in tier_stats().items()],
+    width="stretch",
+    hide_index=True,
+)
+
+st.subheader("Sessions")
+st.markdown("**Session artifact store**")
+st.json(session_store.get_store().stats())
+sessions = session_store.session_report()
+if sessions:
+    st.caption(f"{len(sessions)} recently active sessions in this process, largest first (sizes in KB)")
+    st.dataframe(
+        [
+            {
+                "session": row["session"],
+                "in memory": round(row["memory_bytes"] / 1024, 1),
+                "on disk": round(row["stored_bytes"] / 1024, 1),
+                "artifacts": row["artifacts"],
+                "keys": row["keys"],
+                "idle (s)": round(time.time() - row["last_seen"]),
+            }
+            for row in sessions
+        ],
+        width="stretch",
+        hide_index=True,
+    )
+else:
+    st.caption("No sessions recorded yet.")
+
+st.subheader("Latency")
+timings = metrics.timings()
+if timings:
+    st.dataframe(
+        [
+            {"metric": name, "count": t["count"], "mean (ms)": round(t["mean"] * 1000, 1), "max (ms)": round(t["max"] * 1000, 1)}
+            for name, t in sorted(timings.items())
+        ],
+        width="stretch",
+        hide_index=True,
+    )
+else:
+    st.caption("No timings recorded yet.")
+
+st.subheader("Counters")
+counters = metrics.snapshot()
+if counters:
+    st.dataframe(
+        [{"metric": name, "value": value} for name, value in sorted(counters.items())],
+        width="stretch",
+        hide_index=True,
+    )
+else:
+    st.caption("No counters recorded yet.")
+
+st.subheader("Prometheus export")
+prometheus_text = metrics.render_prometheus()
+if config.METRICS_PORT:
+    st.caption(f"Also served at {config.METRICS_HOST}:{config.METRICS_PORT}/metrics")
+st.download_button("⬇️ Download metrics.txt", prometheus_text, file_name="metrics.txt", mime="text/plain")
+with st.expander("Show raw metrics"):
+    st.code(prometheus_text, language="text")
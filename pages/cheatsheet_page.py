@@ -1,18 +1,14 @@
 # pages/cheatsheet_page.py
 import streamlit as st
-from langchain_google_genai import ChatGoogleGenerativeAI
-from dotenv import load_dotenv
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from io import BytesIO
-import re
+from functools import partial
 
-load_dotenv()
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
+from utils import admission, cheatsheet, history, jobs, session_store, warmup
+from utils.rate_limit import is_rate_limit_error
 
+warmup.start()
+session_store.record_session(st.session_state)
 st.title("📚 Study Cheatsheet Generator")
+history_owner = history.owner_token(st.query_params, st.session_state)
 
 # Initialize session state
 if "generated_cheatsheet" not in st.session_state:
@@ -26,17 +22,17 @@ topic = st.text_input(
 
 difficulty_level = st.selectbox(
     "📊 Difficulty Level",
-    ["Beginner", "Intermediate", "Advanced"]
+    cheatsheet.DIFFICULTY_LEVELS
 )
 
 cheatsheet_type = st.selectbox(
     "📋 Cheatsheet Type",
-    ["Quick Reference", "Formula Sheet", "Concept Overview", "Step-by-Step Guide", "Comprehensive Review"]
+    cheatsheet.CHEATSHEET_TYPES
 )
 
 length = st.selectbox(
     "📏 Content Length",
-    ["Short (1-2 pages)", "Medium (2-4 pages)", "Long (4-6 pages)"]
+    cheatsheet.LENGTHS
 )
 
 # Additional requirements
@@ -46,184 +42,110 @@ custom_requirements = st.text_area(
     height=80
 )
 
-def create_cheatsheet_requirements(inputs):
-    """Structure the cheatsheet requirements"""
-    return {
-        'topic': inputs['topic'].strip(),
-        'difficulty_level': inputs['difficulty_level'],
-        'cheatsheet_type': inputs['cheatsheet_type'],
-        'length': inputs['length'],
-        'custom_requirements': inputs['custom_requirements'].strip() if inputs['custom_requirements'] else ""
-    }
+stream_output = st.toggle("⚡ Show the cheatsheet as it is written", value=True)
 
-def generate_cheatsheet_content(requirements):
-    """Generate the cheatsheet content using AI"""
-    
-    # Create the prompt
-    prompt = f"""You are an expert in creating study cheatsheets.
-    Create a {requirements['difficulty_level'].lower()} level cheatsheet for '{requirements['topic']}'. 
-This should be a {requirements['cheatsheet_type'].lower()} with {requirements['length'].lower()} content.
+force_fresh = st.checkbox(
+    "🔄 Generate a fresh cheatsheet (don't reuse one made earlier for a similar topic)",
+    value=False
+)
 
-Content requirements:
-- Include: core concepts only
-- Well-organized with clear sections and headings
-- Use bullet points and numbered lists for easy scanning
-- Make it comprehensive but concise for quick reference
-- Format using markdown with clear structure"""
+def generate_cheatsheet_content(requirements, stream_to=None):
+    """Generate the cheatsheet content using AI
 
-    if requirements['custom_requirements']:
-        prompt += f"\n- Special focus: {requirements['custom_requirements']}"
-    
-    prompt += "\n\nReturn only the cheatsheet content formatted in clean markdown."
-    
+    If `stream_to` is a Streamlit container, the markdown is rendered into it
+    chunk by chunk while the model is still writing. Stored cheatsheets have
+    already been checked by the caller, so this always calls the model.
+    """
     try:
-        response = llm.invoke(prompt)
-        return response.content.strip()
+        if stream_to is not None:
+            with stream_to.container():
+                content = st.write_stream(cheatsheet.stream_cheatsheet_content(requirements, fresh=True))
+            return content.strip() if isinstance(content, str) else ""
+        return cheatsheet.generate_cheatsheet_content(requirements, fresh=True)
     except Exception as e:
-        if "429" in str(e):
+        if stream_to is not None:
+            stream_to.empty()
+        if is_rate_limit_error(e):
             st.error("Rate limit exceeded. Please try again later.")
+        elif admission.is_overloaded_error(e):
+            st.error(admission.BUSY_MESSAGE)
         else:
             st.error("An error occurred while generating the cheatsheet. Please try again later.")
         return None
 
-def create_pdf(markdown_content, filename="cheatsheet.pdf"):
-    """Convert markdown content to PDF with proper formatting"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, 
-                          rightMargin=72, leftMargin=72,
-                          topMargin=72, bottomMargin=72)
-    
-    styles = getSampleStyleSheet()
-    story = []
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=20,
-        textColor=colors.darkblue,
-        alignment=1
-    )
-    
-    heading_style = ParagraphStyle(
-        'Heading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=12,
-        spaceBefore=12,
-        textColor=colors.darkgreen
-    )
-    
-    subheading_style = ParagraphStyle(
-        'SubHeading',
-        parent=styles['Heading3'],
-        fontSize=12,
-        spaceAfter=8,
-        spaceBefore=8,
-        textColor=colors.darkred
-    )
-    
-    bullet_style = ParagraphStyle(
-        'Bullet',
-        parent=styles['Normal'],
-        leftIndent=20,
-        bulletIndent=10,
-        spaceAfter=6
-    )
-    
-    code_style = ParagraphStyle(
-        'Code',
-        parent=styles['Code'],
-        fontSize=10,
-        leftIndent=20,
-        backgroundColor=colors.lightgrey,
-        spaceAfter=6,
-        spaceBefore=6
-    )
-    
-    def clean_text(text):
-        """Clean and format markdown text for PDF"""
-        # Handle bold text **text** -> <b>text</b>
-        text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
-        
-        # Handle italic text *text* -> <i>text</i>
-        text = re.sub(r'(?<!\*)\*([^*]+)\*(?!\*)', r'<i>\1</i>', text)
-        
-        # Handle inline code `code` -> <font name="Courier">code</font>
-        text = re.sub(r'`([^`]+)`', r'<font name="Courier">\1</font>', text)
-        
-        # Clean up any remaining markdown artifacts
-        text = text.replace('```', '')
-        
-        return text
-    
-    # Parse markdown content
-    lines = markdown_content.split('\n')
-    in_code_block = False
-    
-    for line in lines:
-        original_line = line
-        line = line.strip()
-        
-        # Handle empty lines
-        if not line:
-            story.append(Spacer(1, 6))
-            continue
-        
-        # Handle section dividers
-        if line.startswith('---'):
-            story.append(Spacer(1, 12))
-            continue
-            
-        # Handle code blocks
-        if line.startswith('```'):
-            in_code_block = not in_code_block
-            continue
-            
-        if in_code_block:
-            story.append(Paragraph(clean_text(original_line), code_style))
-            continue
-        
-        # Handle headers
-        if line.startswith('# '):
-            story.append(Paragraph(clean_text(line[2:]), title_style))
-        elif line.startswith('## '):
-            story.append(Paragraph(clean_text(line[3:]), heading_style))
-        elif line.startswith('### '):
-            story.append(Paragraph(clean_text(line[4:]), subheading_style))
-        elif line.startswith('#### '):
-            story.append(Paragraph(clean_text(line[5:]), subheading_style))
-        
-        # Handle bullet points with proper indentation
-        elif line.startswith('• ') or line.startswith('- ') or line.startswith('* '):
-            bullet_text = clean_text(line[2:])
-            story.append(Paragraph(f"• {bullet_text}", bullet_style))
-        
-        # Handle numbered lists
-        elif re.match(r'^\d+\.', line):
-            story.append(Paragraph(clean_text(line), styles['Normal']))
-        
-        # Handle regular text
-        else:
-            cleaned_line = clean_text(line)
-            if cleaned_line:
-                story.append(Paragraph(cleaned_line, styles['Normal']))
-    
+def generate_outlined_cheatsheet(requirements):
+    """Plan the sections first, then write them in parallel, showing each as it lands
+
+    Each finished section is also compiled for the PDF straight away, and
+    the PDF is laid out in the background once the last one arrives, so the
+    download button rarely has to wait.
+    """
+    from utils.pdf import PdfSections
+
+    live_output = st.empty()
+    pdf_sections = PdfSections()
+    content, complete = None, False
     try:
-        doc.build(story)
-        buffer.seek(0)
-        return buffer
+        with live_output.container():
+            progress = st.progress(0.0, text="Planning the sections...")
+            for event in cheatsheet.iter_outlined_cheatsheet(requirements):
+                kind = event[0]
+                if kind == "outline":
+                    titles = event[1]
+                    st.markdown(cheatsheet.cheatsheet_heading(requirements))
+                    pdf_sections.add(0, cheatsheet.cheatsheet_heading(requirements))
+                    slots = [st.empty() for _ in titles]
+                    for slot, title in zip(slots, titles):
+                        slot.info(f"Writing {title}...")
+                    done = 0
+                    progress.progress(0.0, text=f"Writing {len(titles)} sections...")
+                elif kind == "section":
+                    index, section = event[1], event[2]
+                    slots[index].markdown(section)
+                    pdf_sections.add(index + 1, section)
+                    done += 1
+                    progress.progress(done / len(titles), text=f"Written {done} of {len(titles)} sections")
+                elif kind == "failed":
+                    slots[event[1]].warning(f"{titles[event[1]]} could not be generated.")
+                else:
+                    content, complete = event[1], event[2]
     except Exception as e:
-        st.error(f"Error creating PDF: {e}")
+        live_output.empty()
+        if is_rate_limit_error(e):
+            st.error("Rate limit exceeded. Please try again later.")
+        elif admission.is_overloaded_error(e):
+            st.error(admission.BUSY_MESSAGE)
+        else:
+            st.error("An error occurred while generating the cheatsheet. Please try again later.")
         return None
+    # The finished cheatsheet is rendered below with the download button
+    live_output.empty()
+    if not complete:
+        st.warning("Some sections could not be generated, even after retrying. "
+                   "Generate the cheatsheet again to fill them in.")
+    else:
+        jobs.submit("cheatsheet_pdf", lambda job: pdf_sections.finish(content))
+    return content
+
+def cheatsheet_pdf_bytes(markdown_content, history_id=None):
+    """Render the PDF for the download button (runs when it is clicked)
+
+    The bytes are kept with the history entry, so downloading it again from
+    the history page doesn't render it a second time.
+    """
+    try:
+        return history.cheatsheet_pdf(history_owner, history_id, markdown_content)
+    except Exception as e:
+        # Streamlit commands are ignored inside deferred downloads, so log it
+        print(f"Error creating PDF: {e}")
+        raise
 
 # Generate button
 if st.button("📝 Generate Cheatsheet", type="primary"):
     if not topic.strip():
         st.warning("Please enter a topic for your cheatsheet.")
     else:
-        requirements = create_cheatsheet_requirements({
+        requirements = cheatsheet.create_cheatsheet_requirements({
             'topic': topic,
             'difficulty_level': difficulty_level,
             'cheatsheet_type': cheatsheet_type,
@@ -231,34 +153,58 @@ if st.button("📝 Generate Cheatsheet", type="primary"):
             'custom_requirements': custom_requirements
         })
         
-        with st.spinner("Generating your cheatsheet..."):
-            cheatsheet_content = generate_cheatsheet_content(requirements)
+        # Shows the queue position if the server is too busy to start right away
+        queue_notice = st.empty()
+        with admission.streamlit_notice(queue_notice):
+            reused = None if force_fresh else cheatsheet.find_cheatsheet(requirements)
+            if reused is not None:
+                cheatsheet_content, reused_topic = reused
+                if reused_topic.lower() != requirements['topic'].lower():
+                    st.info(f"Reusing the cheatsheet made earlier for \"{reused_topic}\". "
+                            "Tick \"Generate a fresh cheatsheet\" to create a new one.")
+            elif cheatsheet.uses_outline(requirements):
+                cheatsheet_content = generate_outlined_cheatsheet(requirements)
+            elif stream_output:
+                live_output = st.empty()
+                cheatsheet_content = generate_cheatsheet_content(requirements, stream_to=live_output)
+                # The finished cheatsheet is rendered below with the download button
+                live_output.empty()
+            else:
+                with st.spinner("Generating your cheatsheet..."):
+                    cheatsheet_content = generate_cheatsheet_content(requirements)
             
-            if cheatsheet_content:
-                st.session_state.generated_cheatsheet = cheatsheet_content
-                st.session_state.cheatsheet_topic = topic
+        if cheatsheet_content:
+            session_store.put(st.session_state, "generated_cheatsheet", cheatsheet_content)
+            st.session_state.cheatsheet_topic = topic
+            # Reused cheatsheets are saved too; the same content is never stored twice per visitor
+            st.session_state.cheatsheet_history_id = history.get_history().save(
+                history_owner, history.CHEATSHEET, topic.strip(), cheatsheet_content
+            )
 
 # Display generated cheatsheet
-if st.session_state.generated_cheatsheet:
+generated_cheatsheet = session_store.get(st.session_state, "generated_cheatsheet")
+if generated_cheatsheet:
     st.success("✅ Cheatsheet generated successfully!")
     
-    st.markdown(st.session_state.generated_cheatsheet)
+    st.markdown(generated_cheatsheet)
     
     # Action buttons section
     st.markdown("---")
-    pdf_buffer = create_pdf(
-        st.session_state.generated_cheatsheet,
-        f"{st.session_state.get('cheatsheet_topic', 'cheatsheet').replace(' ', '_')}.pdf"
+    # The PDF is only rendered when the download is clicked, and then
+    # memoised by content hash so later reruns don't rebuild it.
+    st.download_button(
+        label="📄 Download PDF",
+        data=partial(cheatsheet_pdf_bytes, generated_cheatsheet, st.session_state.get("cheatsheet_history_id")),
+        file_name=f"{st.session_state.get('cheatsheet_topic', 'cheatsheet').replace(' ', '_')}.pdf",
+        mime="application/pdf",
+        type="primary"
     )
-    
-    if pdf_buffer:
-        st.download_button(
-            label="📄 Download PDF",
-            data=pdf_buffer.getvalue(),
-            file_name=f"{st.session_state.get('cheatsheet_topic', 'cheatsheet').replace(' ', '_')}.pdf",
-            mime="application/pdf",
-            type="primary"
-        )
+
+cache_stats = cheatsheet.get_cheatsheet_cache().stats()
+st.sidebar.caption(
+    f"Cheatsheet cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+    f"{cache_stats['entries']} stored"
+)
 
 # Back button
 st.markdown("---")
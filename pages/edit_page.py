@@ -1,59 +1,91 @@
 import streamlit as st
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, SystemMessage
-from dotenv import load_dotenv
+from functools import partial
 
-load_dotenv()
+from utils import admission, history, jobs, session_store, warmup
+from utils.llm import stream
+from utils.posts import build_refine_messages
+from utils.rate_limit import is_rate_limit_error
 
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
+warmup.start()
+session_store.record_session(st.session_state)
 st.set_page_config(page_title="Edit Selected Post")
 st.title("📝 Edit Your Selected Post")
 
-if "selected_post" not in st.session_state:
+selected_post = session_store.get(st.session_state, "selected_post")
+if not selected_post:
     st.warning("No post selected. Please go back to the input page and choose one.")
     st.stop()
 
-if "edited_text" not in st.session_state:
-    st.session_state.edited_text = st.session_state["selected_post"]
+if session_store.get(st.session_state, "edited_text") is None:
+    session_store.put(st.session_state, "edited_text", selected_post)
+    # Every version of the post, so the user can step back without calling the model
+    session_store.put(st.session_state, "refine_history", [selected_post])
+    st.session_state.refine_version = 0
+
+def get_versions():
+    return session_store.get(st.session_state, "refine_history") or [session_store.get(st.session_state, "edited_text")]
+
+def show_version(index, versions=None):
+    versions = versions or get_versions()
+    st.session_state.refine_version = index
+    session_store.put(st.session_state, "edited_text", versions[index])
+
+def add_version(text):
+    versions = get_versions()
+    versions.append(text)
+    session_store.put(st.session_state, "refine_history", versions)
+    show_version(len(versions) - 1, versions)
 
 def refine_post_on_click():
-    with st.spinner("Refining your post with AI..."):
-
-        system_prompt = f"""
-        You are a helpful assistant that helps refines LinkedIn posts created by AI.
-        This was the prompt used to generate the post:
-        Topic: {st.session_state.get("prompt", "")}
-        Use this prompt to refine the post.
-        Your task is to improve the post while keeping the original intent and content.
-        If the user has provided any [PERSON] names, keep them as is.
-        Return only the posts using \\n for new lines. Do not include any text other than the actual post and it should be clearly formatted for LinkedIn."
-        """
-        if user_prompt:
-            system_prompt += f"\nUser wants to refine the post with the following instruction: {user_prompt}\n"
-
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=f"Here's the post to refine:\n{edited_text}")
-        ]
-
-        try:
-            response = llm.invoke(messages)
-            refined_post = response.content.strip()
-            st.session_state.edited_text = refined_post
-        except Exception as e:
-            print(f"Error invoking refining linkedin post LLM: {e}")
-            if "429" in str(e): 
-                st.error("Rate limit exceeded. Please try again later.")
-            else:
-                st.error("An error occurred while generating feedback. Please try again later.")
+    versions = get_versions()
+    if edited_text != versions[min(st.session_state.get("refine_version", 0), len(versions) - 1)]:
+        # Keep the user's own edits as a version too
+        add_version(edited_text)
+
+    # A new refinement supersedes the one still running for this session
+    previous = st.session_state.get("refine_job")
+    if previous is not None:
+        previous.cancel()
+
+    messages = build_refine_messages(session_store.get(st.session_state, "prompt", ""), edited_text, user_prompt)
+    st.session_state.refine_job = jobs.submit_stream("post_refine", partial(stream, messages, feature="post_refine"))
+
+def cancel_refinement():
+    st.session_state.refine_job.cancel()
+
+def collect_refinement():
+    """Apply the session's refinement job once it has finished."""
+    job = st.session_state.get("refine_job")
+    if job is None or not job.finished:
+        return
+    st.session_state.refine_job = None
+    if job.status == jobs.DONE:
+        add_version(job.result.strip())
+    elif job.status == jobs.FAILED:
+        if is_rate_limit_error(job.error):
+            st.error("Rate limit exceeded. Please try again later.")
+        elif admission.is_overloaded_error(job.error):
+            st.error(admission.BUSY_MESSAGE)
+        else:
+            st.error("An error occurred while generating feedback. Please try again later.")
+
+collect_refinement()
 
 # Editable text area with pre-filled selected post
 edited_text = st.text_area(
     "✍️ You can edit your post below:",
-    value=st.session_state.edited_text,
+    value=session_store.get(st.session_state, "edited_text", selected_post),
     height=300
 )
 
+versions = get_versions()
+if len(versions) > 1:
+    version = min(st.session_state.get("refine_version", 0), len(versions) - 1)
+    previous_col, caption_col, next_col = st.columns([1, 2, 1])
+    previous_col.button("◀ Previous", disabled=version == 0, on_click=show_version, args=(version - 1,))
+    caption_col.caption(f"Version {version + 1} of {len(versions)}")
+    next_col.button("Next ▶", disabled=version == len(versions) - 1, on_click=show_version, args=(version + 1,))
+
 # Optional refinement prompt
 user_prompt = st.text_input(
     "💬 Optional instruction to refine the post (e.g. 'make it shorter', 'add excitement')",
@@ -62,14 +94,42 @@ user_prompt = st.text_input(
 
 # Refine with AI button
 st.button("🤖 Refine with AI", on_click=refine_post_on_click)
+
+refining = st.session_state.get("refine_job") is not None
+
+@st.fragment(run_every=0.5 if refining else None)
+def refinement_progress():
+    """Poll the running refinement without rerunning the whole page"""
+    job = st.session_state.get("refine_job")
+    if job is None:
+        return
+    if job.finished:
+        st.rerun()
+    waiting = job.waiting
+    if waiting is not None:
+        st.info(admission.describe_wait(waiting.position, waiting.eta))
+    else:
+        st.info("Refining your post with AI...")
+    if job.partial:
+        st.text(job.partial)
+    st.button("✖ Cancel refinement", on_click=cancel_refinement)
+
+refinement_progress()
+
 # Save button
 if st.button("✅ Save Final Version"):
-    st.session_state["final_post"] = edited_text
-    st.success("Your final post has been saved!")
+    session_store.put(st.session_state, "final_post", edited_text)
+    owner = history.owner_token(st.query_params, st.session_state)
+    title = edited_text.strip().splitlines()[0][:80] if edited_text.strip() else "Untitled post"
+    history.get_history().save(owner, history.POST, title, edited_text)
+    st.success("Your final post has been saved! You can find it again under My History.")
 
 # Navigation button to go back to input page
 if st.button("🔙 Back to Input Page"):
     st.session_state.page = "input"
-    if "edited_text" in st.session_state:
-        del st.session_state["edited_text"]
+    if st.session_state.get("refine_job") is not None:
+        st.session_state.refine_job.cancel()
+        st.session_state.refine_job = None
+    session_store.delete(st.session_state, "edited_text")
+    session_store.delete(st.session_state, "refine_history")
     st.switch_page("pages/input_page.py")
@@ -0,0 +1,82 @@
+import streamlit as st
+from datetime import datetime
+from functools import partial
+
+from utils import history, warmup
+
+warmup.start()
+st.set_page_config(page_title="My History")
+st.title("🕘 My History")
+
+owner = history.owner_token(st.query_params, st.session_state)
+store = history.get_history()
+
+st.caption(
+    "Your history is tied to this page's link. Bookmark it to get back to your "
+    "cheatsheets, saved posts and resume reviews on a later visit, and don't "
+    "share it: anyone with the link can see everything listed here."
+)
+
+feature_options = {"Everything": None}
+feature_options.update({label: feature for feature, label in history.FEATURE_LABELS.items()})
+
+col1, col2 = st.columns([1, 2])
+with col1:
+    feature_label = st.selectbox("Show", list(feature_options))
+with col2:
+    search = st.text_input("🔎 Search by topic, role or post", placeholder="e.g. Python, Data Scientist")
+
+def history_pdf_bytes(entry_id, markdown_content):
+    """Stored PDF bytes, or render them once if the PDF was never downloaded"""
+    try:
+        return history.cheatsheet_pdf(owner, entry_id, markdown_content)
+    except Exception as e:
+        # Streamlit commands are ignored inside deferred downloads, so log it
+        print(f"Error creating PDF: {e}")
+        raise
+
+def delete_entry(entry_id):
+    store.delete(owner, entry_id)
+
+entries = store.list(owner, feature_options[feature_label], search)
+if not entries:
+    st.info("Nothing here yet. Cheatsheets you generate, and posts and resume reviews you save, will show up here.")
+
+for entry in entries:
+    created = datetime.fromtimestamp(entry["created_at"]).strftime("%Y-%m-%d %H:%M")
+    label = history.FEATURE_LABELS.get(entry["feature"], entry["feature"])
+    # Only the entries the user opens load their text and PDF
+    expander = st.expander(f"{label} · {entry['title']} · {created}", key=f"history_entry_{entry['id']}", on_change="rerun")
+    if not expander.open:
+        continue
+    item = store.get(owner, entry["id"])
+    if item is None:
+        continue
+    with expander:
+        st.markdown(item["text"])
+        file_stem = entry["title"].replace(" ", "_")[:60] or entry["feature"]
+        col1, col2, col3 = st.columns(3)
+        if entry["feature"] == history.CHEATSHEET:
+            col1.download_button(
+                label="📄 Download PDF",
+                # Served straight from the stored bytes once the PDF exists
+                data=item["pdf"] if item["pdf"] is not None else partial(history_pdf_bytes, entry["id"], item["text"]),
+                file_name=f"{file_stem}.pdf",
+                mime="application/pdf",
+                key=f"history_pdf_{entry['id']}",
+                type="primary"
+            )
+        extension = "txt" if entry["feature"] == history.POST else "md"
+        col2.download_button(
+            label=f"⬇️ Download .{extension}",
+            data=item["text"],
+            file_name=f"{file_stem}.{extension}",
+            mime="text/plain" if extension == "txt" else "text/markdown",
+            key=f"history_text_{entry['id']}"
+        )
+        col3.button("🗑️ Delete", key=f"history_delete_{entry['id']}", on_click=delete_entry, args=(entry["id"],))
+
+# Back button
+st.markdown("---")
+if st.button("🔙 Back to Home"):
+    st.switch_page("main.py")
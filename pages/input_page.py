@@ -1,11 +1,19 @@
 import streamlit as st
-from langchain_google_genai import ChatGoogleGenerativeAI
-from dotenv import load_dotenv
-import json
-import re
 
-load_dotenv()
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
+from utils import admission, config, metrics, session_store, warmup
+from utils.llm import invoke, invoke_as_completed
+from utils.posts import (
+    build_extraction_prompt,
+    clean_single_post,
+    normalize_post_fields,
+    parse_multiple_posts,
+    parse_structured_fields,
+)
+from utils.rate_limit import is_rate_limit_error
+
+warmup.start()
+session_store.record_session(st.session_state)
+
 if "selected_post" not in st.session_state:
     st.session_state.selected_post = None
 
@@ -83,73 +91,89 @@ include_emojis = st.checkbox(
     on_change=lambda: store_value("include_emojis")
 )
 
+interpret_with_ai = st.checkbox(
+    "Let AI interpret free-form answers (slower: adds an extra request)",
+    value=False
+)
+
+parallel_variations = st.checkbox(
+    "Generate variations in parallel (each post appears as soon as it's ready)",
+    value=True
+)
+
 
 def extract_structured(fields_dict):
-    user_combined = (
-        f"Topic: {fields_dict['topic']}. "
-        f"Post type: {fields_dict['post_type']}. "
-        f"Tone: {fields_dict['tone']}. "
-        f"Audience: {fields_dict['audience']}."
-    )
-    prompt = (
-        f"You are an expert in extracting all relevant information from any text, if the user has provided any"
-        "[PERSON] names, that is the masked name, keep it as is. " 
-        f"Extract structured information from the following user input:\n"
-        f"{user_combined}\n\n"
-        f"Return a JSON object with the following keys:\n"
-        f"- topic: The main topic of the post, include all the details the user wants in the post\n"
-        f"- post_type: The type of post (e.g. announcement, story, tip)\n"
-        f"- tone: The desired tone of the post (e.g. excited, humble)\n"
-        f"- audience: The target audience for the post (e.g. recruiters, students)\n"
-        f"Ensure the output is a valid JSON object with no additional text."
-    )
+    prompt = build_extraction_prompt(fields_dict)
     try:
-        response = llm.invoke(prompt)
+        with admission.streamlit_notice(st.empty()):
+            response = invoke(prompt, feature="post_fields")
     except Exception as e:
         print(f"Error invoking LLM: {e}")
-        if "429" in str(e):
+        if is_rate_limit_error(e):
             st.error("Rate limit exceeded. Please try again later.")
+        elif admission.is_overloaded_error(e):
+            st.error(admission.BUSY_MESSAGE)
         else:
             st.error("An unexpected error occurred while processing your request. Please try again later.")
         return None
             
-    extracted_response = re.sub(r"```(?:json)?\s*([\s\S]*?)\s*```", r"\1", response.content).strip()
-    try:
-        structured = json.loads(extracted_response)
-        if isinstance(structured, dict) and all(key in structured for key in ["topic", "post_type", "tone", "audience"]):
-            return structured
+    return parse_structured_fields(response.content)
+
+def generate_variations_in_parallel(post_prompt, num_variations):
+    """Request each variation separately and render it as soon as it completes"""
+    num_variations = int(num_variations)
+    prompts = [
+        f"{post_prompt} This is version {i + 1} of {num_variations}: give it its own hook, structure and angle. "
+        "Return only the post text. Do not include any text other than the post."
+        for i in range(num_variations)
+    ]
+    queue_notice = st.empty()
+    slots = [st.empty() for _ in prompts]
+    for slot in slots:
+        slot.info("Writing...")
+    posts = [None] * num_variations
+    errors = []
+    with admission.streamlit_notice(queue_notice):
+        for index, result in invoke_as_completed(prompts, max_concurrency=config.POST_CONCURRENCY, feature="post_variation"):
+            if isinstance(result, Exception):
+                print(f"Error invoking post variation LLM: {result}")
+                errors.append(result)
+                slots[index].warning(f"Post {index + 1} could not be generated.")
+                continue
+            posts[index] = clean_single_post(result.content)
+            slots[index].text_area(f"Post {index + 1}", posts[index], height=200, key=f"streamed_post_{index}")
+    # The finished posts are rendered below with their select buttons
+    for slot in slots:
+        slot.empty()
+    if errors:
+        if any(is_rate_limit_error(e) for e in errors):
+            st.error(f"Rate limit exceeded for {len(errors)} of {num_variations} posts. Please try again later.")
+        elif any(admission.is_overloaded_error(e) for e in errors):
+            st.error(f"The service is very busy right now: {len(errors)} of {num_variations} posts could not be started. "
+                     "Please try again in a minute.")
         else:
-            print("Invalid structured output:", structured)
-            return None
-    except json.JSONDecodeError:
-        print("JSON decoding error:", extracted_response)
-        return None
-
-def parse_multiple_posts(response_text):
-    response_text = re.sub(r"```(?:json)?\s*([\s\S]*?)\s*```", r"\1", response_text).strip()
-    if not response_text:
-        return []
-    try:
-        # Expecting JSON array: ["post 1 text", "post 2 text", "post 3 text"]
-        posts = json.loads(response_text)
-        if isinstance(posts, list):
-            return posts
-        return [response_text]
-    except json.JSONDecodeError:
-        # If not JSON, fallback to single post
-        return [response_text]
+            st.error(f"{len(errors)} of {num_variations} posts could not be generated. Please try again later.")
+    return [post for post in posts if post]
 
 if st.button("Generate Post"):
     if not topic_input.strip():
         st.warning("Topic is required.")
     else:
-        with st.spinner("Extracting inputs..."):
-            structured = extract_structured({
-                "topic": topic_input,
-                "post_type": type_input,
-                "tone": tone_input,
-                "audience": audience_input
-            })
+        fields = {
+            "topic": topic_input,
+            "post_type": type_input,
+            "tone": tone_input,
+            "audience": audience_input
+        }
+        structured = None
+        if interpret_with_ai:
+            with st.spinner("Extracting inputs..."), metrics.timed("post_fields_llm"):
+                structured = extract_structured(fields)
+            if not structured:
+                print("LLM extraction failed, falling back to local normalization")
+        if not structured:
+            with metrics.timed("post_fields_local"):
+                structured = normalize_post_fields(fields)
         if not structured:
             st.error("Couldn't parse inputs—please simplify and try again.")
         else:
@@ -169,27 +193,63 @@ if st.button("Generate Post"):
             if not num_variations.isdigit() or not (1 <= int(num_variations) <= 10):
                 st.warning("Please enter a valid number of variations (1-10). Defaulting to 3.")
                 num_variations = "3"
-            # Clean prompt for generating the post
-            clean_prompt = (
-                f"Write {num_variations} different versions of a {structured['tone']} LinkedIn {structured['post_type']} "
-                f"targeted at {structured['audience']} about: {structured['topic']}. "
-                f"{hashtag_text} "
-                f"{'Include' if include_emojis else 'Do not include'} emojis. "
-                f"Return only the posts as a JSON array of strings, with each post using \\n for new lines. Do not include any text outside the JSON block. Each post should be clearly formatted for LinkedIn."
-            )
-            st.session_state.prompt = clean_prompt
-            with st.spinner("Generating post..."):
-                result = llm.invoke(clean_prompt)
-            posts = parse_multiple_posts(result.content)
-            st.session_state.generated_posts = posts
-
-if "generated_posts" in st.session_state and st.session_state.generated_posts:
+            if parallel_variations:
+                post_prompt = (
+                    f"Write a {structured['tone']} LinkedIn {structured['post_type']} "
+                    f"targeted at {structured['audience']} about: {structured['topic']}. "
+                    f"{hashtag_text} "
+                    f"{'Include' if include_emojis else 'Do not include'} emojis. "
+                    f"The post should be clearly formatted for LinkedIn."
+                )
+                session_store.put(st.session_state, "prompt", post_prompt)
+                with metrics.timed("post_generation_parallel"):
+                    posts = generate_variations_in_parallel(post_prompt, num_variations)
+                session_store.put(st.session_state, "generated_posts", posts)
+            else:
+                # Clean prompt for generating the post
+                clean_prompt = (
+                    f"Write {num_variations} different versions of a {structured['tone']} LinkedIn {structured['post_type']} "
+                    f"targeted at {structured['audience']} about: {structured['topic']}. "
+                    f"{hashtag_text} "
+                    f"{'Include' if include_emojis else 'Do not include'} emojis. "
+                    f"Return only the posts as a JSON array of strings, with each post using \\n for new lines. Do not include any text outside the JSON block. Each post should be clearly formatted for LinkedIn."
+                )
+                session_store.put(st.session_state, "prompt", clean_prompt)
+                try:
+                    with st.spinner("Generating post..."), metrics.timed("post_generation_single"), admission.streamlit_notice(st.empty()):
+                        result = invoke(clean_prompt, feature="post_generate")
+                    posts = parse_multiple_posts(result.content)
+                    session_store.put(st.session_state, "generated_posts", posts)
+                except Exception as e:
+                    print(f"Error invoking post generation LLM: {e}")
+                    if is_rate_limit_error(e):
+                        st.error("Rate limit exceeded. Please try again later.")
+                    elif admission.is_overloaded_error(e):
+                        st.error(admission.BUSY_MESSAGE)
+                    else:
+                        st.error("An error occurred while generating your posts. Please try again later.")
+
+generated_posts = session_store.get(st.session_state, "generated_posts")
+if generated_posts:
     st.subheader("✍️ Choose a Version to Edit")
-    posts = st.session_state.generated_posts
-    for i, post in enumerate(posts):
+    for i, post in enumerate(generated_posts):
         if st.button(f"Select Post {i+1}", key=f"select_post_{i}"):
-            st.session_state.selected_post = post
+            session_store.put(st.session_state, "selected_post", post)
             st.session_state.page = "edit"
             st.switch_page("pages/edit_page.py")
         st.text_area(f"Post {i+1}", post, height=200)
         st.markdown("---")
+
+timings = metrics.timings()
+latency_lines = [
+    f"{label}: {timings[name]['count']} calls, {timings[name]['mean'] * 1000:.0f} ms avg"
+    for name, label in [
+        ("post_fields_local", "Input parsing (local)"),
+        ("post_fields_llm", "Input parsing (AI)"),
+        ("post_generation_parallel", "Generation (parallel)"),
+        ("post_generation_single", "Generation (single request)"),
+    ]
+    if name in timings
+]
+if latency_lines:
+    st.sidebar.caption("  \n".join(latency_lines))
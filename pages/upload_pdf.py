@@ -1,19 +1,98 @@
+import io
+
 import streamlit as st
-from PyPDF2 import PdfReader
-from langchain_google_genai import ChatGoogleGenerativeAI
-from dotenv import load_dotenv
 
+from utils import admission, config, history, session_store, warmup
+from utils.bulk_review import ReportWriter, bulk_review, iter_pdf_sources
+from utils.llm import invoke, invoke_as_completed
+from utils.pdf_text import ExtractionTimeout, extract_pdf_text
+from utils.rate_limit import is_rate_limit_error
+from utils.resume import (
+    build_gate_prompt,
+    build_review_prompt,
+    build_section_prompt,
+    compact_resume,
+    gate_passed,
+    merge_section_feedback,
+    split_sections,
+)
+
+warmup.start()
+session_store.record_session(st.session_state)
 st.set_page_config(page_title="Resume PDF Upload", layout="centered")
 
 st.title("Review your Resume")
 
-load_dotenv()
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
-uploaded_file = st.file_uploader("Upload your Resume in PDF format (we promise not to store it anywhere!)", type=["pdf"])
+bulk_mode = st.toggle("Bulk review (upload a zip of resume PDFs)")
+
+if bulk_mode:
+    uploaded_zip = st.file_uploader("Upload a zip of resume PDFs (nothing is stored; files are read in memory)", type=["zip"])
+    role = st.text_input("Enter the role these resumes are targeting (e.g., Data Scientist, Software Engineer)")
+    report_format = st.radio("Report format", ["JSONL", "CSV"], horizontal=True)
+    if st.button("Review All Resumes", disabled=not uploaded_zip):
+        if not role:
+            st.error("Please enter a role to review the resumes.")
+            st.stop()
+        report = io.StringIO()
+        writer = ReportWriter(report, report_format.lower())
+        progress = st.progress(0.0, text="Reading resumes...")
+        rows = []
+        results = st.empty()
+
+        def show_result(record):
+            writer.write(record)
+            rows.append({"File": record["file"], "Status": record["status"],
+                         "Seconds": record["total_seconds"], "Error": record.get("error", "")})
+            progress.progress(len(rows) / total, text=f"Reviewed {len(rows)} of {total} resumes")
+            results.dataframe(rows, width="stretch")
+
+        try:
+            sources = list(iter_pdf_sources(io.BytesIO(uploaded_zip.getvalue())))
+        except Exception as e:
+            print(f"Error opening resume zip: {e}")
+            st.error("We couldn't open this zip file. Please check it and try again.")
+            st.stop()
+        total = len(sources)
+        if not total:
+            st.warning("The zip file doesn't contain any PDFs.")
+            st.stop()
+        failures = bulk_review(sources, role, show_result)
+        progress.empty()
+        if failures:
+            st.warning(f"{failures} of {total} resumes could not be reviewed. See the report for details.")
+        else:
+            st.success(f"Reviewed all {total} resumes.")
+        session_store.put(st.session_state, "bulk_review_report", [report.getvalue(), report_format.lower()])
+    bulk_review_report = session_store.get(st.session_state, "bulk_review_report")
+    if bulk_review_report:
+        report_text, fmt = bulk_review_report
+        st.download_button(
+            label="📄 Download Report",
+            data=report_text,
+            file_name=f"resume_reviews.{fmt}",
+            mime="text/csv" if fmt == "csv" else "application/x-ndjson",
+            type="primary"
+        )
+    st.stop()
+
+uploaded_file = st.file_uploader("Upload your Resume in PDF format (the file itself is never stored)", type=["pdf"])
 
 # Add input field for role
 role = st.text_input("Enter the role you are targeting for (e.g., Data Scientist, Software Engineer)")
 
+save_to_history = st.checkbox(
+    "Save the review to My History (anyone with this page's link can open it there)",
+    value=False
+)
+
+def save_review(feedback):
+    """Keep the review in the user's history if they asked for it (the resume itself is never stored)"""
+    if not save_to_history:
+        return
+    owner = history.owner_token(st.query_params, st.session_state)
+    history.get_history().save(owner, history.RESUME_REVIEW, role.strip(), feedback)
+    st.caption("Saved to My History.")
+
 review_button = st.button(
     "Review Resume",
     disabled=not (uploaded_file)
@@ -23,38 +102,74 @@ if review_button:
     if not role:
         st.error("Please enter a role to review your resume.")
         st.stop()
-    pdf_reader = PdfReader(uploaded_file)
-    text = ""
-    for page in pdf_reader.pages:
-        text += page.extract_text()
-    prompt = (
-        f"You are an expert resume reviewer and interviewer for the position of '{role}'.\n"
-        "First, determine if the provided content is a resume. If not, reply: \"This PDF does not appear to be a resume.\" and briefly explain why.\n"
-        f"Next, check if the role '{role}' matches the resume content. If not, reply: \"The role '{role}' does not seem to match the content of the resume. Please check the role and try again.\"\n"
-        "If it is a resume and the role matches, provide concise, actionable suggestions to improve the resume for the '{role}' role. Only use information from the resume; do not fabricate details.\n"
-        "Add suggestions to include important keywords relevant to the role.\n"
-        "Add suggestions to remove buzzwords and make it more impactful.\n"
-        "Focus your feedback on:\n"
-        "- Education\n"
-        "- Experience\n"
-        "- Skills\n"
-        "- Projects\n"
-        "Here is the resume content:\n"
-        "<resume>\n"
-        f"{text}\n"
-        "</resume>\n"
-        "Return only the suggestions, using \\n for new lines. Do not include any text other than the suggestions or the message about the PDF not being a resume."
-    )
-    with st.spinner("Generating feedback..."):
+    # Shows the queue position if the server is too busy to start right away
+    queue_notice = st.empty()
+    try:
+        with admission.streamlit_notice(queue_notice), st.spinner("Reading your resume..."):
+            extracted = extract_pdf_text(uploaded_file.getvalue())
+    except ExtractionTimeout:
+        st.error("Reading this PDF took too long. Please upload a shorter or simpler file.")
+        st.stop()
+    except admission.Overloaded:
+        st.error(admission.BUSY_MESSAGE)
+        st.stop()
+    except Exception as e:
+        print(f"Error extracting resume PDF text: {e}")
+        st.error("We couldn't read this PDF. Please check the file and try again.")
+        st.stop()
+    if extracted.truncated:
+        st.info(f"Only the first {len(extracted.pages)} page(s) of your PDF were reviewed.")
+    # Cleaned up and cut to the token budget before anything is sent
+    compacted = compact_resume(extracted.pages)
+    text = compacted.text
+    if compacted.trimmed:
+        st.info(f"Your resume is long, so some of it was left out of the review: {', '.join(compacted.trimmed)}.")
+    saved = compacted.tokens_before - compacted.tokens_after
+    if saved > 0:
+        st.caption(f"Resume sent as about {compacted.tokens_after:,} tokens ({saved:,} saved by removing "
+                   f"repeated headers, page numbers and extra whitespace{' and trimming' if compacted.trimmed else ''}).")
+    sections = split_sections(text)
+    with admission.streamlit_notice(queue_notice):
         try:
-            result = llm.invoke(prompt)
-            st.write(f"Suggestions for improving your resume for the '{role}' role:")
-            st.write(result.content.strip())
+            if len(sections) < 2:
+                # No usable section headers: review the whole document in one call
+                with st.spinner("Generating feedback..."):
+                    result = invoke(build_review_prompt(role, text), feature="resume_review")
+                st.write(f"Suggestions for improving your resume for the '{role}' role:")
+                st.write(result.content.strip())
+                save_review(result.content.strip())
+            else:
+                with st.spinner("Checking your resume..."):
+                    gate_reply = invoke(build_gate_prompt(role, text), feature="resume_gate").content.strip()
+                if not gate_passed(gate_reply):
+                    st.write(gate_reply)
+                else:
+                    st.write(f"Suggestions for improving your resume for the '{role}' role:")
+                    review = st.empty()
+                    with review.container():
+                        slots = {name: st.empty() for name in sections}
+                    for name, slot in slots.items():
+                        slot.info(f"Reviewing {name}...")
+                    names = list(sections)
+                    prompts = [build_section_prompt(role, name, sections[name]) for name in names]
+                    feedback = {}
+                    for index, result in invoke_as_completed(prompts, max_concurrency=config.RESUME_REVIEW_CONCURRENCY, feature="resume_section"):
+                        name = names[index]
+                        if isinstance(result, Exception):
+                            print(f"Error invoking resume section LLM ({name}): {result}")
+                            feedback[name] = "_Feedback for this section could not be generated. Please try again later._"
+                            slots[name].warning(f"Feedback for {name} could not be generated.")
+                            continue
+                        feedback[name] = result.content.strip()
+                        slots[name].markdown(f"**{name}**\n\n{feedback[name]}")
+                    merged = merge_section_feedback(feedback, compacted.trimmed)
+                    review.markdown(merged)
+                    save_review(merged)
         except Exception as e:
             print(f"Error invoking upload pdf LLM: {e}")
-            if "429" in str(e): 
+            if is_rate_limit_error(e):
                 st.error("Rate limit exceeded. Please try again later.")
+            elif admission.is_overloaded_error(e):
+                st.error(admission.BUSY_MESSAGE)
             else:
                 st.error("An error occurred while generating feedback. Please try again later.")
-
-    
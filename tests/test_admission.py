@@ -0,0 +1,123 @@
+import threading
+
+import pytest
+
+from utils import admission
+from utils.admission import Gate, Overloaded
+
+
+class Interrupted(BaseException):
+    """Stands in for Streamlit's StopException raised while drawing a notice."""
+
+
+def wait_for_queue(gate, length):
+    while gate.stats()["queued"] < length:
+        pass
+
+
+def test_waiters_are_admitted_in_arrival_order():
+    gate = Gate("test", 1, 5)
+    order = []
+
+    def waiter(index):
+        with gate.admit():
+            order.append(index)
+
+    threads = []
+    with gate.admit():
+        for index in range(5):
+            thread = threading.Thread(target=waiter, args=(index,))
+            thread.start()
+            threads.append(thread)
+            wait_for_queue(gate, index + 1)
+    for thread in threads:
+        thread.join(5)
+    assert order == [0, 1, 2, 3, 4]
+    assert gate.stats()["running"] == 0
+
+
+def test_request_waiting_too_long_is_shed():
+    gate = Gate("test", 1, 0.2)
+    errors = []
+
+    def waiter():
+        try:
+            with gate.admit():
+                pass
+        except Overloaded as e:
+            errors.append(e)
+
+    with gate.admit():
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        thread.join(5)
+    assert len(errors) == 1 and errors[0].gate == "test"
+    wrapped = RuntimeError("LLM call failed")
+    wrapped.__cause__ = errors[0]
+    assert admission.is_overloaded_error(wrapped)
+    assert not admission.is_overloaded_error(RuntimeError("LLM call failed"))
+    stats = gate.stats()
+    assert stats["shed"] == 1 and stats["queued"] == 0 and stats["running"] == 0
+
+
+def test_waiter_is_told_when_it_is_admitted():
+    gate = Gate("test", 1, 5)
+    seen = []
+
+    def waiter():
+        with admission.notify_to(lambda ticket: seen.append((ticket.position, ticket.admitted))):
+            with gate.admit():
+                pass
+
+    with gate.admit():
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        wait_for_queue(gate, 1)
+        while not seen:
+            pass
+    thread.join(5)
+    assert seen == [(1, False), (1, True)]
+
+
+def test_interrupted_wait_notifies_and_frees_the_queue():
+    gate = Gate("test", 1, 5)
+    seen = []
+    interrupted = []
+
+    def notice(ticket):
+        seen.append(ticket.position)
+        if ticket.position is not None:
+            raise Interrupted()
+
+    def waiter():
+        try:
+            with admission.notify_to(notice):
+                with gate.admit():
+                    pass
+        except Interrupted:
+            interrupted.append(True)
+
+    with gate.admit():
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        thread.join(5)
+        assert gate.stats()["queued"] == 0
+    assert interrupted == [True]
+    assert seen == [1, None]
+    assert gate.stats()["shed"] == 0
+    with gate.admit():
+        assert gate.stats()["running"] == 1
+
+
+def test_zero_limit_disables_the_gate():
+    gate = Gate("test", 0, 5)
+    with gate.admit(), gate.admit():
+        assert gate.stats()["running"] == 0
+
+
+@pytest.mark.parametrize("position, eta, expected", [
+    (3, None, "number 3 in the queue."),
+    (2, 0.2, "should start in about 1s."),
+])
+def test_describe_wait(position, eta, expected):
+    assert admission.describe_wait(position, eta).endswith(expected)
@@ -0,0 +1,36 @@
+from utils.errors import exception_chain
+from utils.llm import is_connection_error, is_timeout_error
+
+
+def wrap(outer, inner):
+    outer.__cause__ = inner
+    return outer
+
+
+def test_chain_follows_causes_then_contexts():
+    root = ValueError("root")
+    middle = KeyError("middle")
+    middle.__context__ = root
+    top = wrap(RuntimeError("top"), middle)
+    assert list(exception_chain(top)) == [top, middle, root]
+
+
+def test_chain_stops_at_a_cycle():
+    first = RuntimeError("first")
+    second = wrap(ValueError("second"), first)
+    first.__cause__ = second
+    assert list(exception_chain(first)) == [first, second]
+    assert list(exception_chain(None)) == []
+
+
+def test_wrapped_transport_errors_are_classified():
+    class ReadTimeout(Exception):
+        pass
+
+    class ConnectError(Exception):
+        pass
+
+    assert is_timeout_error(wrap(RuntimeError("call failed"), ReadTimeout()))
+    assert is_timeout_error(RuntimeError("504 DEADLINE_EXCEEDED"))
+    assert is_connection_error(wrap(RuntimeError("call failed"), ConnectError()))
+    assert not is_connection_error(wrap(RuntimeError("call failed"), ReadTimeout()))
@@ -0,0 +1,36 @@
+import pytest
+
+from utils import config, llm, routing
+from utils.routing import Routing, Tier
+
+
+@pytest.fixture
+def slow_routes(monkeypatch):
+    """A long-timeout tier that always times out, falling back to a short-timeout tier."""
+    monkeypatch.setattr(config, "LLM_PROVIDER", "fake")
+    monkeypatch.setattr(config, "FAKE_LLM_ERROR_RATE", 0.0)
+    monkeypatch.setattr(llm, "_clients", {})
+    previous = routing.get_routing()
+    routing.set_routing(Routing(
+        tiers={
+            "full": Tier("full", "full-model", 0.4, "light", fake_latency=1.0, fake_error_rate=0.0),
+            "light": Tier("light", "light-model", 0.1, "full", fake_latency=0.2, fake_error_rate=0.0),
+        },
+        features={"long": "full", "short": "light"},
+        default="full",
+    ))
+    yield
+    routing.set_routing(previous)
+
+
+def test_fallback_keeps_the_routed_tier_timeout(slow_routes):
+    tier, response = llm._call_routed("long", lambda client: client.invoke("hello"))
+    assert tier.name == "light"
+    assert response.content
+    assert llm.get_llm("light", 0.4).timeout == 0.4
+
+
+def test_tier_routed_directly_uses_its_own_timeout(slow_routes):
+    assert llm.get_llm("light").timeout == 0.1
+    with pytest.raises(TimeoutError):
+        llm._call_routed("short", lambda client: client.invoke("hello"))
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils import config, rate_limit
+from utils.rate_limit import TokenBucket, backoff_delay, retry_hint
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+def test_bucket_allows_a_burst_then_paces_calls(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert sum(clock.slept) == pytest.approx(1.0)
+
+
+def test_bucket_refills_with_time_up_to_capacity(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    clock.now += 1
+    assert [bucket.acquire() for _ in range(2)] == [0, 0]
+    assert bucket.acquire() > 0
+
+    clock.now += 60
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.acquire() > 0
+
+
+def test_bucket_rejects_a_zero_rate_and_holds_at_least_one_token(clock):
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, capacity=5)
+    bucket = TokenBucket(rate=1, capacity=0.5)
+    assert bucket.acquire() == 0
+
+
+class ApiError(Exception):
+    def __init__(self, message, headers=None):
+        super().__init__(message)
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+@pytest.mark.parametrize("error, expected", [
+    (ApiError("429 Too Many Requests", {"retry-after": "7"}), 7.0),
+    (ApiError("429 Please retry in 12.5s."), 12.5),
+    (ApiError("RESOURCE_EXHAUSTED {'retryDelay': '30s'}"), 30.0),
+    (ApiError("429 quota exceeded retry_delay { seconds: 41 }"), 41.0),
+    (ApiError("429 retry in 3s", {"retry-after": "soon"}), 3.0),
+    (ApiError("429 Too Many Requests"), None),
+])
+def test_retry_hint(error, expected):
+    assert retry_hint(error) == expected
+
+
+def test_retry_hint_looks_through_wrapping_errors():
+    wrapped = RuntimeError("model call failed")
+    wrapped.__cause__ = ApiError("429", {"retry-after": "4"})
+    assert retry_hint(wrapped) == 4.0
+
+
+def test_backoff_honours_the_hint_up_to_the_maximum(monkeypatch):
+    monkeypatch.setattr(config, "LLM_BACKOFF_BASE", 1.0)
+    monkeypatch.setattr(config, "LLM_BACKOFF_MAX", 20.0)
+    assert backoff_delay(0, ApiError("429 retry in 5s")) >= 5.0
+    assert backoff_delay(0, ApiError("429 retry in 500s")) == 20.0
+    assert 0 <= backoff_delay(2) <= 4.0
@@ -0,0 +1,94 @@
+from utils.resume import (
+    estimate_tokens,
+    merge_section_feedback,
+    normalize_page,
+    remove_repeated_lines,
+    split_sections,
+    trim_to_budget,
+)
+
+
+def test_keeps_date_ranges_on_later_pages():
+    pages = [
+        "Jane Doe\nExperience\nData Engineer, Acme\nJan 2021 - Dec 2023\nBuilt pipelines",
+        "Analyst, Initech\nJan 2017 - Dec 2020\nWrote reports\nGPA 3.8",
+    ]
+    result = remove_repeated_lines(pages)
+    assert "Jan 2021 - Dec 2023" in result[0]
+    assert "Jan 2017 - Dec 2020" in result[1]
+    assert "GPA 3.8" in result[1]
+
+
+def test_keeps_repeated_job_titles_and_bullets():
+    pages = [
+        "Experience\nSoftware Engineer\nAcme\n- Led code reviews\nMore text\nEven more\nAnd more",
+        "Software Engineer\nInitech\n- Led code reviews\nProjects\nA project\nAnother\nLast line",
+    ]
+    result = remove_repeated_lines(pages)
+    assert result[1].count("Software Engineer") == 1
+    assert result[1].count("- Led code reviews") == 1
+
+
+def test_drops_running_headers_footers_and_page_numbers():
+    pages = [
+        "Jane Doe | jane@example.com\nExperience\nData Engineer\nBuilt pipelines\nConfidential\nPage 1 of 3",
+        "Jane Doe | jane@example.com\nSkills\nPython, SQL\nSpark\nConfidential\nPage 2 of 3",
+        "Jane Doe | jane@example.com\nEducation\nBSc Computer Science\nConfidential\n3",
+    ]
+    result = remove_repeated_lines(pages)
+    text = "\n".join(result)
+    assert text.count("Jane Doe | jane@example.com") == 1
+    assert text.count("Confidential") == 1
+    assert "Page" not in text
+    assert not any(line == "3" for line in text.splitlines())
+    assert "Python, SQL" in result[1]
+
+
+def test_single_page_only_loses_page_numbers():
+    assert remove_repeated_lines(["Jane Doe\nJan 2021 - Dec 2023\n1"]) == ["Jane Doe\nJan 2021 - Dec 2023"]
+
+
+def test_keeps_numbers_in_the_body():
+    pages = [
+        "Jane Doe\nContact\n5551234567\nExperience\nAcme\n2019\n- Shipped 3\nMore\nEnd\n1",
+        "Skills\nPython\nSQL\nYears of SQL\n12\nSpark\nAirflow\nDocker\n2",
+    ]
+    result = remove_repeated_lines(pages)
+    assert "5551234567" in result[0].splitlines()
+    assert "2019" in result[0].splitlines()
+    assert "12" in result[1].splitlines()
+    assert "1" not in result[0].splitlines()
+    assert "2" not in result[1].splitlines()
+
+
+def test_line_break_hyphens():
+    vocabulary = {"experience"}
+    text = normalize_page("Years of experi-\nence with Python-\nbased tools, self-\nmotivated", vocabulary)
+    assert "experience" in text
+    assert "Python-based" in text
+    assert "self-motivated" in text
+
+
+def _resume(experience_lines):
+    return "\n".join(
+        ["Jane Doe", "jane@example.com", "Experience"]
+        + [f"- Built data pipeline number {i} processing events for the analytics team" for i in range(experience_lines)]
+        + ["Skills", "Python, SQL", "Spark, Airflow", "Projects", "Recommendation engine", "- Used collaborative filtering",
+           "Education", "BSc Computer Science, 2019"]
+    )
+
+
+def test_long_section_does_not_push_out_the_others():
+    text, trimmed = trim_to_budget(_resume(200), 400)
+    assert estimate_tokens(text) <= 400
+    assert trimmed == ["Experience"]
+    sections = split_sections(text)
+    assert list(sections) == ["Education", "Experience", "Skills", "Projects"]
+    assert "Spark, Airflow" in sections["Skills"]
+
+
+def test_trimmed_sections_are_not_reported_missing():
+    review = merge_section_feedback({"Experience": "- Quantify impact"}, trimmed=["Skills"])
+    assert "No Skills section was found" not in review
+    assert "left out of this review" in review
+    assert "No Projects section was found" in review
@@ -0,0 +1,137 @@
+import threading
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+class Interrupted(BaseException):
+    """Stands in for Streamlit's RerunException / StopException."""
+
+
+def wait_for_followers(flight, key, count):
+    while flight._calls[key].followers < count:
+        pass
+
+
+def run_followers(flight, key, count):
+    """Start `count` threads calling do(key); returns (threads, outcomes)."""
+    outcomes = []
+
+    def follower():
+        try:
+            outcomes.append(flight.do(key, lambda: "not called"))
+        except Exception as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=follower) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    wait_for_followers(flight, key, count)
+    return threads, outcomes
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test-coalesce")
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    leader_results = []
+    leader = threading.Thread(target=lambda: leader_results.append(flight.do("k", slow)))
+    leader.start()
+    while not calls:
+        pass
+    threads, outcomes = run_followers(flight, "k", 3)
+    release.set()
+    for thread in [leader, *threads]:
+        thread.join(5)
+    assert calls == [1]
+    assert leader_results == ["result"] and outcomes == ["result"] * 3
+    assert flight.stats() == {"originated": 1, "coalesced": 3}
+    assert "k" not in flight._calls
+
+
+def test_leader_error_reaches_followers_and_releases_key():
+    flight = SingleFlight("test")
+    call, leader = flight.begin("k")
+    assert leader
+    threads, outcomes = run_followers(flight, "k", 2)
+    error = ValueError("boom")
+    flight.finish("k", call, error=error)
+    for thread in threads:
+        thread.join(5)
+    assert outcomes == [error, error]
+    assert flight.do("k", lambda: "fresh") == "fresh"
+
+
+def test_abandon_without_followers_fails_the_call():
+    flight = SingleFlight("test")
+    call, _ = flight.begin("k")
+    assert flight.abandon("k", call, RuntimeError("stopped"))
+    assert "k" not in flight._calls
+    with pytest.raises(RuntimeError):
+        SingleFlight.wait(call)
+
+
+def test_abandon_with_followers_leaves_the_call_open():
+    flight = SingleFlight("test")
+    call, _ = flight.begin("k")
+    threads, outcomes = run_followers(flight, "k", 1)
+    assert not flight.abandon("k", call, RuntimeError("stopped"))
+    assert flight._calls["k"] is call and not call.done.is_set()
+    flight.finish("k", call, result="finished for followers")
+    threads[0].join(5)
+    assert outcomes == ["finished for followers"]
+
+
+def test_leader_base_exception_releases_key():
+    flight = SingleFlight("test")
+
+    def interrupted():
+        raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        flight.do("k", interrupted)
+    assert "k" not in flight._calls
+    assert flight.do("k", lambda: 42) == 42
+
+
+def test_followers_of_interrupted_leader_get_an_error():
+    flight = SingleFlight("test")
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def leader_fn():
+        started.set()
+        release.wait(5)
+        raise Interrupted()
+
+    def leader():
+        try:
+            flight.do("k", leader_fn)
+        except Interrupted:
+            pass
+
+    def follower():
+        try:
+            flight.do("k", lambda: "not called")
+        except Exception as e:
+            errors.append(e)
+
+    leader_thread = threading.Thread(target=leader)
+    leader_thread.start()
+    started.wait(5)
+    follower_thread = threading.Thread(target=follower)
+    follower_thread.start()
+    wait_for_followers(flight, "k", 1)
+    release.set()
+    leader_thread.join(5)
+    follower_thread.join(5)
+    assert not follower_thread.is_alive()
+    assert len(errors) == 1 and isinstance(errors[0], RuntimeError)
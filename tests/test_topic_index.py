@@ -0,0 +1,30 @@
+import pytest
+
+from utils.topic_index import TopicIndex, normalize_topic
+
+
+def test_equivalent_topics_share_a_key():
+    key = normalize_topic("Python data structures")
+    assert normalize_topic("python Data-Structures") == key
+    assert normalize_topic("Data structures in Python") == key
+    assert normalize_topic("Sorting algorithms") == normalize_topic("sorting algorithm")
+    assert normalize_topic("Binary search libraries") == normalize_topic("binary search library")
+
+
+@pytest.mark.parametrize("plural_looking, other", [
+    ("HTTPS", "HTTP"),
+    ("AWS", "AW"),
+    ("iOS", "IO"),
+    ("Pandas", "Panda"),
+    ("Time series", "Time sery"),
+    ("Physics", "Physic"),
+])
+def test_acronyms_and_names_are_not_singularised(plural_looking, other):
+    assert normalize_topic(plural_looking) != normalize_topic(other)
+
+
+def test_https_does_not_match_http(tmp_path):
+    index = TopicIndex(str(tmp_path / "topics.sqlite3"))
+    index.add("partition", "HTTP", "http-key")
+    assert index.find("partition", "HTTPS", 0.8) == []
+    assert index.find("partition", "http", 0.8)[0][2] == "http-key"
@@ -0,0 +1,240 @@
+"""Per-process admission control for model calls and CPU-heavy work.
+
+Every LLM call (utils.llm) passes through the LLM gate, and PDF rendering
+and text extraction through the CPU gate. Each gate lets at most `limit`
+requests run at once; the rest wait in a FIFO queue, so a burst of clicks is
+served in arrival order instead of everything slowing down together. A
+request that has waited longer than CAREERECHO_ADMISSION_MAX_WAIT is shed
+with Overloaded.
+
+Waiting requests report their queue position and an ETA (from a moving
+average of how long admitted requests take) to the callback installed with
+notify_to(). The callback is a context variable, so it follows the request
+into LangChain's batch threads; streamlit_notice() shows it on a page.
+"""
+import contextvars
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from utils import config, metrics
+from utils.errors import exception_chain
+
+BUSY_MESSAGE = "The service is very busy right now and your request could not be started. Please try again in a minute."
+
+_notify = contextvars.ContextVar("admission_notify", default=None)
+_tickets = itertools.count(1)
+# Weight of the newest request in the moving average of service time
+_SERVICE_SMOOTHING = 0.2
+# Waiters re-check their turn (and the shedding deadline) at least this often
+_POLL_SECONDS = 1.0
+
+
+class Overloaded(Exception):
+    """A request waited longer than the admission limit and was shed."""
+
+    def __init__(self, gate, waited):
+        super().__init__(f"{gate} queue: shed after waiting {waited:.1f}s")
+        self.gate = gate
+        self.waited = waited
+
+
+def is_overloaded_error(exc):
+    """True if `exc` (or anything it wraps) is a shed request."""
+    return any(isinstance(error, Overloaded) for error in exception_chain(exc))
+
+
+class Ticket:
+    """A request's place in a gate's queue, as passed to the notify callback."""
+
+    def __init__(self, gate):
+        self.id = next(_tickets)
+        self.gate = gate
+        self.position = None
+        self.eta = None
+        self.admitted = False
+        self.enqueued_at = time.monotonic()
+
+
+class Gate:
+    def __init__(self, name, limit, max_wait):
+        self.name = name
+        self.limit = limit
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._running = 0
+        self._service = None
+        self._shed = 0
+
+    def _eta(self, position):
+        """Seconds until the request at `position` should start, if known."""
+        if self._service is None:
+            return None
+        return math.ceil(position / self.limit) * self._service
+
+    def _wait_turn(self, ticket, notify):
+        while True:
+            with self._cond:
+                if self._queue[0] is ticket and self._running < self.limit:
+                    self._queue.popleft()
+                    self._running += 1
+                    return
+                waited = time.monotonic() - ticket.enqueued_at
+                if self.max_wait and waited >= self.max_wait:
+                    raise Overloaded(self.name, waited)
+                position = self._queue.index(ticket) + 1
+                changed = position != ticket.position
+                ticket.position = position
+                ticket.eta = self._eta(position)
+                if not changed or notify is None:
+                    timeout = _POLL_SECONDS
+                    if self.max_wait:
+                        timeout = min(timeout, self.max_wait - waited)
+                    self._cond.wait(timeout)
+                    continue
+            # Outside the lock: the callback may be slow (e.g. draw on a page)
+            notify(ticket)
+
+    @contextmanager
+    def admit(self):
+        """Hold one of the gate's slots for the body of a `with` block.
+
+        Waits in FIFO order when the gate is full and raises Overloaded
+        after config.ADMISSION_MAX_WAIT seconds.
+        """
+        if not self.limit:
+            yield
+            return
+        notify = _notify.get()
+        ticket = Ticket(self.name)
+        with self._cond:
+            queued = bool(self._queue) or self._running >= self.limit
+            if queued:
+                self._queue.append(ticket)
+            else:
+                self._running += 1
+        if queued:
+            try:
+                self._wait_turn(ticket, notify)
+            except BaseException as e:
+                shed = isinstance(e, Overloaded)
+                with self._cond:
+                    if ticket in self._queue:
+                        self._queue.remove(ticket)
+                    self._shed += shed
+                    # The next in line may be able to start now
+                    self._cond.notify_all()
+                if shed:
+                    metrics.increment("admission_shed", labels={"gate": self.name})
+                ticket.position = None
+                if notify is not None:
+                    notify(ticket)
+                raise
+            finally:
+                metrics.observe("admission_wait", time.monotonic() - ticket.enqueued_at, {"gate": self.name})
+            ticket.admitted = True
+        start = time.monotonic()
+        try:
+            if queued and notify is not None:
+                notify(ticket)
+            yield
+        finally:
+            seconds = time.monotonic() - start
+            with self._cond:
+                self._running -= 1
+                if self._service is None:
+                    self._service = seconds
+                else:
+                    self._service += _SERVICE_SMOOTHING * (seconds - self._service)
+                self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "running": self._running,
+                "queued": len(self._queue),
+                "shed": self._shed,
+                "mean_service_s": round(self._service, 2) if self._service is not None else None,
+            }
+
+
+LLM = Gate("llm", config.ADMISSION_LLM_LIMIT, config.ADMISSION_MAX_WAIT)
+CPU = Gate("cpu", config.ADMISSION_CPU_LIMIT, config.ADMISSION_MAX_WAIT)
+
+
+def stats():
+    return {gate.name: gate.stats() for gate in (LLM, CPU)}
+
+
+@contextmanager
+def notify_to(callback):
+    """Call callback(ticket) while requests made in this block wait for a slot.
+
+    It is called whenever the ticket's position changes, and once more
+    when the request leaves the queue: with ticket.admitted set if it
+    started, or with ticket.position None if it was shed or abandoned.
+    """
+    token = _notify.set(callback)
+    try:
+        yield
+    finally:
+        _notify.reset(token)
+
+
+def describe_wait(position, eta):
+    text = f"The service is busy: your request is number {position} in the queue"
+    if eta is not None:
+        text += f" and should start in about {max(1, round(eta))}s"
+    return text + "."
+
+
+class QueueNotice:
+    """Summarises the tickets of one page action into a single message.
+
+    A page action can make several calls at once (e.g. one per section);
+    the notice shows the best-placed one still waiting, and clears once
+    none are.
+    """
+
+    def __init__(self, show, clear):
+        self._show = show
+        self._clear = clear
+        self._lock = threading.Lock()
+        self._waiting = {}
+
+    def __call__(self, ticket):
+        with self._lock:
+            if ticket.admitted or ticket.position is None:
+                self._waiting.pop(ticket.id, None)
+            else:
+                self._waiting[ticket.id] = ticket
+            first = min(self._waiting.values(), key=lambda t: t.position, default=None)
+            if first is None:
+                self._clear()
+            else:
+                self._show(describe_wait(first.position, first.eta))
+
+
+def streamlit_notice(placeholder):
+    """notify_to() context that shows queue waits in a Streamlit placeholder.
+
+    Calls made from worker threads of the same script run (e.g. LangChain
+    batches) are attached to the run so they can draw too.
+    """
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+
+    def attached(draw):
+        def call(*args):
+            if ctx is not None and get_script_run_ctx() is None:
+                add_script_run_ctx(threading.current_thread(), ctx)
+            draw(*args)
+        return call
+
+    return notify_to(QueueNotice(attached(placeholder.info), attached(placeholder.empty)))
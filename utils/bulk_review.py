@@ -0,0 +1,166 @@
+"""Review many resume PDFs in one run.
+
+Text is extracted with the app's own PDF workers under the CPU admission
+gate, so a bulk run queues behind interactive uploads instead of competing
+with them, and a slow or malformed PDF times out and loses its worker like
+any upload. Reviews use the single-call review prompt under a concurrency
+limit, and every result is handed to the caller as soon as it is ready.
+"""
+import csv
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from utils import config
+from utils.llm import invoke
+from utils.pdf_text import ExtractionTimeout, extract_pdf_text
+from utils.resume import build_review_prompt, compact_resume
+
+REPORT_FIELDS = ["file", "status", "role", "pages", "truncated", "tokens_before",
+                 "tokens_after", "trimmed_sections", "extract_seconds", "review_seconds", "total_seconds", "feedback", "error"]
+
+
+def iter_pdf_sources(source):
+    """Yield (name, load) for each PDF in a directory or zip archive.
+
+    `source` is a directory path, a .zip path, or a file-like zip archive;
+    load() returns the file's bytes. Files over the size limit are yielded
+    with a load() that raises, so they show up in the report.
+    """
+    if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            paths += [os.path.join(root, name) for name in files if name.lower().endswith(".pdf")]
+        for path in sorted(paths)[:config.BULK_MAX_FILES]:
+            yield os.path.relpath(path, source), lambda path=path: _read_file(path)
+        return
+
+    archive = zipfile.ZipFile(source)
+    members = [info for info in archive.infolist()
+               if not info.is_dir() and info.filename.lower().endswith(".pdf")
+               and not os.path.basename(info.filename).startswith(("._", "."))]
+    for info in members[:config.BULK_MAX_FILES]:
+        yield info.filename, lambda info=info: _read_member(archive, info)
+
+
+def _check_size(size):
+    if size > config.BULK_MAX_FILE_BYTES:
+        raise ValueError(f"file is larger than {config.BULK_MAX_FILE_BYTES // (1024 * 1024)} MB")
+
+
+def _read_file(path):
+    _check_size(os.path.getsize(path))
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _read_member(archive, info):
+    _check_size(info.file_size)
+    return archive.read(info)
+
+
+def _review(role, text):
+    start = time.perf_counter()
+    feedback = invoke(build_review_prompt(role, text), feature="resume_bulk_review").content.strip()
+    return feedback, time.perf_counter() - start
+
+
+def bulk_review(sources, role, on_result, workers=None, concurrency=None, timeout=None):
+    """Extract and review every (name, load) in `sources`.
+
+    `workers` files are extracted at a time, each waiting its turn at the
+    CPU admission gate. `on_result(record)` is called from this thread with
+    one report record per file, in completion order. Returns the number of
+    files that failed.
+    """
+    workers = workers or config.BULK_EXTRACT_WORKERS
+    concurrency = concurrency or config.BULK_REVIEW_CONCURRENCY
+    timeout = timeout or config.PDF_EXTRACT_TIMEOUT
+    sources = iter(sources)
+    extracting = {}   # future -> (name, started at)
+    reviewing = {}    # future -> (name, started at, extract record)
+    failures = 0
+
+    def finish(record):
+        nonlocal failures
+        if record["status"] != "ok":
+            failures += 1
+        on_result(record)
+
+    def fail(name, started, error, **details):
+        finish({"file": name, "status": "error", "role": role, "error": error,
+                "total_seconds": round(time.perf_counter() - started, 3), **details})
+
+    def fill(extract_pool):
+        while len(extracting) < workers:
+            item = next(sources, None)
+            if item is None:
+                return
+            name, load = item
+            started = time.perf_counter()
+            try:
+                data = load()
+            except Exception as e:
+                fail(name, started, f"{type(e).__name__}: {e}")
+                continue
+            extracting[extract_pool.submit(extract_pdf_text, data, timeout)] = (name, started)
+
+    with ThreadPoolExecutor(max_workers=workers) as extract_pool, \
+            ThreadPoolExecutor(max_workers=concurrency) as review_pool:
+        fill(extract_pool)
+        while extracting or reviewing:
+            done, _ = wait([*extracting, *reviewing], return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in extracting:
+                    name, started = extracting.pop(future)
+                    extract_seconds = round(time.perf_counter() - started, 3)
+                    try:
+                        pages, truncated = future.result()
+                    except ExtractionTimeout:
+                        fail(name, started, "text extraction timed out", extract_seconds=extract_seconds)
+                        continue
+                    except Exception as e:
+                        fail(name, started, f"{type(e).__name__}: {e}", extract_seconds=extract_seconds)
+                        continue
+                    compacted = compact_resume(pages)
+                    if not compacted.text.strip():
+                        fail(name, started, "no extractable text", extract_seconds=extract_seconds)
+                        continue
+                    reviewing[review_pool.submit(_review, role, compacted.text)] = (name, started, {
+                        "pages": len(pages), "truncated": truncated, "extract_seconds": extract_seconds,
+                        "tokens_before": compacted.tokens_before, "tokens_after": compacted.tokens_after,
+                        "trimmed_sections": ", ".join(compacted.trimmed),
+                    })
+                    continue
+                name, started, details = reviewing.pop(future)
+                try:
+                    feedback, review_seconds = future.result()
+                except Exception as e:
+                    fail(name, started, f"{type(e).__name__}: {e}", **details)
+                    continue
+                finish({"file": name, "status": "ok", "role": role, "feedback": feedback,
+                        "review_seconds": round(review_seconds, 3),
+                        "total_seconds": round(time.perf_counter() - started, 3), **details})
+            fill(extract_pool)
+    return failures
+
+
+class ReportWriter:
+    """Writes report records to a JSONL or CSV stream as they arrive."""
+
+    def __init__(self, stream, fmt="jsonl"):
+        self.stream = stream
+        self.fmt = fmt
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(stream, fieldnames=REPORT_FIELDS, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, record):
+        if self._csv is not None:
+            self._csv.writerow(record)
+        else:
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
@@ -0,0 +1,107 @@
+"""Persistent, content-addressed cache for LLM responses.
+
+Entries live in a SQLite file under `config.CACHE_DIR`, so they survive
+restarts and are shared by every session (and every process) on the host.
+Each cache is bounded by entry count (least recently used entries are
+evicted first) and by age (entries older than the TTL are ignored and
+removed).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils import config, metrics
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def make_key(payload):
+    """Stable hash of a JSON-serialisable payload."""
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, name, path, max_entries, ttl_seconds):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key):
+        """Return the cached value for `key`, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is not None:
+                self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+        if row is None:
+            metrics.increment("cache_misses", labels={"cache": self.name})
+            return None
+        metrics.increment("cache_hits", labels={"cache": self.name})
+        return row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        if self.ttl_seconds:
+            self._conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl_seconds,))
+        if self.max_entries:
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                " SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self):
+        """Hit/miss counts for this process and the current number of entries."""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "hits": metrics.get_counter("cache_hits", labels={"cache": self.name}),
+            "misses": metrics.get_counter("cache_misses", labels={"cache": self.name}),
+            "entries": size,
+        }
+
+
+def get_cache(name, max_entries, ttl_seconds):
+    """Return the process-wide cache called `name`, opening it on first use."""
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            path = os.path.join(config.CACHE_DIR, f"{name}.sqlite3")
+            cache = _caches[name] = ResponseCache(name, path, max_entries, ttl_seconds)
+        return cache
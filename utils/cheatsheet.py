@@ -0,0 +1,320 @@
+"""Cheatsheet generation, shared by the cheatsheet page and the batch CLI."""
+import json
+import re
+from collections import namedtuple
+
+from utils import admission, config, metrics, routing
+from utils.cache import get_cache, make_key
+from utils.llm import invoke, map_as_completed, stream
+from utils.posts import strip_json_fence
+from utils.rate_limit import is_rate_limit_error
+from utils.topic_index import get_topic_index
+
+DIFFICULTY_LEVELS = ["Beginner", "Intermediate", "Advanced"]
+CHEATSHEET_TYPES = ["Quick Reference", "Formula Sheet", "Concept Overview", "Step-by-Step Guide", "Comprehensive Review"]
+LENGTHS = ["Short (1-2 pages)", "Medium (2-4 pages)", "Long (4-6 pages)"]
+
+# Generated outline-first, with the sections written in parallel
+OUTLINE_LENGTHS = ["Long (4-6 pages)"]
+OUTLINE_TYPES = ["Comprehensive Review"]
+MAX_OUTLINE_SECTIONS = 10
+
+_OUTLINE_LINE_RE = re.compile(r"^\s*(?:#+|[-*+]|\d+[.)])\s+(.+?)\s*$")
+_SECTION_NUMBER_RE = re.compile(r"^\d+[.)]\s*")
+
+# Markdown of a cheatsheet and the titles of any outline sections that
+# could not be generated (they hold a placeholder instead)
+GeneratedCheatsheet = namedtuple("GeneratedCheatsheet", ["content", "failed_sections"])
+
+
+def get_cheatsheet_cache():
+    return get_cache(
+        "cheatsheets",
+        max_entries=config.CHEATSHEET_CACHE_MAX_ENTRIES,
+        ttl_seconds=config.CHEATSHEET_CACHE_TTL,
+    )
+
+
+def create_cheatsheet_requirements(inputs):
+    """Structure the cheatsheet requirements"""
+    return {
+        'topic': inputs['topic'].strip(),
+        'difficulty_level': inputs['difficulty_level'],
+        'cheatsheet_type': inputs['cheatsheet_type'],
+        'length': inputs['length'],
+        'custom_requirements': inputs['custom_requirements'].strip() if inputs['custom_requirements'] else ""
+    }
+
+
+def cheatsheet_cache_key(requirements):
+    """Cache key for a requirements dict, insensitive to case and spacing"""
+    normalized = {
+        key: " ".join(value.lower().split()) if isinstance(value, str) else value
+        for key, value in requirements.items()
+    }
+    normalized['model'] = routing.model_for("cheatsheet")
+    return make_key(normalized)
+
+
+def topic_partition(requirements):
+    """Key of everything except the topic; only cheatsheets with equal keys are reused"""
+    normalized = {
+        key: " ".join(value.lower().split()) if isinstance(value, str) else value
+        for key, value in requirements.items()
+        if key != 'topic'
+    }
+    normalized['model'] = routing.model_for("cheatsheet")
+    return make_key(normalized)
+
+
+def find_cheatsheet(requirements):
+    """A stored cheatsheet for `requirements` or for a near-duplicate topic.
+
+    Returns (content, topic it was generated for), or None.
+    """
+    cache = get_cheatsheet_cache()
+    cached = cache.get(cheatsheet_cache_key(requirements))
+    if cached is not None:
+        return cached, requirements['topic']
+    if not config.TOPIC_MATCH_THRESHOLD:
+        return None
+    index = get_topic_index()
+    matches = index.find(topic_partition(requirements), requirements['topic'], config.TOPIC_MATCH_THRESHOLD)
+    for _, topic, cache_key in matches:
+        content = cache.get(cache_key)
+        if content is not None:
+            metrics.increment("cache_hits", labels={"cache": "cheatsheet_topics"})
+            return content, topic
+        # The cheatsheet itself has expired from the cache
+        index.remove(cache_key)
+    metrics.increment("cache_misses", labels={"cache": "cheatsheet_topics"})
+    return None
+
+
+def _store_cheatsheet(requirements, content):
+    cache_key = cheatsheet_cache_key(requirements)
+    get_cheatsheet_cache().set(cache_key, content)
+    get_topic_index().add(topic_partition(requirements), requirements['topic'], cache_key)
+
+
+def build_cheatsheet_prompt(requirements):
+    prompt = f"""You are an expert in creating study cheatsheets.
+    Create a {requirements['difficulty_level'].lower()} level cheatsheet for '{requirements['topic']}'. 
+This should be a {requirements['cheatsheet_type'].lower()} with {requirements['length'].lower()} content.
+
+Content requirements:
+- Include: core concepts only
+- Well-organized with clear sections and headings
+- Use bullet points and numbered lists for easy scanning
+- Make it comprehensive but concise for quick reference
+- Format using markdown with clear structure"""
+
+    if requirements['custom_requirements']:
+        prompt += f"\n- Special focus: {requirements['custom_requirements']}"
+
+    prompt += "\n\nReturn only the cheatsheet content formatted in clean markdown."
+    return prompt
+
+
+def generate_cheatsheet(requirements, fresh=False):
+    """GeneratedCheatsheet for `requirements`, from the cache or the model.
+
+    A stored cheatsheet for the same or a near-duplicate topic is reused
+    unless `fresh` is set. Long and comprehensive cheatsheets are generated
+    outline-first (see iter_outlined_cheatsheet); a section that still fails
+    after its retries is left as a placeholder and listed in
+    failed_sections, and such a partial cheatsheet is not stored for reuse.
+    Other errors from the model, or every section failing, propagate.
+    """
+    if not fresh:
+        found = find_cheatsheet(requirements)
+        if found is not None:
+            return GeneratedCheatsheet(found[0], [])
+    if uses_outline(requirements):
+        return _generate_outlined(requirements)
+    content = invoke(build_cheatsheet_prompt(requirements), feature="cheatsheet").content.strip()
+    if content:
+        _store_cheatsheet(requirements, content)
+    return GeneratedCheatsheet(content, [])
+
+
+def generate_cheatsheet_content(requirements, fresh=False):
+    """Just the markdown of generate_cheatsheet(), partial or not."""
+    return generate_cheatsheet(requirements, fresh).content
+
+
+def stream_cheatsheet_content(requirements, fresh=False):
+    """Like generate_cheatsheet_content, but yields the markdown as it is written."""
+    if not fresh:
+        found = find_cheatsheet(requirements)
+        if found is not None:
+            yield found[0]
+            return
+    if uses_outline(requirements):
+        yield from _stream_outlined(requirements)
+        return
+    parts = []
+    for chunk in stream(build_cheatsheet_prompt(requirements), feature="cheatsheet"):
+        parts.append(chunk)
+        yield chunk
+    content = "".join(parts).strip()
+    if content:
+        _store_cheatsheet(requirements, content)
+
+
+def uses_outline(requirements):
+    """Whether `requirements` are generated outline-first, section by section"""
+    return config.CHEATSHEET_OUTLINE and (
+        requirements['length'] in OUTLINE_LENGTHS or requirements['cheatsheet_type'] in OUTLINE_TYPES
+    )
+
+
+def build_outline_prompt(requirements):
+    prompt = f"""You are an expert in creating study cheatsheets.
+Plan the sections of a {requirements['difficulty_level'].lower()} level {requirements['cheatsheet_type'].lower()} cheatsheet for '{requirements['topic']}' with {requirements['length'].lower()} content.
+Choose 5 to 8 sections that together cover the topic without overlapping, in the order a student should read them."""
+    if requirements['custom_requirements']:
+        prompt += f"\nSpecial focus: {requirements['custom_requirements']}"
+    prompt += "\n\nReturn only a JSON array of section titles, with no numbering and no other text."
+    return prompt
+
+
+def parse_outline(response_text):
+    """Section titles from the outline reply (a JSON array, or a list as a fallback)"""
+    text = strip_json_fence(response_text)
+    try:
+        titles = json.loads(text)
+    except json.JSONDecodeError:
+        titles = [match.group(1) for match in map(_OUTLINE_LINE_RE.match, text.splitlines()) if match]
+    if not isinstance(titles, list):
+        return []
+    titles = [_SECTION_NUMBER_RE.sub("", str(title)).strip().strip("#*").strip() for title in titles]
+    return [title for title in titles if title][:MAX_OUTLINE_SECTIONS]
+
+
+def build_outline_section_prompt(requirements, titles, index):
+    outline = "\n".join(f"{number}. {title}" for number, title in enumerate(titles, 1))
+    prompt = f"""You are an expert in creating study cheatsheets.
+You are writing one section of a {requirements['difficulty_level'].lower()} level {requirements['cheatsheet_type'].lower()} cheatsheet for '{requirements['topic']}' with {requirements['length'].lower()} content overall.
+The cheatsheet has these sections:
+{outline}
+
+Write only the section "{titles[index]}". Other sections are written separately, so don't repeat their content.
+
+Content requirements:
+- Include: core concepts only
+- Use bullet points and numbered lists for easy scanning, with ### subheadings if the section needs them
+- Make it comprehensive but concise for quick reference
+- Format using markdown"""
+    if requirements['custom_requirements']:
+        prompt += f"\n- Special focus: {requirements['custom_requirements']}"
+    prompt += f"\n\nReturn only the section content in clean markdown, starting with the heading '## {titles[index]}'."
+    return prompt
+
+
+def clean_section(title, response_text):
+    """Section markdown that starts with its own '## title' heading"""
+    text = response_text.strip()
+    if text.startswith("```") and text.endswith("```"):
+        text = re.sub(r"^```\w*\n?|```$", "", text).strip()
+    lines = text.splitlines()
+    if lines and lines[0].lstrip().startswith("#"):
+        lines = lines[1:]
+    return f"## {title}\n\n" + "\n".join(lines).strip()
+
+
+def cheatsheet_heading(requirements):
+    return f"# {requirements['topic']} Cheatsheet"
+
+
+def assemble_cheatsheet(requirements, titles, sections):
+    """The whole cheatsheet from its sections, in outline order"""
+    parts = [cheatsheet_heading(requirements)]
+    for title, section in zip(titles, sections):
+        parts.append(section if section is not None else failed_section(title))
+    return "\n\n".join(parts)
+
+
+def failed_section(title):
+    """Placeholder for a section that could not be generated"""
+    return f"## {title}\n\n_This section could not be generated. Please try again later._"
+
+
+def _generate_section(prompt):
+    """One section, retried on its own if the call fails or comes back empty"""
+    for attempt in range(config.CHEATSHEET_SECTION_RETRIES + 1):
+        try:
+            content = invoke(prompt, feature="cheatsheet_section").content.strip()
+            if not content:
+                raise ValueError("the model returned an empty section")
+            return content
+        except Exception as e:
+            # Rate limits have already been retried with backoff by invoke(),
+            # and a shed request would only queue again behind the same load
+            if (attempt == config.CHEATSHEET_SECTION_RETRIES or is_rate_limit_error(e)
+                    or admission.is_overloaded_error(e)):
+                raise
+            print(f"Retrying cheatsheet section after error: {e}")
+            metrics.increment("cheatsheet_section_retries")
+
+
+def iter_outlined_cheatsheet(requirements):
+    """Generate a cheatsheet outline-first, yielding progress as it happens.
+
+    Yields ("outline", titles), then ("section", index, markdown) or
+    ("failed", index, error) for each section as it completes, and finally
+    ("done", markdown, complete). A complete cheatsheet is stored for reuse;
+    one with failed sections is not. Errors from the outline call propagate.
+    """
+    titles = parse_outline(invoke(build_outline_prompt(requirements), feature="cheatsheet_outline").content)
+    if not titles:
+        raise ValueError("the model returned an empty outline")
+    yield "outline", titles
+    prompts = [build_outline_section_prompt(requirements, titles, index) for index in range(len(titles))]
+    sections = [None] * len(titles)
+    for index, result in map_as_completed(_generate_section, prompts, config.CHEATSHEET_SECTION_CONCURRENCY):
+        if isinstance(result, Exception):
+            print(f"Error generating cheatsheet section '{titles[index]}': {result}")
+            yield "failed", index, result
+            continue
+        sections[index] = clean_section(titles[index], result)
+        yield "section", index, sections[index]
+    complete = all(section is not None for section in sections)
+    content = assemble_cheatsheet(requirements, titles, sections)
+    if complete:
+        _store_cheatsheet(requirements, content)
+    yield "done", content, complete
+
+
+def _generate_outlined(requirements):
+    errors = {}
+    for event in iter_outlined_cheatsheet(requirements):
+        if event[0] == "outline":
+            titles = event[1]
+        elif event[0] == "failed":
+            errors[event[1]] = event[2]
+        elif event[0] == "done":
+            if len(errors) == len(titles):
+                # Nothing but placeholders: report why instead
+                raise errors[min(errors)]
+            if errors:
+                metrics.increment("cheatsheet_partial")
+            return GeneratedCheatsheet(event[1], [titles[index] for index in sorted(errors)])
+
+
+def _stream_outlined(requirements):
+    """Sections in outline order, each yielded as soon as it and those before it are done
+
+    A section that fails is yielded as its placeholder.
+    """
+    ready = {}
+    next_index = 0
+    for event in iter_outlined_cheatsheet(requirements):
+        if event[0] == "outline":
+            titles = event[1]
+            yield cheatsheet_heading(requirements)
+        elif event[0] in ("section", "failed"):
+            ready[event[1]] = event[2] if event[0] == "section" else failed_section(titles[event[1]])
+            while next_index in ready:
+                yield "\n\n" + ready.pop(next_index)
+                next_index += 1
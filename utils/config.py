@@ -0,0 +1,119 @@
+"""Runtime settings, read once per process from the environment (or .env)."""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _get_int(name, default):
+    value = os.getenv(name)
+    try:
+        return int(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+def _get_float(name, default):
+    value = os.getenv(name)
+    try:
+        return float(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+# LLM client. "fake" selects the offline stand-in in utils/fake_llm.py,
+# "fake_server" the HTTP stand-in in benchmarks/fake_llm_server.py
+LLM_PROVIDER = os.getenv("CAREERECHO_LLM_PROVIDER", "google")
+FAKE_LLM_LATENCY = _get_float("CAREERECHO_FAKE_LLM_LATENCY", 0.0)
+FAKE_LLM_ERROR_RATE = _get_float("CAREERECHO_FAKE_LLM_ERROR_RATE", 0.0)
+FAKE_LLM_URL = os.getenv("CAREERECHO_FAKE_LLM_URL", "http://127.0.0.1:8765")
+# Models, timeouts and fallbacks per call site (see model_routing.toml)
+MODEL_ROUTING_FILE = os.getenv(
+    "CAREERECHO_MODEL_ROUTING",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model_routing.toml"),
+)
+# Used for tiers that don't set their own timeout
+LLM_TIMEOUT = _get_float("CAREERECHO_LLM_TIMEOUT", 120.0)
+# Retries inside the client itself; 429s are retried by utils.rate_limit
+LLM_MAX_RETRIES = _get_int("CAREERECHO_LLM_MAX_RETRIES", 0)
+
+# Process-wide rate limit and retry policy for model calls
+LLM_RATE_LIMIT_RPS = _get_float("CAREERECHO_LLM_RATE_LIMIT_RPS", 5.0)
+LLM_RATE_LIMIT_BURST = _get_int("CAREERECHO_LLM_RATE_LIMIT_BURST", 10)
+LLM_RETRY_ATTEMPTS = _get_int("CAREERECHO_LLM_RETRY_ATTEMPTS", 4)
+LLM_BACKOFF_BASE = _get_float("CAREERECHO_LLM_BACKOFF_BASE", 1.0)
+LLM_BACKOFF_MAX = _get_float("CAREERECHO_LLM_BACKOFF_MAX", 30.0)
+
+# Maximum concurrent requests when generating post variations in parallel
+POST_CONCURRENCY = _get_int("CAREERECHO_POST_CONCURRENCY", 5)
+
+# Response caches
+CACHE_DIR = os.getenv("CAREERECHO_CACHE_DIR", ".cache")
+CHEATSHEET_CACHE_MAX_ENTRIES = _get_int("CAREERECHO_CHEATSHEET_CACHE_MAX_ENTRIES", 2000)
+CHEATSHEET_CACHE_TTL = _get_float("CAREERECHO_CHEATSHEET_CACHE_TTL", 7 * 24 * 3600)
+
+# Rendered cheatsheet PDFs kept in memory, keyed by markdown hash
+PDF_CACHE_MAX_ENTRIES = _get_int("CAREERECHO_PDF_CACHE_MAX_ENTRIES", 64)
+
+# Resume PDF text extraction
+PDF_MAX_PAGES = _get_int("CAREERECHO_PDF_MAX_PAGES", 10)
+PDF_MAX_CHARS = _get_int("CAREERECHO_PDF_MAX_CHARS", 40_000)
+PDF_EXTRACT_TIMEOUT = _get_float("CAREERECHO_PDF_EXTRACT_TIMEOUT", 20.0)
+# Worker processes for extraction; one that times out is killed and replaced
+PDF_EXTRACT_WORKERS = _get_int("CAREERECHO_PDF_EXTRACT_WORKERS", 4)
+PDF_TEXT_CACHE_MAX_ENTRIES = _get_int("CAREERECHO_PDF_TEXT_CACHE_MAX_ENTRIES", 128)
+
+# Maximum concurrent section reviews per resume
+RESUME_REVIEW_CONCURRENCY = _get_int("CAREERECHO_RESUME_REVIEW_CONCURRENCY", 4)
+
+# Operations: the admin metrics page is disabled unless a token is set, and
+# a Prometheus /metrics endpoint is served only if a port is given. It has
+# no authentication, so it listens on loopback unless told otherwise
+ADMIN_TOKEN = os.getenv("CAREERECHO_ADMIN_TOKEN", "")
+METRICS_PORT = _get_int("CAREERECHO_METRICS_PORT", 0)
+METRICS_HOST = os.getenv("CAREERECHO_METRICS_HOST", "127.0.0.1")
+
+# Concurrent LLM calls made by the batch cheatsheet CLI
+CHEATSHEET_BATCH_CONCURRENCY = _get_int("CAREERECHO_CHEATSHEET_BATCH_CONCURRENCY", 4)
+
+# Bulk resume review
+BULK_EXTRACT_WORKERS = _get_int("CAREERECHO_BULK_EXTRACT_WORKERS", 2)
+BULK_REVIEW_CONCURRENCY = _get_int("CAREERECHO_BULK_REVIEW_CONCURRENCY", 4)
+BULK_MAX_FILES = _get_int("CAREERECHO_BULK_MAX_FILES", 500)
+BULK_MAX_FILE_BYTES = _get_int("CAREERECHO_BULK_MAX_FILE_BYTES", 10 * 1024 * 1024)
+
+# Threads shared by every session for background jobs (post refinement)
+JOB_WORKERS = _get_int("CAREERECHO_JOB_WORKERS", 8)
+
+# Import heavy dependencies and build the LLM client in the background after boot
+WARMUP = os.getenv("CAREERECHO_WARMUP", "").lower() in ("1", "true", "yes")
+
+# Large per-session artifacts (generated posts, cheatsheets, reports) kept on disk
+SESSION_ARTIFACT_TTL = _get_float("CAREERECHO_SESSION_ARTIFACT_TTL", 12 * 3600)
+SESSION_ARTIFACT_MAX_BYTES = _get_int("CAREERECHO_SESSION_ARTIFACT_MAX_BYTES", 1024 * 1024 * 1024)
+# Seconds between measurements of a session's in-memory state size
+SESSION_USAGE_SAMPLE_INTERVAL = _get_float("CAREERECHO_SESSION_USAGE_SAMPLE_INTERVAL", 60.0)
+
+# Reuse a stored cheatsheet when a new topic is this similar to an earlier one
+# (Jaccard similarity of character trigrams, 0-1; 0 disables matching)
+TOPIC_MATCH_THRESHOLD = _get_float("CAREERECHO_TOPIC_MATCH_THRESHOLD", 0.8)
+
+# Per-user history of cheatsheets, saved posts and resume reviews
+HISTORY_TTL = _get_float("CAREERECHO_HISTORY_TTL", 90 * 24 * 3600)
+HISTORY_MAX_PER_OWNER = _get_int("CAREERECHO_HISTORY_MAX_PER_OWNER", 200)
+
+# Long and comprehensive cheatsheets: outline first, then sections in parallel
+CHEATSHEET_OUTLINE = os.getenv("CAREERECHO_CHEATSHEET_OUTLINE", "1").lower() in ("1", "true", "yes")
+CHEATSHEET_SECTION_CONCURRENCY = _get_int("CAREERECHO_CHEATSHEET_SECTION_CONCURRENCY", 4)
+CHEATSHEET_SECTION_RETRIES = _get_int("CAREERECHO_CHEATSHEET_SECTION_RETRIES", 2)
+
+# Resume text sent for review is trimmed to about this many tokens (0 disables)
+RESUME_TOKEN_BUDGET = _get_int("CAREERECHO_RESUME_TOKEN_BUDGET", 4000)
+
+# Admission control: model calls and CPU-heavy work (PDF rendering/extraction)
+# allowed to run at once per process (0: unlimited). Requests over the limit
+# queue in arrival order and are shed after ADMISSION_MAX_WAIT seconds.
+ADMISSION_LLM_LIMIT = _get_int("CAREERECHO_ADMISSION_LLM_LIMIT", 32)
+ADMISSION_CPU_LIMIT = _get_int("CAREERECHO_ADMISSION_CPU_LIMIT", 2)
+ADMISSION_MAX_WAIT = _get_float("CAREERECHO_ADMISSION_MAX_WAIT", 60.0)
@@ -0,0 +1,10 @@
+"""Helpers for classifying errors that come back wrapped by LangChain or the API clients."""
+
+
+def exception_chain(exc):
+    """Yield `exc` and everything it wraps (its cause, or else its context), each once."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        yield exc
+        exc = exc.__cause__ or exc.__context__
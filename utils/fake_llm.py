@@ -0,0 +1,149 @@
+"""Deterministic stand-in for the Gemini chat model.
+
+Used by the offline benchmarks and load tests, and selectable for local
+development with CAREERECHO_LLM_PROVIDER=fake. Replies are derived from a
+hash of the prompt, so the same prompt always gets the same answer, and are
+shaped like what each page expects (markdown cheatsheets, JSON arrays of
+posts, the resume gate's OK). Latency and 429 rejections can be injected.
+
+FakeServerChatModel (CAREERECHO_LLM_PROVIDER=fake_server) asks the same
+replies of benchmarks/fake_llm_server.py over HTTP instead, so load tests
+wait on sockets the way the real client does.
+"""
+import hashlib
+import json
+import random
+import re
+import socket
+import time
+import urllib.error
+import urllib.request
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_WORDS = ("career growth skills project team learning impact python data "
+          "model design review feedback network mentor goal result build").split()
+_VERSIONS_RE = re.compile(r"Write (\d+) different versions")
+
+
+class FakeRateLimitError(Exception):
+    """Mimics the API's quota rejection."""
+
+
+def _sentence(rng, words):
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def fake_cheatsheet(rng, sections=6):
+    lines = [f"# {_sentence(rng, 3)[:-1]}", ""]
+    for number in range(1, sections + 1):
+        lines += [f"## {number}. {_sentence(rng, 2)[:-1]}", ""]
+        lines += [f"- **{rng.choice(_WORDS)}**: {_sentence(rng, 10)}" for _ in range(5)]
+        lines += ["", "```", f"{rng.choice(_WORDS)} = {rng.randint(1, 99)}", "```", ""]
+    return "\n".join(lines)
+
+
+def fake_reply(prompt):
+    """Deterministic reply shaped for the kind of prompt it answers."""
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+    if "reply with exactly: OK" in prompt:
+        return "OK"
+    if "JSON array of section titles" in prompt:
+        return "```json\n" + json.dumps([_sentence(rng, 3)[:-1] for _ in range(6)]) + "\n```"
+    if "Write only the section" in prompt:
+        lines = [f"- **{rng.choice(_WORDS)}**: {_sentence(rng, 10)}" for _ in range(6)]
+        return "\n".join(lines + ["", "```", f"{rng.choice(_WORDS)} = {rng.randint(1, 99)}", "```"])
+    if "JSON array" in prompt:
+        match = _VERSIONS_RE.search(prompt)
+        count = int(match.group(1)) if match else 3
+        return "```json\n" + json.dumps([" ".join(_sentence(rng, 12) for _ in range(4)) for _ in range(count)]) + "\n```"
+    if "JSON object" in prompt:
+        return "```json\n" + json.dumps({key: _sentence(rng, 4) for key in ["topic", "post_type", "tone", "audience"]}) + "\n```"
+    if "cheatsheet" in prompt.lower():
+        return fake_cheatsheet(rng)
+    return "\n".join(f"- {_sentence(rng, 14)}" for _ in range(6))
+
+
+def _prompt_text(messages):
+    return "\n".join(str(message.content) for message in messages)
+
+
+class FakeChatModel(BaseChatModel):
+    latency: float = 0.0
+    """Seconds each call takes before replying."""
+    error_rate: float = 0.0
+    """Fraction of calls rejected with a 429."""
+    chunk_words: int = 8
+    """Words per chunk when streaming."""
+    timeout: float = 0.0
+    """Calls slower than this raise TimeoutError instead of replying (0: no limit)."""
+
+    @property
+    def _llm_type(self):
+        return "careerecho-fake"
+
+    def _call_delay(self):
+        if self.timeout and self.latency > self.timeout:
+            time.sleep(self.timeout)
+            raise TimeoutError(f"Fake model did not reply within {self.timeout}s")
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            raise FakeRateLimitError("429 RESOURCE_EXHAUSTED. Please retry in 0.5s.")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self._call_delay()
+        text = fake_reply(_prompt_text(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        self._call_delay()
+        words = fake_reply(_prompt_text(messages)).split(" ")
+        for start in range(0, len(words), self.chunk_words):
+            piece = " ".join(words[start:start + self.chunk_words])
+            if start + self.chunk_words < len(words):
+                piece += " "
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+
+class FakeServerChatModel(BaseChatModel):
+    url: str = "http://127.0.0.1:8765"
+    """Base URL of benchmarks/fake_llm_server.py."""
+    model: str = "fake"
+    """Model name sent with each request."""
+    timeout: float = 120.0
+    """Seconds to wait for the reply (and between streamed chunks)."""
+
+    @property
+    def _llm_type(self):
+        return "careerecho-fake-server"
+
+    def _open(self, messages, stream):
+        body = json.dumps({"model": self.model, "prompt": _prompt_text(messages), "stream": stream}).encode()
+        request = urllib.request.Request(self.url.rstrip("/") + "/generate", data=body,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                raise FakeRateLimitError(json.loads(e.read())["error"]["message"]) from e
+            raise
+        except urllib.error.URLError as e:
+            if isinstance(e.reason, socket.timeout):
+                raise TimeoutError(f"Fake server did not reply within {self.timeout}s") from e
+            raise ConnectionError(str(e.reason)) from e
+        except socket.timeout as e:
+            raise TimeoutError(f"Fake server did not reply within {self.timeout}s") from e
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        with self._open(messages, stream=False) as response:
+            text = json.loads(response.read())["text"]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        with self._open(messages, stream=True) as response:
+            for line in response:
+                if line.strip():
+                    yield ChatGenerationChunk(message=AIMessageChunk(content=json.loads(line)["text"]))
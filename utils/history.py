@@ -0,0 +1,198 @@
+"""Persistent per-user history of generated artifacts.
+
+Cheatsheets (with their rendered PDF once it exists), saved posts and resume
+reviews are kept in a SQLite file under `config.CACHE_DIR`, so a user can
+list, search and download them again later without another LLM call or PDF
+render. Entries are owned by a random token carried in the page URL
+(`?u=...`); only its SHA-256 is stored. Each owner keeps at most
+HISTORY_MAX_PER_OWNER entries, and entries older than HISTORY_TTL are
+removed.
+"""
+import hashlib
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+
+from utils import config, metrics
+
+CHEATSHEET = "cheatsheet"
+POST = "post"
+RESUME_REVIEW = "resume_review"
+FEATURE_LABELS = {CHEATSHEET: "Cheatsheets", POST: "LinkedIn posts", RESUME_REVIEW: "Resume reviews"}
+
+TOKEN_PARAM = "u"
+_TOKEN_STATE_KEY = "history_token"
+_TOKEN_RE = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+_LIST_COLUMNS = "id, feature, title, created_at, size, pdf IS NOT NULL"
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def owner_token(query_params, state):
+    """The owner id for this visitor, creating a token on their first visit.
+
+    The token is kept in session state and mirrored into the URL, so it
+    survives page switches and can be bookmarked.
+    """
+    token = state.get(_TOKEN_STATE_KEY) or query_params.get(TOKEN_PARAM)
+    if not token or not _TOKEN_RE.match(token):
+        token = secrets.token_urlsafe(18)
+    state[_TOKEN_STATE_KEY] = token
+    if query_params.get(TOKEN_PARAM) != token:
+        query_params[TOKEN_PARAM] = token
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _normalize(text):
+    return " ".join(text.lower().split())
+
+
+class History:
+    def __init__(self, path, max_per_owner, ttl_seconds):
+        self.max_per_owner = max_per_owner
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            " id INTEGER PRIMARY KEY,"
+            " owner TEXT NOT NULL,"
+            " feature TEXT NOT NULL,"
+            " title TEXT NOT NULL,"
+            " title_key TEXT NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " text TEXT NOT NULL,"
+            " pdf BLOB,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS history_content ON history (owner, feature, content_hash)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS history_recent ON history (owner, feature, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS history_title ON history (owner, title_key)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS history_created ON history (created_at)")
+        self._conn.commit()
+
+    def save(self, owner, feature, title, text):
+        """Record an artifact and return its id.
+
+        Saving the same text again for the same owner and feature moves the
+        existing entry to the top instead of adding a duplicate.
+        """
+        now = time.time()
+        content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM history WHERE owner = ? AND feature = ? AND content_hash = ?",
+                (owner, feature, content_hash),
+            ).fetchone()
+            if row is not None:
+                entry_id = row[0]
+                self._conn.execute(
+                    "UPDATE history SET created_at = ?, title = ?, title_key = ? WHERE id = ?",
+                    (now, title, _normalize(title), entry_id),
+                )
+            else:
+                entry_id = self._conn.execute(
+                    "INSERT INTO history (owner, feature, title, title_key, content_hash, text, size, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (owner, feature, title, _normalize(title), content_hash, text, len(text.encode("utf-8")), now),
+                ).lastrowid
+            self._evict(owner, now)
+            self._conn.commit()
+        metrics.increment("history_saved", labels={"feature": feature})
+        return entry_id
+
+    def set_pdf(self, owner, entry_id, pdf_bytes):
+        """Attach rendered PDF bytes to an entry so later downloads skip rendering."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE history SET pdf = ?, size = size + ? WHERE id = ? AND owner = ?",
+                (pdf_bytes, len(pdf_bytes), entry_id, owner),
+            )
+            self._conn.commit()
+
+    def list(self, owner, feature=None, search="", limit=50):
+        """Newest entries for `owner`, optionally one feature and a title search.
+
+        Returns dicts without the stored content; use get() for that.
+        """
+        clauses = ["owner = ?"]
+        params = [owner]
+        if feature:
+            clauses.append("feature = ?")
+            params.append(feature)
+        if search.strip():
+            clauses.append("title_key LIKE ? ESCAPE '!'")
+            escaped = re.sub(r"([!%_])", r"!\1", _normalize(search))
+            params.append(f"%{escaped}%")
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_LIST_COLUMNS} FROM history WHERE {' AND '.join(clauses)}"
+                " ORDER BY created_at DESC LIMIT ?",
+                params,
+            ).fetchall()
+        keys = ["id", "feature", "title", "created_at", "size", "has_pdf"]
+        return [dict(zip(keys, row)) for row in rows]
+
+    def get(self, owner, entry_id):
+        """One entry with its text and PDF bytes (or None), or None if it is gone."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT feature, title, text, pdf, created_at FROM history WHERE id = ? AND owner = ?",
+                (entry_id, owner),
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(["feature", "title", "text", "pdf", "created_at"], row), id=entry_id)
+
+    def delete(self, owner, entry_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM history WHERE id = ? AND owner = ?", (entry_id, owner))
+            self._conn.commit()
+
+    def _evict(self, owner, now):
+        if self.ttl_seconds:
+            self._conn.execute("DELETE FROM history WHERE created_at < ?", (now - self.ttl_seconds,))
+        if self.max_per_owner:
+            self._conn.execute(
+                "DELETE FROM history WHERE id IN ("
+                " SELECT id FROM history WHERE owner = ? ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (owner, self.max_per_owner),
+            )
+
+
+def get_history():
+    """Return the process-wide history store, opening it on first use."""
+    global _history
+    with _history_lock:
+        if _history is None:
+            path = os.path.join(config.CACHE_DIR, "history.sqlite3")
+            _history = History(path, config.HISTORY_MAX_PER_OWNER, config.HISTORY_TTL)
+        return _history
+
+
+def cheatsheet_pdf(owner, entry_id, markdown):
+    """PDF bytes for a cheatsheet entry, rendered and stored on first use."""
+    store = get_history()
+    entry = store.get(owner, entry_id) if entry_id is not None else None
+    if entry is not None and entry["pdf"] is not None:
+        metrics.increment("cache_hits", labels={"cache": "history_pdf"})
+        return entry["pdf"]
+    from utils.pdf import get_pdf_bytes
+
+    pdf_bytes = get_pdf_bytes(markdown)
+    if entry is not None:
+        store.set_pdf(owner, entry_id, pdf_bytes)
+    return pdf_bytes
@@ -0,0 +1,113 @@
+"""Background jobs that keep running across Streamlit reruns.
+
+Work is submitted to one executor shared by every session; the session keeps
+the returned Job in st.session_state and polls it on later runs. Jobs run in
+plain threads, so the work itself must not call st.* functions; while the
+work waits for an admission slot, job.waiting holds its queue ticket.
+"""
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import admission, config, metrics
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_executor = ThreadPoolExecutor(max_workers=config.JOB_WORKERS, thread_name_prefix="careerecho-job")
+_ids = itertools.count(1)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, name):
+        self.id = next(_ids)
+        self.name = name
+        self.partial = ""
+        self.result = None
+        self.error = None
+        self.waiting = None
+        self.submitted_at = time.time()
+        self._cancelled = threading.Event()
+        self._future = None
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def status(self):
+        if self.cancelled:
+            return CANCELLED
+        if self._future.done():
+            return FAILED if self.error is not None else DONE
+        return RUNNING if self._future.running() else QUEUED
+
+    @property
+    def finished(self):
+        """True once the job has a result, an error, or was cancelled."""
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    def cancel(self):
+        """Stop the job: a queued job never starts, a streaming one stops at its next chunk."""
+        if self.finished:
+            return
+        self._cancelled.set()
+        self._future.cancel()
+
+    def _queue_update(self, ticket):
+        self.waiting = None if ticket.admitted or ticket.position is None else ticket
+
+    def _run(self, fn, args):
+        metrics.observe("job_wait", time.time() - self.submitted_at, {"job": self.name})
+        if self.cancelled:
+            outcome = CANCELLED
+        else:
+            try:
+                with admission.notify_to(self._queue_update):
+                    self.result = fn(self, *args)
+                outcome = CANCELLED if self.cancelled else DONE
+            except JobCancelled:
+                outcome = CANCELLED
+            except Exception as e:
+                print(f"Error in background job {self.name}: {e}")
+                self.error = e
+                outcome = FAILED
+        metrics.increment("jobs", labels={"job": self.name, "outcome": outcome})
+
+
+def submit(name, fn, *args):
+    """Run fn(job, *args) on the shared executor and return the Job."""
+    job = Job(name)
+    job._future = _executor.submit(job._run, fn, args)
+    return job
+
+
+def _collect_stream(job, make_chunks):
+    chunks = make_chunks()
+    try:
+        for text in chunks:
+            if job.cancelled:
+                raise JobCancelled()
+            job.partial += text
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+    return job.partial
+
+
+def submit_stream(name, make_chunks):
+    """Run a text stream in the background, exposing the text so far as job.partial.
+
+    make_chunks() is called on the worker thread and must return an iterator
+    of strings (e.g. a bound llm.stream); the job's result is the full text.
+    """
+    return submit(name, _collect_stream, make_chunks)
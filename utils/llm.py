@@ -0,0 +1,340 @@
+"""Process-wide Gemini chat clients shared by every page.
+
+Streamlit re-executes a page script on every widget interaction, so creating
+the client at page top level opened a new channel (and TLS handshake) per
+rerun. A client per model tier (see utils.routing) is built once per process
+and reused across sessions; it is only rebuilt after a connection-level
+failure, which is counted as a reconnect. All calls go through the
+process-wide limiter in utils.rate_limit, and identical prompts already in
+flight are coalesced into a single call.
+
+Each call runs on the tier routed for its feature. If that tier answers with
+a 429 or times out, the call moves straight on to the tier's fallback
+instead of backing off, keeping the routed tier's timeout (a long-form call
+doesn't get the light tier's shorter one); only the last tier in the chain
+retries 429s.
+Latency and failures are recorded per tier as llm_tier_request, and every
+switch is counted in llm_fallbacks. Calls that actually reach the model
+(not ones coalesced onto another) hold a slot of the LLM admission gate
+(utils.admission) while they run.
+
+LangChain is imported when the client is first built rather than at import
+time, so loading a page doesn't pay for it (see utils.warmup).
+"""
+import threading
+import time
+from contextlib import ExitStack
+from functools import partial
+
+from utils import admission, config, metrics, routing
+from utils.cache import make_key
+from utils.errors import exception_chain
+from utils.rate_limit import call_with_retry, is_rate_limit_error
+from utils.singleflight import SingleFlight
+
+_lock = threading.Lock()
+_clients = {}      # (tier name, timeout) -> client
+_stand_ins = {}    # tier name -> client set with set_llm()
+_flights = SingleFlight("llm")
+
+# Exception class names that mean the underlying channel is unusable.
+_CONNECTION_ERRORS = {
+    "ConnectError",
+    "ConnectTimeout",
+    "ConnectionError",
+    "RemoteProtocolError",
+    "ReadError",
+    "WriteError",
+    "ServiceUnavailable",
+}
+
+# Exception class names that mean the model didn't answer in time.
+_TIMEOUT_ERRORS = {
+    "TimeoutError",
+    "Timeout",
+    "TimeoutException",
+    "ReadTimeout",
+    "DeadlineExceeded",
+}
+
+
+def _build_client(tier, timeout):
+    if config.LLM_PROVIDER == "fake":
+        from utils.fake_llm import FakeChatModel
+        return FakeChatModel(
+            latency=config.FAKE_LLM_LATENCY if tier.fake_latency is None else tier.fake_latency,
+            error_rate=config.FAKE_LLM_ERROR_RATE if tier.fake_error_rate is None else tier.fake_error_rate,
+            timeout=timeout,
+        )
+    if config.LLM_PROVIDER == "fake_server":
+        from utils.fake_llm import FakeServerChatModel
+        return FakeServerChatModel(url=config.FAKE_LLM_URL, model=tier.model, timeout=timeout)
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model=tier.model,
+        timeout=timeout,
+        max_retries=config.LLM_MAX_RETRIES,
+    )
+
+
+def get_llm(tier=None, timeout=None):
+    """Return the shared client for `tier` (the default tier if None), creating it on first use.
+
+    The client uses the tier's own timeout unless `timeout` is given.
+    """
+    routes = routing.get_routing()
+    tier = routes.tiers[tier or routes.default]
+    client = _stand_ins.get(tier.name)
+    if client is not None:
+        return client
+    key = (tier.name, tier.timeout if timeout is None else timeout)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            if key not in _clients:
+                _clients[key] = _build_client(tier, key[1])
+                metrics.increment("llm_client_connects")
+            client = _clients[key]
+    return client
+
+
+def set_llm(client, tier=None):
+    """Replace the shared client of `tier` (every tier if None), e.g. with a stand-in for benchmarks."""
+    with _lock:
+        for name in [tier] if tier else routing.get_routing().tiers:
+            _stand_ins[name] = client
+
+
+def reconnect(tier=None):
+    """Drop the shared clients of `tier` (every tier if None) so the next call opens a fresh connection."""
+    with _lock:
+        for key in list(_clients):
+            if tier is None or key[0] == tier:
+                del _clients[key]
+                metrics.increment("llm_client_reconnects")
+
+
+def _named(error, names):
+    """True if `error`'s class or one of its bases has a name in `names`."""
+    return any(cls.__name__ in names for cls in type(error).__mro__)
+
+
+def is_connection_error(exc):
+    """True if `exc` (or anything it wraps) is a transport-level failure."""
+    return any(_named(error, _CONNECTION_ERRORS) for error in exception_chain(exc))
+
+
+def is_timeout_error(exc):
+    """True if `exc` (or anything it wraps) means the model didn't answer in time."""
+    return any(_named(error, _TIMEOUT_ERRORS) or "DEADLINE_EXCEEDED" in str(error)
+               for error in exception_chain(exc))
+
+
+def _check_connection(exc, tier=None):
+    """Drop the client if `exc` means the connection broke. True if it did."""
+    if is_connection_error(exc):
+        print(f"LLM connection lost, reconnecting: {exc}")
+        reconnect(tier)
+        return True
+    return False
+
+
+def _retryable(exc, tier=None):
+    return _check_connection(exc, tier) or is_rate_limit_error(exc)
+
+
+def _call_routed(feature, fn):
+    """Run fn(client) on the feature's tier, falling back on 429s and timeouts.
+
+    Returns (tier, result). Every tier is called with the routed tier's
+    timeout. Tiers with a fallback still left only retry dropped
+    connections; the last tier also backs off on 429s.
+    """
+    chain = routing.fallback_chain(feature)
+    timeout = chain[0].timeout
+    for position, tier in enumerate(chain):
+        last = position == len(chain) - 1
+        retryable = partial(_retryable if last else _check_connection, tier=tier.name)
+        try:
+            with metrics.instrumented("llm_tier_request", {"tier": tier.name}):
+                return tier, call_with_retry(lambda: fn(get_llm(tier.name, timeout)), retryable=retryable)
+        except Exception as e:
+            if last or not (is_rate_limit_error(e) or is_timeout_error(e)):
+                raise
+            fallback = chain[position + 1]
+            print(f"LLM tier {tier.name} failed for {feature} ({e}), falling back to {fallback.name}")
+            metrics.increment("llm_fallbacks", labels={"feature": feature, "from": tier.name, "to": fallback.name})
+
+
+def prompt_key(prompt, kind="invoke", feature="other"):
+    """Key identifying a prompt (string or message list), ignoring whitespace."""
+    if isinstance(prompt, str):
+        normalized = " ".join(prompt.split())
+    else:
+        normalized = [[message.type, " ".join(str(message.content).split())] for message in prompt]
+    return make_key([kind, routing.model_for(feature), normalized])
+
+
+def _record_usage(feature, message):
+    """Count the input/output tokens reported for a response."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    labels = {"feature": feature}
+    if usage.get("input_tokens"):
+        metrics.increment("llm_input_tokens", usage["input_tokens"], labels)
+    if usage.get("output_tokens"):
+        metrics.increment("llm_output_tokens", usage["output_tokens"], labels)
+
+
+def invoke(prompt, feature="other"):
+    """Invoke the feature's model tier under the process rate limiter.
+
+    Rate-limit errors and timeouts fall back to the next tier; dropped
+    connections (and, on the last tier, rate-limit errors) are retried with
+    backoff. If the same prompt is already in flight, wait for that call's
+    response. Latency, errors and token usage are recorded under `feature`.
+    """
+    def call():
+        with admission.LLM.admit():
+            _, response = _call_routed(feature, lambda client: client.invoke(prompt))
+        _record_usage(feature, response)
+        return response
+
+    with metrics.instrumented("llm_request", {"feature": feature}):
+        return _flights.do(prompt_key(prompt, feature=feature), call)
+
+
+def stream(prompt, feature="other"):
+    """Yield the text of each chunk as the shared client streams its reply.
+
+    Opening the stream is retried and falls back like invoke(); once text
+    has been yielded, errors propagate so the caller never sees duplicated
+    output.
+    If the same prompt is already being streamed for another session, its
+    full text is yielded in one piece when that stream finishes. A consumer
+    that stops early (a cancelled job) only detaches itself: if other
+    sessions are waiting on the stream, it is read to the end for them on a
+    background thread.
+    """
+    labels = {"feature": feature}
+    start = time.perf_counter()
+    with metrics.instrumented("llm_request", labels):
+        key = prompt_key(prompt, kind="stream", feature=feature)
+        call, leader = _flights.begin(key)
+        if not leader:
+            text = _flights.wait(call)
+            metrics.observe("llm_first_token", time.perf_counter() - start, labels)
+            yield text
+            return
+
+        def open_stream(client):
+            chunks = iter(client.stream(prompt))
+            return chunks, next(chunks, None)
+
+        parts = []
+        message = None
+        with ExitStack() as slot:
+            try:
+                slot.enter_context(admission.LLM.admit())
+                tier, (chunks, chunk) = _call_routed(feature, open_stream)
+                metrics.observe("llm_first_token", time.perf_counter() - start, labels)
+                while chunk is not None:
+                    message = chunk if message is None else message + chunk
+                    if chunk.content:
+                        parts.append(chunk.content)
+                        yield chunk.content
+                    try:
+                        chunk = next(chunks, None)
+                    except Exception as e:
+                        _check_connection(e, tier.name)
+                        raise
+            except GeneratorExit:
+                # The consumer stopped early
+                if not _flights.abandon(key, call, RuntimeError("stream abandoned")):
+                    # The admission slot goes with the stream to the thread
+                    threading.Thread(
+                        target=_drain_stream,
+                        args=(slot.pop_all(), key, call, feature, tier, chunks, message, parts),
+                        name="llm-stream-drain",
+                        daemon=True,
+                    ).start()
+                raise
+            except BaseException as e:
+                _flights.finish(key, call, error=e if isinstance(e, Exception) else RuntimeError("stream abandoned"))
+                raise
+        _record_usage(feature, message)
+        _flights.finish(key, call, result="".join(parts))
+
+
+def _drain_stream(slot, key, call, feature, tier, chunks, message, parts):
+    """Read an abandoned stream to the end for the sessions coalesced onto it."""
+    with slot:
+        try:
+            for chunk in chunks:
+                message = message + chunk
+                if chunk.content:
+                    parts.append(chunk.content)
+        except Exception as e:
+            _check_connection(e, tier.name)
+            _flights.finish(key, call, error=e)
+            return
+    _record_usage(feature, message)
+    _flights.finish(key, call, result="".join(parts))
+
+
+def map_as_completed(fn, items, max_concurrency):
+    """Run fn(item) concurrently, yielding (index, result) as each finishes.
+
+    A call that raises yields its exception in place of a result, so one
+    failure does not discard the others.
+    """
+    from langchain_core.runnables import RunnableLambda
+
+    runnable = RunnableLambda(fn)
+    run_config = {"max_concurrency": max_concurrency}
+    yield from runnable.batch_as_completed(items, config=run_config, return_exceptions=True)
+
+
+def invoke_as_completed(prompts, max_concurrency, feature="other"):
+    """Run `prompts` concurrently, yielding (index, response) as each finishes.
+
+    Each request goes through invoke(), so it is rate limited, retried and
+    instrumented. A failed request yields its exception in place of a
+    response, so one bad call does not discard the others.
+    """
+    yield from map_as_completed(lambda prompt: invoke(prompt, feature), prompts, max_concurrency)
+
+
+def coalescing_stats():
+    """Calls this process originated versus ones that joined an in-flight call."""
+    return _flights.stats()
+
+
+def connection_stats():
+    """Connects and reconnects of the shared clients in this process."""
+    counters = metrics.snapshot()
+    return {
+        "connects": counters.get("llm_client_connects", 0),
+        "reconnects": counters.get("llm_client_reconnects", 0),
+    }
+
+
+def tier_stats():
+    """Requests, success rate, latency and fallbacks for each tier in this process."""
+    timings = metrics.timings()
+    counters = metrics.snapshot()
+    stats = {}
+    for tier in routing.get_routing().tiers.values():
+        timing = timings.get(f'llm_tier_request{{tier="{tier.name}"}}')
+        requests = timing["count"] if timing else 0
+        errors = sum(value for name, value in counters.items()
+                     if name.startswith("llm_tier_request_errors{") and f'tier="{tier.name}"' in name)
+        stats[tier.name] = {
+            "model": tier.model,
+            "requests": requests,
+            "success_rate": round(1 - errors / requests, 3) if requests else None,
+            "mean_ms": round(timing["mean"] * 1000, 1) if timing else None,
+            "fallbacks": sum(value for name, value in counters.items()
+                             if name.startswith("llm_fallbacks{") and f'from="{tier.name}"' in name),
+        }
+    return stats
@@ -0,0 +1,182 @@
+"""Process-wide counters and latency histograms for operational visibility.
+
+Metrics can carry labels (for example the feature an LLM call was made
+for). Everything recorded here can be rendered in the Prometheus text
+format with render_prometheus(), served over HTTP by serve_metrics() (see
+serve_configured()), or inspected on the admin metrics page.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "careerecho"
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_lock = threading.Lock()
+_counters = {}
+_timings = {}
+_server = None
+_serve_attempted = False
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())) if labels else ())
+
+
+def _display_name(key):
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{label}="{value}"' for label, value in labels) + "}"
+
+
+def increment(name, amount=1, labels=None):
+    """Add `amount` to the counter called `name`."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def get_counter(name, labels=None):
+    with _lock:
+        return _counters.get(_key(name, labels), 0)
+
+
+def snapshot():
+    """Return a copy of all counters, keyed by name (with labels if any)."""
+    with _lock:
+        return {_display_name(key): value for key, value in _counters.items()}
+
+
+def observe(name, seconds, labels=None):
+    """Record one duration for the timing called `name`."""
+    key = _key(name, labels)
+    with _lock:
+        timing = _timings.get(key)
+        if timing is None:
+            timing = _timings[key] = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * len(BUCKETS)}
+        timing["count"] += 1
+        timing["sum"] += seconds
+        timing["max"] = max(timing["max"], seconds)
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                timing["buckets"][index] += 1
+                break
+
+
+@contextmanager
+def timed(name, labels=None):
+    """Time the body of a `with` block and record it under `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, labels)
+
+
+@contextmanager
+def instrumented(name, labels=None):
+    """Time a block under `name` and count its failures by exception class."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        increment(f"{name}_errors", labels={**(labels or {}), "error": type(e).__name__})
+        raise
+    finally:
+        observe(name, time.perf_counter() - start, labels)
+
+
+def timings():
+    """Count, mean and max seconds for every recorded timing."""
+    with _lock:
+        return {
+            _display_name(key): {"count": t["count"], "mean": t["sum"] / t["count"], "max": t["max"]}
+            for key, t in _timings.items()
+        }
+
+
+def _labels_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{label}="{value}"' for (label, _), value in zip(pairs, escaped)) + "}"
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, dict(t, buckets=list(t["buckets"]))) for key, t in _timings.items())
+    lines = []
+    declared = set()
+    for (name, labels), value in counters:
+        metric = f"{PREFIX}_{name}_total"
+        if metric not in declared:
+            declared.add(metric)
+            lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{_labels_text(labels)} {value}")
+    for (name, labels), timing in histograms:
+        metric = f"{PREFIX}_{name}_seconds"
+        if metric not in declared:
+            declared.add(metric)
+            lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, count in zip(BUCKETS, timing["buckets"]):
+            cumulative += count
+            lines.append(f"{metric}_bucket{_labels_text(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{metric}_bucket{_labels_text(labels, [('le', '+Inf')])} {timing['count']}")
+        lines.append(f"{metric}_sum{_labels_text(labels)} {timing['sum']}")
+        lines.append(f"{metric}_count{_labels_text(labels)} {timing['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """Serve /metrics on `port` from a background thread (once per process)."""
+    global _server
+    with _lock:
+        if _server is not None:
+            return _server
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
+
+
+def serve_configured():
+    """Serve /metrics as configured by CAREERECHO_METRICS_PORT and _HOST, if a port is set.
+
+    Called at the start of every page (via warmup.start), so the endpoint is
+    up whichever page a process runs first. A port that is already taken is
+    reported once and not retried.
+    """
+    global _serve_attempted
+    from utils import config
+
+    with _lock:
+        if not config.METRICS_PORT or _serve_attempted:
+            return None
+        _serve_attempted = True
+    try:
+        return serve_metrics(config.METRICS_PORT, config.METRICS_HOST)
+    except OSError as e:
+        print(f"Could not serve metrics on {config.METRICS_HOST}:{config.METRICS_PORT}: {e}")
+        return None
@@ -0,0 +1,400 @@
+"""Markdown to PDF rendering for cheatsheets.
+
+The markdown is parsed once into a list of blocks (headings, paragraphs,
+list items, code blocks, tables, rules) which are then emitted directly as
+ReportLab flowables. Inline markup is converted in a single regex pass, with
+`&`, `<` and `>` escaped so model output can never break ReportLab's
+paragraph parser.
+
+Styles and regexes are built once per process. Rendered PDFs are memoised by
+a hash of the markdown, so reruns of the cheatsheet page do not re-run
+ReportLab's layout for a cheatsheet that has already been rendered.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import Paragraph, Preformatted, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from utils import admission, config, metrics
+
+PAGE_MARGIN = 72
+FRAME_WIDTH = A4[0] - 2 * PAGE_MARGIN
+# Courier 10pt is 6pt per character
+CODE_LINE_LENGTH = int((FRAME_WIDTH - 20) // 6)
+
+_HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_RULE_RE = re.compile(r'^(?:-{3,}|\*{3,}|_{3,})$')
+_FENCE_RE = re.compile(r'^(```|~~~)')
+_BULLET_RE = re.compile(r'^([ \t]*)(?:[-*+•])\s+(.*)$')
+_ORDERED_RE = re.compile(r'^([ \t]*)(\d+)[.)]\s+(.*)$')
+_TABLE_SEPARATOR_RE = re.compile(r'^\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?$')
+_QUOTE_RE = re.compile(r'^>\s?(.*)$')
+_INLINE_RE = re.compile(
+    r'`([^`]+)`'                                 # 1: inline code
+    r'|\*\*(.+?)\*\*'                             # 2: bold
+    r'|__(.+?)__'                                 # 3: bold
+    r'|(?<![*\w])\*(?![\s*])([^*]+?)\*(?!\*)'     # 4: italic
+    r'|(?<![_\w])_(?![\s_])([^_]+?)_(?![_\w])'    # 5: italic
+    r'|\[([^\]]+)\]\(([^)\s]+)\)'                 # 6, 7: link
+)
+_BREAK_RE = re.compile(r'&lt;br\s*/?&gt;', re.IGNORECASE)
+_INLINE_CHARS = frozenset('`*_[<')
+_LIST_CHARS = frozenset('-*+•0123456789')
+
+styles = getSampleStyleSheet()
+
+title_style = ParagraphStyle(
+    'Title',
+    parent=styles['Heading1'],
+    fontSize=18,
+    spaceAfter=20,
+    textColor=colors.darkblue,
+    alignment=1
+)
+
+heading_style = ParagraphStyle(
+    'Heading',
+    parent=styles['Heading2'],
+    fontSize=14,
+    spaceAfter=12,
+    spaceBefore=12,
+    textColor=colors.darkgreen
+)
+
+subheading_style = ParagraphStyle(
+    'SubHeading',
+    parent=styles['Heading3'],
+    fontSize=12,
+    spaceAfter=8,
+    spaceBefore=8,
+    textColor=colors.darkred
+)
+
+bullet_style = ParagraphStyle(
+    'Bullet',
+    parent=styles['Normal'],
+    leftIndent=20,
+    bulletIndent=10,
+    spaceAfter=6
+)
+
+code_style = ParagraphStyle(
+    'Code',
+    parent=styles['Code'],
+    fontSize=10,
+    leftIndent=20,
+    backgroundColor=colors.lightgrey,
+    spaceAfter=6,
+    spaceBefore=6
+)
+
+quote_style = ParagraphStyle(
+    'Quote',
+    parent=styles['Normal'],
+    leftIndent=20,
+    textColor=colors.dimgrey,
+    spaceAfter=6
+)
+
+table_cell_style = ParagraphStyle(
+    'TableCell',
+    parent=styles['Normal'],
+    fontSize=9,
+    leading=11
+)
+
+table_header_style = ParagraphStyle(
+    'TableHeader',
+    parent=table_cell_style,
+    fontName='Helvetica-Bold'
+)
+
+table_style = TableStyle([
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+heading_styles = {
+    1: title_style,
+    2: heading_style,
+    3: subheading_style,
+}
+
+_list_styles = {}
+
+
+def list_style(depth):
+    """Bullet/numbered item style for a nesting depth (0 is top level)"""
+    style = _list_styles.get(depth)
+    if style is None:
+        style = _list_styles[depth] = ParagraphStyle(
+            f'Bullet{depth}',
+            parent=bullet_style,
+            leftIndent=bullet_style.leftIndent + 18 * depth,
+            bulletIndent=bullet_style.bulletIndent + 18 * depth
+        )
+    return style
+
+
+def escape(text):
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    return text
+
+
+def _inline_markup(match):
+    code, bold, bold_alt, italic, italic_alt, link_text, link_url = match.groups()
+    if code is not None:
+        return f'<font name="Courier">{escape(code)}</font>'
+    if bold is not None or bold_alt is not None:
+        return f'<b>{clean_text(bold if bold is not None else bold_alt)}</b>'
+    if italic is not None or italic_alt is not None:
+        return f'<i>{clean_text(italic if italic is not None else italic_alt)}</i>'
+    url = escape(link_url).replace('"', '&quot;')
+    return f'<link href="{url}" color="blue">{clean_text(link_text)}</link>'
+
+
+def clean_text(text):
+    """Convert inline markdown to escaped ReportLab paragraph markup"""
+    if _INLINE_CHARS.isdisjoint(text):
+        return escape(text)
+    out = []
+    pos = 0
+    for match in _INLINE_RE.finditer(text):
+        out.append(escape(text[pos:match.start()]))
+        out.append(_inline_markup(match))
+        pos = match.end()
+    out.append(escape(text[pos:]))
+    return _BREAK_RE.sub('<br/>', ''.join(out))
+
+
+def _split_row(line):
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|') and not line.endswith('\\|'):
+        line = line[:-1]
+    return [cell.strip().replace('\\|', '|') for cell in re.split(r'(?<!\\)\|', line)]
+
+
+def _indent_width(whitespace):
+    return len(whitespace.expandtabs(4))
+
+
+def parse_markdown(markdown_content):
+    """Parse markdown into a flat list of blocks in one pass over the lines.
+
+    Blocks are tuples whose first element is the kind: ('blank',),
+    ('rule',), ('heading', level, text), ('paragraph', text),
+    ('quote', text), ('code', text), ('table', rows),
+    ('bullet', depth, text) and ('ordered', depth, number, text).
+    """
+    blocks = []
+    lines = markdown_content.split('\n')
+    paragraph = []
+    list_indents = []
+    i = 0
+    count = len(lines)
+
+    def flush_paragraph():
+        if paragraph:
+            blocks.append(('paragraph', ' '.join(paragraph)))
+            paragraph.clear()
+
+    while i < count:
+        raw = lines[i].rstrip()
+        line = raw.strip()
+        i += 1
+
+        if not line:
+            flush_paragraph()
+            blocks.append(('blank',))
+            continue
+
+        first = line[0]
+
+        if first in '`~':
+            fence = _FENCE_RE.match(line)
+            if fence:
+                flush_paragraph()
+                code_lines = []
+                while i < count and not lines[i].strip().startswith(fence.group(1)):
+                    code_lines.append(lines[i].rstrip())
+                    i += 1
+                i += 1  # closing fence
+                blocks.append(('code', '\n'.join(code_lines)))
+                continue
+
+        if first in '-*_' and _RULE_RE.match(line):
+            flush_paragraph()
+            list_indents.clear()
+            blocks.append(('rule',))
+            continue
+
+        if first == '#':
+            heading = _HEADING_RE.match(line)
+            if heading:
+                flush_paragraph()
+                list_indents.clear()
+                blocks.append(('heading', len(heading.group(1)), heading.group(2)))
+                continue
+
+        if first == '|' and i < count and _TABLE_SEPARATOR_RE.match(lines[i].strip()):
+            flush_paragraph()
+            rows = [_split_row(line)]
+            i += 1  # separator row
+            while i < count and lines[i].strip().startswith('|'):
+                rows.append(_split_row(lines[i]))
+                i += 1
+            blocks.append(('table', rows))
+            continue
+
+        if first in _LIST_CHARS:
+            item = _BULLET_RE.match(raw) or _ORDERED_RE.match(raw)
+            if item:
+                flush_paragraph()
+                indent = _indent_width(item.group(1))
+                while list_indents and indent < list_indents[-1]:
+                    list_indents.pop()
+                if not list_indents or indent > list_indents[-1]:
+                    list_indents.append(indent)
+                depth = len(list_indents) - 1
+                if item.re is _BULLET_RE:
+                    blocks.append(('bullet', depth, item.group(2)))
+                else:
+                    blocks.append(('ordered', depth, item.group(2), item.group(3)))
+                continue
+
+        if first == '>':
+            flush_paragraph()
+            blocks.append(('quote', _QUOTE_RE.match(line).group(1)))
+            continue
+
+        # Indented text straight after a list item continues that item
+        if list_indents and raw[:1].isspace() and not paragraph and blocks and blocks[-1][0] in ('bullet', 'ordered'):
+            blocks[-1] = blocks[-1][:-1] + (blocks[-1][-1] + ' ' + line,)
+            continue
+
+        list_indents.clear()
+        paragraph.append(line)
+
+    flush_paragraph()
+    return blocks
+
+
+def _table(rows):
+    width = max(len(row) for row in rows)
+    data = []
+    for index, row in enumerate(rows):
+        cell_style = table_header_style if index == 0 else table_cell_style
+        cells = row + [''] * (width - len(row))
+        data.append([Paragraph(clean_text(cell), cell_style) for cell in cells])
+    return Table(data, colWidths=[FRAME_WIDTH / width] * width, style=table_style,
+                 repeatRows=1, hAlign='LEFT', spaceBefore=6, spaceAfter=6)
+
+
+def compile_markdown(markdown_content):
+    """Markdown text -> list of ReportLab flowables"""
+    story = []
+    for block in parse_markdown(markdown_content):
+        kind = block[0]
+        if kind == 'blank':
+            story.append(Spacer(1, 6))
+        elif kind == 'rule':
+            story.append(Spacer(1, 12))
+        elif kind == 'heading':
+            style = heading_styles.get(block[1], subheading_style)
+            story.append(Paragraph(clean_text(block[2]), style))
+        elif kind == 'paragraph':
+            story.append(Paragraph(clean_text(block[1]), styles['Normal']))
+        elif kind == 'bullet':
+            story.append(Paragraph(clean_text(block[2]), list_style(block[1]), bulletText='•'))
+        elif kind == 'ordered':
+            story.append(Paragraph(clean_text(block[3]), list_style(block[1]), bulletText=f'{block[2]}.'))
+        elif kind == 'quote':
+            story.append(Paragraph(f'<i>{clean_text(block[1])}</i>', quote_style))
+        elif kind == 'code':
+            story.append(Preformatted(block[1], code_style, maxLineLength=CODE_LINE_LENGTH))
+        elif kind == 'table':
+            story.append(_table(block[1]))
+    return story
+
+
+def _build(story):
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4,
+                          rightMargin=PAGE_MARGIN, leftMargin=PAGE_MARGIN,
+                          topMargin=PAGE_MARGIN, bottomMargin=PAGE_MARGIN)
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+
+def create_pdf(markdown_content, filename="cheatsheet.pdf"):
+    """Convert markdown content to PDF with proper formatting"""
+    with admission.CPU.admit(), metrics.instrumented("pdf_render"):
+        return _build(compile_markdown(markdown_content))
+
+
+_pdf_cache = OrderedDict()
+_pdf_cache_lock = threading.Lock()
+
+
+def get_pdf_bytes(markdown_content):
+    """Rendered PDF bytes for `markdown_content`, memoised by content hash."""
+    key = hashlib.sha256(markdown_content.encode("utf-8")).hexdigest()
+    with _pdf_cache_lock:
+        if key in _pdf_cache:
+            _pdf_cache.move_to_end(key)
+            return _pdf_cache[key]
+
+    pdf_bytes = create_pdf(markdown_content).getvalue()
+    _remember(key, pdf_bytes)
+    return pdf_bytes
+
+
+def _remember(key, pdf_bytes):
+    with _pdf_cache_lock:
+        _pdf_cache[key] = pdf_bytes
+        while len(_pdf_cache) > config.PDF_CACHE_MAX_ENTRIES:
+            _pdf_cache.popitem(last=False)
+
+
+class PdfSections:
+    """Compile a document's markdown parts as they arrive, then lay them out in order.
+
+    Parsing markdown into ReportLab paragraphs is most of the render cost, so
+    doing it per section while other sections are still being generated
+    leaves only layout for the end. finish() memoises the bytes under the
+    assembled markdown, so get_pdf_bytes() for it is instant.
+    """
+
+    def __init__(self):
+        self._stories = {}
+
+    def add(self, index, markdown_part):
+        self._stories[index] = compile_markdown(markdown_part)
+
+    def finish(self, markdown_content):
+        """Build the PDF from the parts added so far and return its bytes."""
+        story = []
+        for index in sorted(self._stories):
+            if story:
+                # Parts are joined by a blank line in the assembled markdown
+                story.append(Spacer(1, 6))
+            story.extend(self._stories[index])
+        with admission.CPU.admit(), metrics.instrumented("pdf_render"):
+            pdf_bytes = _build(story).getvalue()
+        _remember(hashlib.sha256(markdown_content.encode("utf-8")).hexdigest(), pdf_bytes)
+        return pdf_bytes
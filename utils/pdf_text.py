@@ -0,0 +1,131 @@
+"""Bounded, cached text extraction for uploaded resume PDFs.
+
+Pages are read one at a time and extraction stops at a page and character
+budget, so an oversized upload can't tie up a worker. Extraction runs in a
+small set of worker processes with a timeout; a worker still parsing when
+its timeout expires is killed and replaced, so a PDF that hangs PyPDF2
+can't hold on to a worker (or a CPU admission slot) after the page has
+reported the failure. Results are cached in memory by the SHA-256 of the file,
+so reviewing the same upload for another role skips parsing; uploads are
+never written to disk.
+"""
+import hashlib
+import importlib
+import multiprocessing
+import threading
+from collections import OrderedDict, namedtuple
+from io import BytesIO
+
+from utils import admission, config, metrics
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+class ExtractedPdf(namedtuple("ExtractedPdf", ["pages", "truncated"])):
+    """Text of each page read, and whether the budget cut the document short."""
+
+    @property
+    def text(self):
+        return "\n".join(self.pages)
+
+
+_workers = threading.BoundedSemaphore(config.PDF_EXTRACT_WORKERS)
+_idle = []
+_idle_lock = threading.Lock()
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _iter_pages(reader, max_pages, max_chars):
+    remaining = max_chars
+    for index, page in enumerate(reader.pages):
+        if index >= max_pages or remaining <= 0:
+            return
+        text = (page.extract_text() or "")[:remaining]
+        remaining -= len(text)
+        yield text
+
+
+def iter_page_text(data, max_pages=None, max_chars=None):
+    """Yield the text of each page of the PDF in `data`, within the budget."""
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(BytesIO(data))
+    yield from _iter_pages(
+        reader,
+        config.PDF_MAX_PAGES if max_pages is None else max_pages,
+        config.PDF_MAX_CHARS if max_chars is None else max_chars,
+    )
+
+
+def extract_pages(data):
+    """ExtractedPdf for the PDF bytes in `data`, parsed in this process.
+
+    No timeout, cache or admission; this is what worker processes run.
+    """
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(BytesIO(data))
+    pages = list(_iter_pages(reader, config.PDF_MAX_PAGES, config.PDF_MAX_CHARS))
+    truncated = len(pages) < len(reader.pages) or sum(len(text) for text in pages) >= config.PDF_MAX_CHARS
+    return ExtractedPdf(pages, truncated)
+
+
+def _start_worker():
+    """A one-process pool that has finished importing this module.
+
+    Spawning and importing take about a second, which would otherwise count
+    against the extraction timeout.
+    """
+    pool = multiprocessing.get_context("spawn").Pool(1, initializer=importlib.import_module, initargs=(__name__,))
+    pool.apply(abs, (0,))
+    return pool
+
+
+def _run_in_worker(data, timeout):
+    with _workers:
+        with _idle_lock:
+            worker = _idle.pop() if _idle else None
+        if worker is None:
+            worker = _start_worker()
+        result = worker.apply_async(extract_pages, (data,))
+        try:
+            return result.get(timeout)
+        except multiprocessing.TimeoutError:
+            metrics.increment("pdf_extract_killed")
+            raise ExtractionTimeout("PDF text extraction timed out")
+        finally:
+            if result.ready():
+                # Parsing errors leave the worker usable too
+                with _idle_lock:
+                    _idle.append(worker)
+            else:
+                # The parse can't be interrupted, so the process goes with it
+                worker.terminate()
+
+
+def extract_pdf_text(data, timeout=None):
+    """Extract the text of the PDF bytes in `data` in a worker process.
+
+    Raises ExtractionTimeout if it takes longer than `timeout` seconds once
+    admitted by the CPU gate (admission.Overloaded if it never is), and
+    re-raises PDF parsing errors.
+    """
+    key = hashlib.sha256(data).hexdigest()
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            metrics.increment("cache_hits", labels={"cache": "pdf_text"})
+            return _cache[key]
+    metrics.increment("cache_misses", labels={"cache": "pdf_text"})
+
+    with admission.CPU.admit(), metrics.instrumented("pdf_extract"):
+        extracted = _run_in_worker(data, config.PDF_EXTRACT_TIMEOUT if timeout is None else timeout)
+
+    with _cache_lock:
+        _cache[key] = extracted
+        while len(_cache) > config.PDF_TEXT_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return extracted
@@ -0,0 +1,118 @@
+"""Prompt building and response parsing for LinkedIn posts."""
+import json
+import re
+
+from utils import metrics
+
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*([\s\S]*?)\s*```")
+_ANY_FENCE_RE = re.compile(r"```(?:\w+)?\s*([\s\S]*?)\s*```")
+_PERSON_MASK_RE = re.compile(r"\[\s*person\s*\]", re.IGNORECASE)
+
+POST_FIELDS = ["topic", "post_type", "tone", "audience"]
+
+POST_FIELD_DEFAULTS = {
+    "post_type": "post",
+    "tone": "professional",
+    "audience": "professionals on LinkedIn",
+}
+
+
+def strip_json_fence(text):
+    return _JSON_FENCE_RE.sub(r"\1", text).strip()
+
+
+def normalize_post_fields(fields_dict):
+    """Build the topic/post_type/tone/audience dict locally, without the LLM.
+
+    Whitespace is collapsed, empty optional fields get defaults and masked
+    names are kept as [PERSON].
+    """
+    normalized = {}
+    for key in POST_FIELDS:
+        value = " ".join((fields_dict.get(key) or "").split())
+        value = _PERSON_MASK_RE.sub("[PERSON]", value)
+        if key != "topic":
+            value = value.rstrip(" .")
+        normalized[key] = value or POST_FIELD_DEFAULTS.get(key, "")
+    return normalized
+
+
+def build_extraction_prompt(fields_dict):
+    user_combined = (
+        f"Topic: {fields_dict['topic']}. "
+        f"Post type: {fields_dict['post_type']}. "
+        f"Tone: {fields_dict['tone']}. "
+        f"Audience: {fields_dict['audience']}."
+    )
+    return (
+        f"You are an expert in extracting all relevant information from any text, if the user has provided any"
+        "[PERSON] names, that is the masked name, keep it as is. "
+        f"Extract structured information from the following user input:\n"
+        f"{user_combined}\n\n"
+        f"Return a JSON object with the following keys:\n"
+        f"- topic: The main topic of the post, include all the details the user wants in the post\n"
+        f"- post_type: The type of post (e.g. announcement, story, tip)\n"
+        f"- tone: The desired tone of the post (e.g. excited, humble)\n"
+        f"- audience: The target audience for the post (e.g. recruiters, students)\n"
+        f"Ensure the output is a valid JSON object with no additional text."
+    )
+
+
+def parse_structured_fields(response_text):
+    """Parse the extraction reply into a fields dict, or None if it's invalid."""
+    extracted_response = strip_json_fence(response_text)
+    try:
+        structured = json.loads(extracted_response)
+        if isinstance(structured, dict) and all(key in structured for key in POST_FIELDS):
+            return structured
+        else:
+            print("Invalid structured output:", structured)
+            metrics.increment("post_fields_parse_failures", labels={"reason": "missing_keys"})
+            return None
+    except json.JSONDecodeError:
+        print("JSON decoding error:", extracted_response)
+        metrics.increment("post_fields_parse_failures", labels={"reason": "invalid_json"})
+        return None
+
+
+def clean_single_post(response_text):
+    text = _ANY_FENCE_RE.sub(r"\1", response_text).strip()
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        text = text[1:-1].strip()
+    return text.replace("\\n", "\n")
+
+
+def parse_multiple_posts(response_text):
+    response_text = strip_json_fence(response_text)
+    if not response_text:
+        return []
+    try:
+        # Expecting JSON array: ["post 1 text", "post 2 text", "post 3 text"]
+        posts = json.loads(response_text)
+        if isinstance(posts, list):
+            return posts
+        return [response_text]
+    except json.JSONDecodeError:
+        # If not JSON, fallback to single post
+        return [response_text]
+
+
+def build_refine_messages(generation_prompt, post, instruction=""):
+    """Chat messages asking the model to refine `post`."""
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    system_prompt = f"""
+    You are a helpful assistant that helps refines LinkedIn posts created by AI.
+    This was the prompt used to generate the post:
+    Topic: {generation_prompt}
+    Use this prompt to refine the post.
+    Your task is to improve the post while keeping the original intent and content.
+    If the user has provided any [PERSON] names, keep them as is.
+    Return only the posts using \\n for new lines. Do not include any text other than the actual post and it should be clearly formatted for LinkedIn."
+    """
+    if instruction:
+        system_prompt += f"\nUser wants to refine the post with the following instruction: {instruction}\n"
+    return [
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=f"Here's the post to refine:\n{post}")
+    ]
@@ -0,0 +1,138 @@
+"""Process-wide rate limiting and 429 retries for LLM calls.
+
+Every model call goes through one token bucket per process, which smooths
+bursts into a steady request rate (CAREERECHO_LLM_RATE_LIMIT_RPS=0 turns it
+off). Calls rejected with a rate-limit error
+(HTTP 429 / RESOURCE_EXHAUSTED) are retried with exponential backoff and
+full jitter. The retry delay hint returned by the API is honoured when it
+is longer than the backoff.
+"""
+import random
+import re
+import threading
+import time
+
+from utils import config, metrics
+from utils.errors import exception_chain
+
+_RATE_LIMIT_NAMES = {"ResourceExhausted", "TooManyRequests", "RateLimitError"}
+_RETRY_HINT_RES = [
+    re.compile(r"retry in ([\d.]+)\s*s", re.IGNORECASE),
+    re.compile(r"retry_?delay['\"]?\s*[:=]\s*['\"]?([\d.]+)s", re.IGNORECASE),
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE),
+]
+
+
+class RateLimitExceeded(Exception):
+    """The API kept rejecting a call with 429s after every retry."""
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        if rate <= 0:
+            raise ValueError("the token bucket rate must be positive")
+        self.rate = rate
+        # A bucket that can't hold a whole token would never let a call through
+        self.capacity = max(1, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+_bucket = TokenBucket(config.LLM_RATE_LIMIT_RPS, config.LLM_RATE_LIMIT_BURST) if config.LLM_RATE_LIMIT_RPS > 0 else None
+
+
+def is_rate_limit_error(exc):
+    """True if `exc` (or anything it wraps) is a quota / 429 rejection."""
+    for error in exception_chain(exc):
+        if any(cls.__name__ in _RATE_LIMIT_NAMES for cls in type(error).__mro__):
+            return True
+        if 429 in (getattr(error, "code", None), getattr(error, "status_code", None)):
+            return True
+        if "429" in str(error) or "RESOURCE_EXHAUSTED" in str(error):
+            return True
+    return False
+
+
+def retry_hint(exc):
+    """Seconds the API asked us to wait before retrying, if it said."""
+    for error in exception_chain(exc):
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        try:
+            if headers.get("retry-after"):
+                return float(headers["retry-after"])
+        except (TypeError, ValueError):
+            pass
+        message = str(error)
+        for pattern in _RETRY_HINT_RES:
+            match = pattern.search(message)
+            if match:
+                return float(match.group(1))
+    return None
+
+
+def backoff_delay(attempt, exc=None):
+    """Full-jitter exponential backoff, never shorter than the API's hint."""
+    ceiling = min(config.LLM_BACKOFF_MAX, config.LLM_BACKOFF_BASE * 2 ** attempt)
+    delay = random.uniform(0, ceiling)
+    hint = retry_hint(exc) if exc is not None else None
+    if hint is not None:
+        delay = max(delay, min(hint, config.LLM_BACKOFF_MAX))
+    return delay
+
+
+def acquire():
+    """Wait for this process's turn to call the model."""
+    if _bucket is not None and _bucket.acquire() > 0:
+        metrics.increment("llm_throttled")
+
+
+def call_with_retry(fn, retryable=is_rate_limit_error):
+    """Call `fn()` under the rate limiter, retrying rate-limit errors.
+
+    Raises RateLimitExceeded once the retry budget is spent; other errors
+    propagate unchanged.
+    """
+    attempts = config.LLM_RETRY_ATTEMPTS + 1
+    for attempt in range(attempts):
+        acquire()
+        try:
+            return fn()
+        except Exception as e:
+            if not retryable(e):
+                metrics.increment("llm_failed")
+                raise
+            if attempt == attempts - 1:
+                metrics.increment("llm_failed")
+                if is_rate_limit_error(e):
+                    raise RateLimitExceeded(str(e)) from e
+                raise
+            delay = backoff_delay(attempt, e)
+            print(f"LLM call failed ({e}), retrying in {delay:.1f}s")
+            metrics.increment("llm_retried")
+            time.sleep(delay)
+
+
+def rate_limit_stats():
+    counters = metrics.snapshot()
+    return {
+        "throttled": counters.get("llm_throttled", 0),
+        "retried": counters.get("llm_retried", 0),
+        "failed": counters.get("llm_failed", 0),
+    }
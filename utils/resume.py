@@ -0,0 +1,335 @@
+"""Prompts and local text handling for resume reviews."""
+import math
+import re
+import unicodedata
+from collections import OrderedDict, namedtuple
+
+from utils import config, metrics
+
+# Sections the review focuses on, in the order feedback is shown
+REVIEW_SECTIONS = ["Education", "Experience", "Skills", "Projects"]
+
+_SECTION_ALIASES = {
+    "Education": ["education", "academic background", "academics", "education and training", "qualifications"],
+    "Experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "internships", "internship experience",
+                   "relevant experience", "research experience"],
+    "Skills": ["skills", "technical skills", "core skills", "key skills", "skills and tools",
+               "technologies", "tools and technologies", "competencies", "core competencies"],
+    "Projects": ["projects", "personal projects", "academic projects", "key projects",
+                 "selected projects", "project experience", "side projects"],
+}
+# Headers that end a review section without starting one
+_OTHER_HEADERS = ["summary", "professional summary", "objective", "career objective", "profile",
+                  "about me", "certifications", "certificates", "licenses and certifications",
+                  "awards", "honors", "honors and awards", "achievements", "publications",
+                  "languages", "interests", "hobbies", "volunteer", "volunteering",
+                  "volunteer experience", "activities", "extracurricular activities",
+                  "leadership", "references", "contact", "courses", "coursework"]
+_HEADER_LOOKUP = {alias: name for name, aliases in _SECTION_ALIASES.items() for alias in aliases}
+_HEADER_LOOKUP.update((header, None) for header in _OTHER_HEADERS)
+_NOT_A_HEADER = object()
+_HEADER_CLEAN_RE = re.compile(r"[^a-z& ]+")
+
+# When a resume is over its token budget, sections are kept in this order
+# (then the text before the first header, then everything else)
+TRIM_PRIORITY = ["Experience", "Skills", "Projects", "Education"]
+_PREAMBLE = "Header"
+# Every section keeps its header and at least this many lines, budget permitting
+_SECTION_MIN_LINES = 3
+_LOW_PRIORITY_HEADERS = {"interests", "hobbies", "references", "languages", "activities",
+                         "extracurricular activities", "volunteer", "volunteering"}
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SPACE_RE = re.compile(r"[ \t\u00a0\u2000-\u200b\u202f\u205f\u3000]+")
+_HYPHEN_BREAK_RE = re.compile(r"(\w+)-\n[ \t]*([a-z]\w*)")
+_WORD_RE = re.compile(r"\w+")
+_PAGE_NUMBER_RE = re.compile(r"^(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$", re.IGNORECASE)
+_MAX_REPEATED_LINE = 120
+# Running headers and footers are looked for in this many lines at each end of a page
+_EDGE_LINES = 3
+
+CompactedResume = namedtuple("CompactedResume", ["text", "tokens_before", "tokens_after", "trimmed"])
+
+# The gate only needs enough text to tell what the document is
+GATE_SAMPLE_CHARS = 4000
+GATE_OK = "OK"
+
+
+def _section_for_header(line):
+    """Section name for a header line, None for other headers, or _NOT_A_HEADER"""
+    if len(line) > 40:
+        return _NOT_A_HEADER
+    key = " ".join(_HEADER_CLEAN_RE.sub(" ", line.lower().replace("&", " and ")).split())
+    return _HEADER_LOOKUP.get(key, _NOT_A_HEADER)
+
+
+def split_sections(text):
+    """Split resume text into review sections using header lines.
+
+    Returns an OrderedDict of section name -> text for the REVIEW_SECTIONS
+    that were found. Text before the first header and under other headers
+    (summary, certifications, ...) is left out.
+    """
+    sections = OrderedDict()
+    current = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        name = _section_for_header(stripped)
+        if name is not _NOT_A_HEADER:
+            current = name
+            if current:
+                sections.setdefault(current, [])
+            continue
+        if current:
+            sections[current].append(stripped)
+    return OrderedDict(
+        (name, "\n".join(sections[name])) for name in REVIEW_SECTIONS
+        if sections.get(name)
+    )
+
+
+def build_gate_prompt(role, text):
+    """Cheap first call: is this a resume, and does it match the role?"""
+    return (
+        f"You are screening a document for a resume review for the position of '{role}'.\n"
+        "First, determine if the provided content is a resume. If not, reply: \"This PDF does not appear to be a resume.\" and briefly explain why.\n"
+        f"Next, check if the role '{role}' matches the resume content. If not, reply: \"The role '{role}' does not seem to match the content of the resume. Please check the role and try again.\"\n"
+        f"If it is a resume and the role matches, reply with exactly: {GATE_OK}\n"
+        "Here is the beginning of the document:\n"
+        "<resume>\n"
+        f"{text[:GATE_SAMPLE_CHARS]}\n"
+        "</resume>"
+    )
+
+
+def gate_passed(reply):
+    return reply.strip().strip(".").upper() == GATE_OK
+
+
+def build_section_prompt(role, section, section_text):
+    """Review one section of a resume against the target role."""
+    return (
+        f"You are an expert resume reviewer and interviewer for the position of '{role}'.\n"
+        f"Review only the {section} section of a resume below and provide concise, actionable suggestions to improve it for the '{role}' role. "
+        "Only use information from the resume; do not fabricate details.\n"
+        "Add suggestions to include important keywords relevant to the role.\n"
+        "Add suggestions to remove buzzwords and make it more impactful.\n"
+        f"Here is the {section} section:\n"
+        "<resume>\n"
+        f"{section_text}\n"
+        "</resume>\n"
+        "Return only the suggestions as a markdown bullet list. Do not include a heading or any other text."
+    )
+
+
+def build_review_prompt(role, text):
+    """Single-call review of the whole resume, including the gate checks."""
+    return (
+        f"You are an expert resume reviewer and interviewer for the position of '{role}'.\n"
+        "First, determine if the provided content is a resume. If not, reply: \"This PDF does not appear to be a resume.\" and briefly explain why.\n"
+        f"Next, check if the role '{role}' matches the resume content. If not, reply: \"The role '{role}' does not seem to match the content of the resume. Please check the role and try again.\"\n"
+        "If it is a resume and the role matches, provide concise, actionable suggestions to improve the resume for the '{role}' role. Only use information from the resume; do not fabricate details.\n"
+        "Add suggestions to include important keywords relevant to the role.\n"
+        "Add suggestions to remove buzzwords and make it more impactful.\n"
+        "Focus your feedback on:\n"
+        "- Education\n"
+        "- Experience\n"
+        "- Skills\n"
+        "- Projects\n"
+        "Here is the resume content:\n"
+        "<resume>\n"
+        f"{text}\n"
+        "</resume>\n"
+        "Return only the suggestions, using \\n for new lines. Do not include any text other than the suggestions or the message about the PDF not being a resume."
+    )
+
+
+def merge_section_feedback(feedback, trimmed=()):
+    """Combine per-section feedback into one markdown review, in section order.
+
+    Sections named in `trimmed` (see trim_to_budget) that have no feedback
+    were cut for length rather than missing from the resume.
+    """
+    parts = []
+    for name in REVIEW_SECTIONS:
+        if name in feedback:
+            parts.append(f"**{name}**\n\n{feedback[name].strip()}")
+        elif name in trimmed:
+            parts.append(f"**{name}**\n\nYour {name} section was left out of this review because the resume is too long to review in full.")
+        else:
+            parts.append(f"**{name}**\n\nNo {name} section was found in your resume. Consider adding one if it is relevant to the role.")
+    return "\n\n".join(parts)
+
+
+def estimate_tokens(text):
+    """Rough LLM token count: a token per ~4 characters of a word, one per symbol."""
+    return sum((len(piece) + 3) // 4 if piece[0].isalnum() or piece[0] == "_" else 1
+               for piece in _TOKEN_RE.findall(text))
+
+
+def _vocabulary(pages):
+    """Lower-case words of the document, to tell hyphenation from hyphenated words"""
+    return {word.lower() for page in pages for word in _WORD_RE.findall(unicodedata.normalize("NFKC", page))}
+
+
+def normalize_page(text, vocabulary=()):
+    """Clean one page of extracted text: unicode, hyphenation and whitespace.
+
+    A word split by a hyphen at a line break is joined up when the whole
+    word is in `vocabulary` (e.g. "experi-/ence"); otherwise the hyphen is
+    kept ("Python-/based" becomes "Python-based").
+    """
+    text = unicodedata.normalize("NFKC", text).replace("\u00ad", "")
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = _HYPHEN_BREAK_RE.sub(
+        lambda m: m[1] + m[2] if (m[1] + m[2]).lower() in vocabulary else f"{m[1]}-{m[2]}", text
+    )
+    lines = [_SPACE_RE.sub(" ", line).strip() for line in text.split("\n")]
+    cleaned = []
+    for line in lines:
+        if line or (cleaned and cleaned[-1]):
+            cleaned.append(line)
+    return "\n".join(cleaned).strip()
+
+
+def _drop_page_numbers(lines):
+    """`lines` without page numbers ("3", "Page 2 of 3") in the first or last few lines"""
+    filled = [index for index, line in enumerate(lines) if line]
+    edges = set(filled[:_EDGE_LINES] + filled[-_EDGE_LINES:])
+    return [line for index, line in enumerate(lines) if index not in edges or not _PAGE_NUMBER_RE.match(line)]
+
+
+def _edge_lines(lines):
+    """(line, slot) for the lines near the top and bottom of a page.
+
+    The slot is the line's offset from the top (0, 1, ...) or the bottom
+    (-1, -2, ...); running headers and footers sit in the same slot on
+    every page.
+    """
+    lines = [line for line in lines if line]
+    top = min(_EDGE_LINES, len(lines))
+    bottom = min(_EDGE_LINES, len(lines) - top)
+    edges = {(line, slot) for slot, line in enumerate(lines[:top])}
+    edges.update((lines[-slot], -slot) for slot in range(1, bottom + 1))
+    return edges
+
+
+def remove_repeated_lines(pages):
+    """Drop page numbers at the top or bottom of pages, and keep only the first copy of running headers and footers.
+
+    Running headers and footers (a name and email on every page, "Page 2 of
+    3") come out of the extractor once per page. Only a line repeated word
+    for word in the same place near the top or bottom of most pages counts,
+    so dates, job titles and bullets in the body are never touched.
+    """
+    pages = [_drop_page_numbers(page.split("\n")) for page in pages]
+    repeated = set()
+    if len(pages) >= 2:
+        slot_counts = {}
+        for lines in pages:
+            for line, slot in _edge_lines(lines):
+                if len(line) <= _MAX_REPEATED_LINE:
+                    slot_counts[line, slot] = slot_counts.get((line, slot), 0) + 1
+        repeated = {edge for edge, count in slot_counts.items() if count >= max(2, math.ceil(len(pages) / 2))}
+    seen = set()
+    result = []
+    for lines in pages:
+        running = {line for line, slot in _edge_lines(lines) & repeated}
+        kept = []
+        for line in lines:
+            if line in running:
+                if line in seen:
+                    continue
+                seen.add(line)
+            kept.append(line)
+        result.append("\n".join(kept))
+    return result
+
+
+def _blocks(text):
+    """(name, lines) for the text before the first header and for each section, in order"""
+    blocks = [[_PREAMBLE, []]]
+    for line in text.splitlines():
+        name = _section_for_header(line.strip()) if line.strip() else _NOT_A_HEADER
+        if name is not _NOT_A_HEADER:
+            blocks.append([name or line.strip(), [line]])
+        else:
+            blocks[-1][1].append(line)
+    return [(name, lines) for name, lines in blocks if any(line.strip() for line in lines)]
+
+
+def _trim_rank(name):
+    if name in TRIM_PRIORITY:
+        return TRIM_PRIORITY.index(name)
+    if name == _PREAMBLE:
+        return len(TRIM_PRIORITY)
+    low = " ".join(_HEADER_CLEAN_RE.sub(" ", name.lower()).split()) in _LOW_PRIORITY_HEADERS
+    return len(TRIM_PRIORITY) + (2 if low else 1)
+
+
+def _take_lines(lines, start, stop, remaining):
+    """Lines of lines[start:stop] that fit in `remaining` tokens, stopping at the first that doesn't"""
+    taken = []
+    for line in lines[start:stop]:
+        cost = estimate_tokens(line) + 1
+        if cost > remaining:
+            break
+        taken.append(line)
+        remaining -= cost
+    return taken, remaining
+
+
+def trim_to_budget(text, budget):
+    """Cut `text` to about `budget` tokens, keeping something of every section.
+
+    First each section gets its header and first few lines
+    (_SECTION_MIN_LINES), in TRIM_PRIORITY order while they fit; then the
+    rest of the budget extends them in the same order, each cut at a line
+    boundary. Sections stay in their original order. Returns (text, names of
+    the sections that were cut or dropped).
+    """
+    blocks = _blocks(text)
+    order = sorted(range(len(blocks)), key=lambda i: (_trim_rank(blocks[i][0]), i))
+    remaining = budget
+    kept = {}
+    for position in order:
+        lines = blocks[position][1]
+        taken, remaining = _take_lines(lines, 0, _SECTION_MIN_LINES + 1, remaining)
+        kept[position] = taken
+    for position in order:
+        lines = blocks[position][1]
+        if len(kept[position]) >= min(len(lines), _SECTION_MIN_LINES + 1):
+            taken, remaining = _take_lines(lines, len(kept[position]), len(lines), remaining)
+            kept[position] += taken
+    trimmed = []
+    for position in order:
+        name, lines = blocks[position]
+        if len(kept[position]) < len(lines):
+            trimmed.append(name)
+        # A section header on its own is of no use to the reviewer
+        if len(kept[position]) < 2 and name != _PREAMBLE:
+            kept[position] = []
+    text = "\n".join("\n".join(kept[position]) for position in sorted(kept) if kept[position])
+    return text, trimmed
+
+
+def compact_resume(pages, budget=None):
+    """Resume text ready for the prompt, with token counts before and after.
+
+    Normalises each page, removes repeated headers/footers and page numbers,
+    then trims to `budget` tokens (config.RESUME_TOKEN_BUDGET by default).
+    """
+    budget = config.RESUME_TOKEN_BUDGET if budget is None else budget
+    raw = "\n".join(pages)
+    vocabulary = _vocabulary(pages)
+    text = "\n\n".join(page for page in remove_repeated_lines([normalize_page(page, vocabulary) for page in pages]) if page)
+    trimmed = []
+    if budget and estimate_tokens(text) > budget:
+        text, trimmed = trim_to_budget(text, budget)
+    compacted = CompactedResume(text, estimate_tokens(raw), estimate_tokens(text), trimmed)
+    metrics.increment("resume_prompt_tokens", compacted.tokens_before, labels={"stage": "raw"})
+    metrics.increment("resume_prompt_tokens", compacted.tokens_after, labels={"stage": "compacted"})
+    return compacted
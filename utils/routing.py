@@ -0,0 +1,84 @@
+"""Model tiers, and which tier each LLM call site uses.
+
+Every call names its call site (`feature`). model_routing.toml maps features
+to tiers, each with its own model and timeout, and gives each tier a
+fallback to use when it answers with a 429 or times out. The file is read
+once per process; CAREERECHO_MODEL_ROUTING points at a different one.
+"""
+import threading
+import tomllib
+from collections import namedtuple
+
+from utils import config
+
+Tier = namedtuple("Tier", ["name", "model", "timeout", "fallback", "fake_latency", "fake_error_rate"])
+Routing = namedtuple("Routing", ["tiers", "features", "default"])
+
+_lock = threading.Lock()
+_routing = None
+
+
+def load_routing(path):
+    """Read and check a routing file. Raises ValueError if it is inconsistent."""
+    with open(path, "rb") as f:
+        data = tomllib.load(f)
+    tiers = {}
+    for name, options in data.get("tiers", {}).items():
+        if "model" not in options:
+            raise ValueError(f"{path}: tier '{name}' has no model")
+        tiers[name] = Tier(
+            name=name,
+            model=options["model"],
+            timeout=float(options.get("timeout", config.LLM_TIMEOUT)),
+            fallback=options.get("fallback"),
+            fake_latency=options.get("fake_latency"),
+            fake_error_rate=options.get("fake_error_rate"),
+        )
+    if not tiers:
+        raise ValueError(f"{path}: no [tiers.<name>] tables")
+    features = dict(data.get("features", {}))
+    default = features.pop("default", next(iter(tiers)))
+    references = [("features.default", default)]
+    references += [(f"features.{feature}", tier) for feature, tier in features.items()]
+    references += [(f"tiers.{tier.name}.fallback", tier.fallback) for tier in tiers.values() if tier.fallback]
+    for where, tier in references:
+        if tier not in tiers:
+            raise ValueError(f"{path}: {where} names unknown tier '{tier}'")
+    return Routing(tiers, features, default)
+
+
+def get_routing():
+    """The process-wide routing, read from config.MODEL_ROUTING_FILE on first use."""
+    global _routing
+    routing = _routing
+    if routing is None:
+        with _lock:
+            if _routing is None:
+                _routing = load_routing(config.MODEL_ROUTING_FILE)
+            routing = _routing
+    return routing
+
+
+def set_routing(routing):
+    """Replace the process-wide routing, e.g. for a load test."""
+    global _routing
+    with _lock:
+        _routing = routing
+
+
+def tier_for(feature):
+    routing = get_routing()
+    return routing.tiers[routing.features.get(feature, routing.default)]
+
+
+def model_for(feature):
+    return tier_for(feature).model
+
+
+def fallback_chain(feature):
+    """The feature's tier followed by its fallbacks, each tier at most once."""
+    routing = get_routing()
+    chain = [tier_for(feature)]
+    while chain[-1].fallback and chain[-1].fallback not in {tier.name for tier in chain}:
+        chain.append(routing.tiers[chain[-1].fallback])
+    return chain
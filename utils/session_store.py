@@ -0,0 +1,232 @@
+"""Disk-backed storage for large per-session artifacts.
+
+Generated cheatsheets, posts and reports are written to a SQLite file under
+`config.CACHE_DIR`, and st.session_state only holds a small ArtifactHandle
+for each. Artifacts that nobody has read for SESSION_ARTIFACT_TTL seconds
+are evicted, as are the least recently used ones once the store grows past
+SESSION_ARTIFACT_MAX_BYTES. A session that comes back to an evicted
+artifact gets the default, as if it had never been generated.
+
+The helpers take the session state mapping as an argument so they can be
+used outside Streamlit as well.
+"""
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from utils import config, metrics
+
+ArtifactHandle = namedtuple("ArtifactHandle", ["id", "size"])
+
+# Reads only refresh an artifact's access time this often, to spare writes
+_TOUCH_INTERVAL = 60
+_SESSION_ID_KEY = "_session_store_id"
+
+_store = None
+_store_lock = threading.Lock()
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class ArtifactStore:
+    def __init__(self, path, max_bytes, ttl_seconds):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            " id TEXT PRIMARY KEY,"
+            " session TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS artifacts_accessed ON artifacts (accessed_at)")
+        self._conn.commit()
+
+    def put(self, artifact_id, session, value):
+        """Store a JSON-serialisable value and return its size in bytes."""
+        encoded = json.dumps(value, ensure_ascii=False)
+        size = len(encoded.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artifacts (id, session, value, size, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (artifact_id, session, encoded, size, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+        return size
+
+    def get(self, artifact_id):
+        """Return the stored value, or None if it was evicted."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, accessed_at FROM artifacts WHERE id = ?", (artifact_id,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM artifacts WHERE id = ?", (artifact_id,))
+                self._conn.commit()
+                row = None
+            if row is not None and now - row[1] > _TOUCH_INTERVAL:
+                self._conn.execute("UPDATE artifacts SET accessed_at = ? WHERE id = ?", (now, artifact_id))
+                self._conn.commit()
+        if row is None:
+            metrics.increment("session_artifact_misses")
+            return None
+        return json.loads(row[0])
+
+    def delete(self, artifact_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM artifacts WHERE id = ?", (artifact_id,))
+            self._conn.commit()
+
+    def _evict(self, now):
+        evicted = 0
+        if self.ttl_seconds:
+            evicted += self._conn.execute(
+                "DELETE FROM artifacts WHERE accessed_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+        if self.max_bytes:
+            # Drop least recently used artifacts until the rest fit in the budget
+            evicted += self._conn.execute(
+                "DELETE FROM artifacts WHERE id IN ("
+                " SELECT id FROM (SELECT id, SUM(size) OVER (ORDER BY accessed_at DESC, id) AS total"
+                "  FROM artifacts) WHERE total > ?)",
+                (self.max_bytes,),
+            ).rowcount
+        if evicted:
+            metrics.increment("session_artifacts_evicted", evicted)
+
+    def stats(self):
+        """Number of stored artifacts, their total size and how many sessions own them."""
+        with self._lock:
+            count, size, sessions = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COUNT(DISTINCT session) FROM artifacts"
+            ).fetchone()
+        return {
+            "artifacts": count,
+            "bytes": size,
+            "sessions": sessions,
+            "evicted": metrics.get_counter("session_artifacts_evicted"),
+            "misses": metrics.get_counter("session_artifact_misses"),
+        }
+
+
+def get_store():
+    """Return the process-wide artifact store, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            path = os.path.join(config.CACHE_DIR, "session_artifacts.sqlite3")
+            _store = ArtifactStore(path, config.SESSION_ARTIFACT_MAX_BYTES, config.SESSION_ARTIFACT_TTL)
+        return _store
+
+
+def _session_id(state):
+    if _SESSION_ID_KEY not in state:
+        state[_SESSION_ID_KEY] = uuid.uuid4().hex
+    return state[_SESSION_ID_KEY]
+
+
+def put(state, key, value):
+    """Store `value` on disk and keep only its handle in state[key]."""
+    current = state.get(key)
+    if value is None:
+        delete(state, key)
+        state[key] = None
+        return
+    artifact_id = current.id if isinstance(current, ArtifactHandle) else uuid.uuid4().hex
+    size = get_store().put(artifact_id, _session_id(state), value)
+    state[key] = ArtifactHandle(artifact_id, size)
+
+
+def get(state, key, default=None):
+    """The value stored under state[key], or `default` if missing or evicted."""
+    value = state.get(key)
+    if isinstance(value, ArtifactHandle):
+        value = get_store().get(value.id)
+        if value is None:
+            state[key] = None
+    return default if value is None else value
+
+
+def delete(state, key):
+    """Remove state[key] and its stored artifact."""
+    value = state.get(key)
+    if isinstance(value, ArtifactHandle):
+        get_store().delete(value.id)
+    if key in state:
+        del state[key]
+
+
+def _memory_size(value):
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+def session_usage(state, memory=True):
+    """Approximate bytes this session holds in memory and on disk.
+
+    Measuring memory pickles the whole state; with `memory` false,
+    memory_bytes is None.
+    """
+    memory_bytes = 0 if memory else None
+    stored = 0
+    artifacts = 0
+    for key in list(state.keys()):
+        value = state[key]
+        if memory:
+            memory_bytes += _memory_size(value)
+        if isinstance(value, ArtifactHandle):
+            stored += value.size
+            artifacts += 1
+    return {"memory_bytes": memory_bytes, "stored_bytes": stored, "artifacts": artifacts, "keys": len(state)}
+
+
+def record_session(state):
+    """Remember this session's usage for session_report().
+
+    Called on every script run, so the in-memory size is only re-measured
+    every SESSION_USAGE_SAMPLE_INTERVAL seconds per session; the runs in
+    between keep the last measurement.
+    """
+    session = _session_id(state)
+    now = time.time()
+    with _sessions_lock:
+        previous = _sessions.get(session)
+    sample = previous is None or now - previous[2] >= config.SESSION_USAGE_SAMPLE_INTERVAL
+    usage = session_usage(state, memory=sample)
+    if not sample:
+        usage["memory_bytes"] = previous[0]["memory_bytes"]
+    with _sessions_lock:
+        _sessions[session] = (usage, now, now if sample else previous[2])
+        if config.SESSION_ARTIFACT_TTL:
+            for other, (_, seen, _) in list(_sessions.items()):
+                if now - seen > config.SESSION_ARTIFACT_TTL:
+                    del _sessions[other]
+    return usage
+
+
+def session_report():
+    """Usage of every recently active session in this process, largest first."""
+    with _sessions_lock:
+        rows = [
+            {"session": session[:8], "last_seen": seen, **usage}
+            for session, (usage, seen, _) in _sessions.items()
+        ]
+    return sorted(rows, key=lambda row: row["memory_bytes"], reverse=True)
@@ -0,0 +1,92 @@
+"""Coalesce identical in-flight requests into one call.
+
+When many sessions ask for the same thing at the same moment (a trending
+cheatsheet topic, for instance), the first caller originates the request and
+everyone else with the same key waits for its result instead of making their
+own call.
+"""
+import threading
+
+from utils import metrics
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def begin(self, key):
+        """Join the in-flight call for `key`, or start one.
+
+        Returns (call, is_leader). The leader must call finish(); followers
+        use wait().
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                metrics.increment("singleflight_calls", labels={"group": self.name, "role": "coalesced"})
+                return call, False
+            call = self._calls[key] = _Call()
+        metrics.increment("singleflight_calls", labels={"group": self.name, "role": "originated"})
+        return call, True
+
+    def finish(self, key, call, result=None, error=None):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.result = result
+        call.error = error
+        call.done.set()
+
+    def abandon(self, key, call, error):
+        """Fail `call` because the leader stopped, unless someone joined it.
+
+        Returns False, leaving the call open, if followers are waiting: the
+        leader should then finish it for them.
+        """
+        with self._lock:
+            if call.followers:
+                return False
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.error = error
+        call.done.set()
+        return True
+
+    @staticmethod
+    def wait(call):
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def do(self, key, fn):
+        """Return fn(), sharing one execution among concurrent callers of `key`."""
+        call, leader = self.begin(key)
+        if not leader:
+            return self.wait(call)
+        try:
+            result = fn()
+        except BaseException as e:
+            # Includes Streamlit's rerun/stop exceptions, which must not
+            # reach the followers' threads but must still release them
+            self.finish(key, call, error=e if isinstance(e, Exception) else RuntimeError("call abandoned"))
+            raise
+        self.finish(key, call, result=result)
+        return result
+
+    def stats(self):
+        return {
+            "originated": metrics.get_counter("singleflight_calls", labels={"group": self.name, "role": "originated"}),
+            "coalesced": metrics.get_counter("singleflight_calls", labels={"group": self.name, "role": "coalesced"}),
+        }
@@ -0,0 +1,192 @@
+"""Local near-duplicate index of previously generated cheatsheet topics.
+
+Topics are normalised (case, punctuation, accents, stop words, plain
+English plurals and word order), so "Python data structures", "python
+Data-Structures" and "Data structures in Python" share a key. For looser matches, each normalised topic
+gets a MinHash signature over its character trigrams, and the signature is
+banded into a SQLite LSH table. A query only compares the few topics that
+share a band with it, so lookups stay fast at hundreds of thousands of
+topics. Topics are only compared within a partition (difficulty, type,
+length, extra requirements and model), so a match is always a cheatsheet
+generated for the same options.
+"""
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from utils import config
+
+NUM_PERMUTATIONS = 64
+BAND_ROWS = 4
+# Each "permutation" XORs a 64-bit shingle hash with a fixed random mask;
+# cheaper than modular hashing, and candidates are verified exactly anyway
+_MASKS = [random.Random(1729 + i).getrandbits(64) for i in range(NUM_PERMUTATIONS)]
+
+_STOP_WORDS = {"a", "an", "and", "for", "in", "into", "of", "on", "the", "to", "with", "using", "vs", "&"}
+_NON_WORD_RE = re.compile(r"[^A-Za-z0-9+#]+")
+# Words that end in "s" without being plurals (fields, product names); a
+# stripped "s" would make them match an unrelated topic
+_NOT_PLURAL = {"pandas", "kubernetes", "jenkins", "redis", "atlas", "canvas", "series", "species",
+               "news", "chaos", "windows", "keras"}
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _singular(word):
+    """Lower-case singular of `word`, leaving alone anything that may not be a plural.
+
+    Short words and words written with capitals past the first letter are
+    usually acronyms or names (AWS, HTTPS, iOS), so only plain words of
+    five letters or more are changed.
+    """
+    lower = word.lower()
+    if len(word) < 5 or word[1:] != word[1:].lower() or lower in _NOT_PLURAL:
+        return lower
+    if lower.endswith("ies"):
+        return lower[:-3] + "y"
+    if lower.endswith("s") and not lower.endswith(("ss", "us", "is", "ics")):
+        return lower[:-1]
+    return lower
+
+
+def normalize_topic(topic):
+    """Order-insensitive canonical form of a topic."""
+    text = unicodedata.normalize("NFKD", topic).encode("ascii", "ignore").decode("ascii")
+    words = [_singular(word) for word in _NON_WORD_RE.split(text) if word and word.lower() not in _STOP_WORDS]
+    return " ".join(sorted(set(words)))
+
+
+def shingles(normalized, size=3):
+    """Character n-grams of a normalised topic."""
+    padded = f" {normalized} "
+    if len(padded) <= size:
+        return {padded}
+    return {padded[i:i + size] for i in range(len(padded) - size + 1)}
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def minhash(grams):
+    hashes = [int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "big")
+              for gram in grams]
+    return [min(h ^ mask for h in hashes) for mask in _MASKS]
+
+
+def _band_buckets(partition, signature):
+    buckets = []
+    for band in range(0, NUM_PERMUTATIONS, BAND_ROWS):
+        values = ",".join(str(v) for v in signature[band:band + BAND_ROWS])
+        digest = hashlib.blake2b(f"{partition}|{band}|{values}".encode("utf-8"), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "big", signed=True))
+    return buckets
+
+
+class TopicIndex:
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # The index can be rebuilt from use, so it doesn't need an fsync per insert
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS topics ("
+            " id INTEGER PRIMARY KEY,"
+            " partition TEXT NOT NULL,"
+            " normalized TEXT NOT NULL,"
+            " topic TEXT NOT NULL,"
+            " cache_key TEXT NOT NULL UNIQUE,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS topics_normalized ON topics (partition, normalized)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " bucket INTEGER NOT NULL,"
+            " topic_id INTEGER NOT NULL,"
+            " PRIMARY KEY (bucket, topic_id)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def add(self, partition, topic, cache_key):
+        """Index `topic` as the cheatsheet stored under `cache_key`."""
+        normalized = normalize_topic(topic)
+        buckets = _band_buckets(partition, minhash(shingles(normalized)))
+        with self._lock:
+            self._remove(cache_key)
+            cursor = self._conn.execute(
+                "INSERT INTO topics (partition, normalized, topic, cache_key, created_at) VALUES (?, ?, ?, ?, ?)",
+                (partition, normalized, topic, cache_key, time.time()),
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO buckets (bucket, topic_id) VALUES (?, ?)",
+                [(bucket, cursor.lastrowid) for bucket in buckets],
+            )
+            self._conn.commit()
+
+    def find(self, partition, topic, threshold):
+        """Most similar indexed topics in `partition`, best first.
+
+        Returns (similarity, topic, cache_key) tuples at or above `threshold`.
+        """
+        normalized = normalize_topic(topic)
+        grams = shingles(normalized)
+        with self._lock:
+            exact = self._conn.execute(
+                "SELECT topic, cache_key FROM topics WHERE partition = ? AND normalized = ? ORDER BY id DESC",
+                (partition, normalized),
+            ).fetchall()
+            if exact or threshold >= 1:
+                return [(1.0, row[0], row[1]) for row in exact]
+            buckets = _band_buckets(partition, minhash(grams))
+            placeholders = ",".join("?" * len(buckets))
+            candidates = self._conn.execute(
+                "SELECT normalized, topic, cache_key FROM topics WHERE id IN ("
+                f" SELECT topic_id FROM buckets WHERE bucket IN ({placeholders})) AND partition = ?",
+                (*buckets, partition),
+            ).fetchall()
+        matches = [(jaccard(grams, shingles(other)), other_topic, cache_key)
+                   for other, other_topic, cache_key in candidates]
+        return sorted((m for m in matches if m[0] >= threshold), reverse=True)
+
+    def remove(self, cache_key):
+        """Forget the topic stored under `cache_key` (e.g. after the cheatsheet expired)."""
+        with self._lock:
+            self._remove(cache_key)
+            self._conn.commit()
+
+    def _remove(self, cache_key):
+        row = self._conn.execute(
+            "SELECT id, partition, normalized FROM topics WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+        if row is None:
+            return
+        topic_id, partition, normalized = row
+        # Recompute the buckets so the delete uses the primary key
+        buckets = _band_buckets(partition, minhash(shingles(normalized)))
+        self._conn.executemany(
+            "DELETE FROM buckets WHERE bucket = ? AND topic_id = ?", [(bucket, topic_id) for bucket in buckets]
+        )
+        self._conn.execute("DELETE FROM topics WHERE id = ?", (topic_id,))
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM topics").fetchone()[0]
+
+
+def get_topic_index():
+    """Return the process-wide topic index, opening it on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = TopicIndex(os.path.join(config.CACHE_DIR, "topic_index.sqlite3"))
+        return _index
@@ -0,0 +1,60 @@
+"""Per-process start-up, run from the top of every page.
+
+start() serves the Prometheus endpoint if one is configured, whichever page
+runs first. Heavy dependencies (LangChain, ReportLab, PyPDF2) are imported
+at the point of use so a page loads without them. When CAREERECHO_WARMUP is set, the
+first script run starts a daemon thread that imports them and builds the
+LLM clients, so the first real request on a new replica doesn't pay for it.
+Each step is timed into the warmup_seconds histogram.
+"""
+import importlib
+import threading
+import time
+
+from utils import config, metrics
+
+MODULES = [
+    "langchain_core.messages",
+    "langchain_core.runnables",
+    "langchain_google_genai",
+    "PyPDF2",
+    "utils.pdf",
+]
+
+_lock = threading.Lock()
+_thread = None
+
+
+def _run():
+    start = time.perf_counter()
+    for name in MODULES:
+        if name == "langchain_google_genai" and config.LLM_PROVIDER in ("fake", "fake_server"):
+            continue
+        try:
+            with metrics.timed("warmup", {"step": name}):
+                importlib.import_module(name)
+        except Exception as e:
+            print(f"Warm-up could not import {name}: {e}")
+    try:
+        from utils.llm import get_llm
+        from utils.routing import get_routing
+
+        with metrics.timed("warmup", {"step": "llm_client"}):
+            for tier in get_routing().tiers:
+                get_llm(tier)
+    except Exception as e:
+        print(f"Warm-up could not create the LLM clients: {e}")
+    print(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
+
+
+def start(force=False):
+    """Serve metrics if configured, and start the warm-up thread once per process if it is enabled."""
+    global _thread
+    metrics.serve_configured()
+    if not (config.WARMUP or force):
+        return None
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="careerecho-warmup", daemon=True)
+            _thread.start()
+    return _thread